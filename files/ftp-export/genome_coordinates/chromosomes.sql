@@ -0,0 +1,14 @@
+SELECT
+  regions.chromosome,
+  count(distinct regions.id)
+FROM rnc_rna_precomputed pre
+JOIN rnc_sequence_regions_active regions
+ON
+  regions.urs_taxid = pre.id
+WHERE
+  pre.is_active = true
+  AND pre.rna_type IS DISTINCT FROM 'NULL'
+  AND regions.assembly_id = %(assembly_id)s
+  AND exists(select 1 from rnc_sequence_exons exons where exons.region_id = regions.id)
+GROUP BY regions.chromosome
+ORDER BY regions.chromosome
@@ -38,3 +38,21 @@ def cli():
 @click.argument("output", type=click.Path())
 def index_taxonomy(ncbi, output):
     taxonomy.index(Path(ncbi), output)
+
+
+@cli.command("index-names")
+@click.argument(
+    "ncbi",
+    type=click.Path(
+        writable=True,
+        dir_okay=True,
+        file_okay=False,
+    ),
+)
+@click.argument("output", type=click.Path())
+def index_taxonomy_names(ncbi, output):
+    """
+    Build the index of taxonomy names to taxids, which is used to find taxids
+    for lineages without using the EBI taxonomy API.
+    """
+    taxonomy.index_names(Path(ncbi), output)
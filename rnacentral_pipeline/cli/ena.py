@@ -18,7 +18,7 @@ from pathlib import Path
 
 import click
 
-from rnacentral_pipeline.databases.ena import context, parser
+from rnacentral_pipeline.databases.ena import batch, context, parser
 from rnacentral_pipeline.rnacentral.notify.slack import send_notification
 from rnacentral_pipeline.writers import entry_writer
 
@@ -57,7 +57,6 @@ def process_ena(
     builder = context.ContextBuilder()
     builder.with_ribovore(Path(ribovore_path), Path(model_lengths))
     builder.with_tpa(Path(mapping_file))
-    builder.with_dr(ena_file)
     ctx = builder.context()
     entries = parser.parse_with_context(ctx, ena_file)
     try:
@@ -83,3 +82,72 @@ def process_ena(
         send_notification("ENA parsing error", message)
 
     ctx.dump_counts(Path(counts))
+
+
+@cli.command("parse-many")
+@click.option("--counts", default="processing-results.txt")
+@click.option("--workers", default=None, type=int)
+@click.option(
+    "--ribovore-directory",
+    default=None,
+    type=click.Path(dir_okay=True, file_okay=False),
+    help="Directory containing one ribovore result directory per ENA file",
+)
+@click.argument("mapping_file", type=click.Path(file_okay=True))
+@click.argument("model_lengths", type=click.Path(file_okay=True))
+@click.argument(
+    "output",
+    type=click.Path(
+        writable=True,
+        dir_okay=True,
+        file_okay=False,
+    ),
+)
+@click.argument("ena_files", nargs=-1, type=click.Path(exists=True))
+def process_many_ena(
+    mapping_file,
+    model_lengths,
+    output,
+    ena_files,
+    counts=None,
+    workers=None,
+    ribovore_directory=None,
+):
+    """
+    Process many ENA EMBL formatted files, or directories of them, into a
+    single set of CSV files to import. The TPA mappings are only loaded once
+    and shared by all workers. The ribovore results for each file are read
+    from a directory named after the file in the ribovore directory, if any.
+    """
+
+    paths = []
+    for ena_file in ena_files:
+        path = Path(ena_file)
+        if path.is_dir():
+            paths.extend(sorted(p for p in path.iterdir() if p.is_file()))
+        else:
+            paths.append(path)
+
+    builder = context.ContextBuilder()
+    builder.with_tpa(Path(mapping_file))
+    shared = batch.SharedContext(
+        context=builder.context(),
+        ribovore_directory=Path(ribovore_directory) if ribovore_directory else None,
+        model_lengths=Path(model_lengths),
+    )
+    ctx = shared.context.for_file()
+    ctx.counts.update(batch.process_files(shared, paths, Path(output), workers))
+    ctx.dump_counts(Path(counts))
+
+    if ctx.counts["empty_files"]:
+        print("No entries could be written for some of the parsed ENA files.")
+        print("Sending warning to slack, but carrying on")
+
+        empty = ctx.counts["empty_files"]
+        message = f"No entries could be written for {empty} of {len(paths)} files\n"
+        message += "This may be correct, but you should check the log\n"
+        message += f"Working directory: {os.getcwd()}\n"
+        message += "\nContext counts:\n"
+        message += open(Path(counts), "r").read()
+
+        send_notification("ENA parsing error", message)
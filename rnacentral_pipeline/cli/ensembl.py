@@ -26,6 +26,7 @@ from rnacentral_pipeline.databases.ensembl.metadata import (
     assemblies,
     compara,
     coordinate_systems,
+    core,
     karyotypes,
     proteins,
 )
@@ -103,60 +104,144 @@ def parse_data(division, embl_file, gff_file, output, family_file=None):
 
 @cli.command("assemblies")
 @click.option("--db-url", envvar="PGDATABASE")
+@click.option("--workers", default=1, type=int)
+@click.option("--cache", default=None, type=click.Path())
 @click.argument("connections", default="databases.json", type=click.File("r"))
 @click.argument("query", default="query.sql", type=click.File("r"))
 @click.argument("example_file", default="example-locations.json", type=click.File("r"))
 @click.argument("known_file", default="known-assemblies.sql", type=click.File("r"))
 @click.argument("output", default="assemblies.csv", type=click.File("w"))
 def ensembl_write_assemblies(
-    connections, query, example_file, known_file, output, db_url=None
+    connections,
+    query,
+    example_file,
+    known_file,
+    output,
+    db_url=None,
+    workers=1,
+    cache=None,
 ):
     """
     This will query the ensembl databases in the connections file and write the
     output to the given file.
     """
     assemblies.write(
-        connections, query, example_file, known_file, output, db_url=db_url
+        connections,
+        query,
+        example_file,
+        known_file,
+        output,
+        db_url=db_url,
+        workers=workers,
+        cache_path=cache,
+    )
+
+
+@cli.command("core-metadata")
+@click.option("--db-url", envvar="PGDATABASE")
+@click.option("--workers", default=1, type=int)
+@click.option("--cache", default=None, type=click.Path())
+@click.argument("connections", type=click.File("r"))
+@click.argument("assembly_query", type=click.File("r"))
+@click.argument("coordinate_query", type=click.File("r"))
+@click.argument("protein_query", type=click.File("r"))
+@click.argument("example_file", type=click.File("r"))
+@click.argument("known_file", type=click.File("r"))
+@click.argument(
+    "output",
+    default=".",
+    type=click.Path(writable=True, dir_okay=True, file_okay=False),
+)
+def ensembl_core_metadata(
+    connections,
+    assembly_query,
+    coordinate_query,
+    protein_query,
+    example_file,
+    known_file,
+    output,
+    db_url=None,
+    workers=1,
+    cache=None,
+):
+    """
+    Write the assemblies, coordinate systems and proteins of all Ensembl core
+    databases in a single pass over the databases. This produces the same
+    files as the assemblies, coordinate-systems and proteins commands.
+    """
+    core.write(
+        connections,
+        assembly_query,
+        coordinate_query,
+        protein_query,
+        example_file,
+        known_file,
+        Path(output),
+        db_url=db_url,
+        workers=workers,
+        cache_path=cache,
     )
 
 
 @cli.command("coordinate-systems")
+@click.option("--workers", default=1, type=int)
+@click.option("--cache", default=None, type=click.Path())
 @click.argument("connections", default="databases.json", type=click.File("r"))
 @click.argument("query", default="query.sql", type=click.File("r"))
 @click.argument("output", default="coordinate_systems.csv", type=click.File("w"))
-def ensembl_coordinates(connections, query, output):
+def ensembl_coordinates(connections, query, output, workers=1, cache=None):
     """
     Turn the tsv from the ensembl query into a csv that can be imported into
     the database.
     """
-    coordinate_systems.write(connections, query, output)
+    coordinate_systems.write(
+        connections, query, output, workers=workers, cache_path=cache
+    )
 
 
 @cli.command("karyotypes")
+@click.option("--cache", default=None, type=click.Path())
+@click.option("--workers", default=8, type=int)
+@click.option("--from-directory", default=None, type=click.Path(file_okay=False))
 @click.argument("output", default="karyotypes.csv", type=click.File("w"))
 @click.argument("species", nargs=-1)
-def ensembl_write_karyotypes(output, species):
+def ensembl_write_karyotypes(
+    output, species, cache=None, workers=8, from_directory=None
+):
     """
     Fetch all the karyotype information from all Ensembl species. This will use
-    the Ensembl API to fetch the data and write to the given output file.
+    the Ensembl API to fetch the data and write to the given output file. If a
+    cache file is given, then the karyotypes are stored there and only species
+    which are new for the current Ensembl release are fetched.
     """
     if not species:
         species = None
     else:
         species = set(species)
-    karyotypes.write(output, species=species)
+    sources = None
+    if from_directory:
+        sources = [karyotypes.DirectorySource(from_directory)]
+    karyotypes.write(
+        output,
+        species=species,
+        sources=sources,
+        cache_path=cache,
+        workers=workers,
+    )
 
 
 @cli.command("proteins")
+@click.option("--workers", default=1, type=int)
+@click.option("--cache", default=None, type=click.Path())
 @click.argument("connections", default="databases.json", type=click.File("r"))
 @click.argument("query", default="query.sql", type=click.File("r"))
 @click.argument("output", default="proteins.csv", type=click.File("w"))
-def ensembl_proteins_cmd(connections, query, output):
+def ensembl_proteins_cmd(connections, query, output, workers=1, cache=None):
     """
     This will process the ensembl protein information files. This assumes the
     file is sorted.
     """
-    proteins.write(connections, query, output)
+    proteins.write(connections, query, output, workers=workers, cache_path=cache)
 
 
 @cli.command("compara")
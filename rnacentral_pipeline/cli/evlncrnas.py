@@ -17,6 +17,7 @@ from pathlib import Path
 
 import click
 
+from rnacentral_pipeline.databases.evlncrnas import sequences
 from rnacentral_pipeline.databases.evlncrnas.parser import parse
 from rnacentral_pipeline.writers import entry_writer
 
@@ -38,10 +39,25 @@ def cli():
     type=click.Path(writable=True, dir_okay=True, file_okay=False),
     nargs=1,
 )
-def process_xlsx_files(db_dir, db_dump, output, db_url):
+@click.option(
+    "--cache",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="A file to cache fetched sequences in, which can be reused",
+)
+@click.option("--workers", default=4, type=int)
+@click.option(
+    "--offline",
+    is_flag=True,
+    default=False,
+    help="Only use sequences from the cache",
+)
+def process_xlsx_files(db_dir, db_dump, output, db_url, cache, workers, offline):
     """
     This parses the decompressed contents of the download into our csv files for import
     """
-    entries = parse(Path(db_dir), db_dump, db_url)
-    with entry_writer(Path(output)) as writer:
-        writer.write(entries)
+    with sequences.resolvers(cache, workers=workers, offline=offline) as found:
+        ncbi, ensembl = found
+        entries = parse(Path(db_dir), db_dump, db_url, ncbi=ncbi, ensembl=ensembl)
+        with entry_writer(Path(output)) as writer:
+            writer.write(entries)
@@ -13,14 +13,18 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+from pathlib import Path
+
 import click
 
+from rnacentral_pipeline import db
 from rnacentral_pipeline.rnacentral.ftp_export import fasta
 from rnacentral_pipeline.rnacentral.ftp_export import go_terms
 from rnacentral_pipeline.rnacentral.ftp_export import id_mapping
 from rnacentral_pipeline.rnacentral.ftp_export import release_note
 from rnacentral_pipeline.rnacentral.ftp_export.coordinates import bed
 from rnacentral_pipeline.rnacentral.ftp_export.coordinates import gff3
+from rnacentral_pipeline.rnacentral.ftp_export.coordinates import shards
 from rnacentral_pipeline.rnacentral.ftp_export import ensembl as ensembl_json
 from rnacentral_pipeline.rnacentral.ftp_export import gpi
 
@@ -65,19 +69,37 @@ def export_sequences():
 
 
 @export_sequences.command("valid-nhmmer")
-@click.argument("active", type=click.File("r"))
-@click.argument("output", default="-", type=click.File("w"))
+@click.argument("active", type=click.File("rb"))
+@click.argument("output", default="-", type=click.File("wb"))
 def sequences_valid_nhmmer(active, output):
     fasta.valid_nhmmer(active, output)
 
 
 @export_sequences.command("invalid-nhmmer")
-@click.argument("active", type=click.File("r"))
-@click.argument("output", default="-", type=click.File("w"))
+@click.argument("active", type=click.File("rb"))
+@click.argument("output", default="-", type=click.File("wb"))
 def sequences_invalid_nhmmer(active, output):
     fasta.invalid_nhmmer(active, output)
 
 
+@export_sequences.command("split-nhmmer")
+@click.option("--max-size", default=1024 * 1024 * 1024, type=int)
+@click.option("--invalid", default=None, type=click.File("wb"))
+@click.argument("active", type=click.File("rb"))
+@click.argument(
+    "output",
+    default=".",
+    type=click.Path(writable=True, dir_okay=True, file_okay=False),
+)
+def sequences_split_nhmmer(active, output, invalid=None, max_size=None):
+    """
+    Write the sequences which are valid for nhmmer into FASTA files of at most
+    max-size bytes in the output directory. The invalid sequences can be
+    written to a separate file at the same time.
+    """
+    fasta.shard_nhmmer(active, Path(output), max_size, invalid=invalid)
+
+
 @cli.command("ensembl")
 @click.argument("raw", type=click.File("r"))
 @click.argument("output", default="-", type=click.File("w"))
@@ -104,9 +126,10 @@ def export_go_temrs(filename, output):
 
 @cli.command("gpi")
 @click.option("--db-url", envvar="PGDATABASE")
+@click.option("--itersize", default=db.ITERSIZE, type=int)
 @click.argument("output", default="-", type=click.File("w"))
-def export_gpi(output, db_url):
-    gpi.export(db_url, output)
+def export_gpi(output, db_url, itersize=db.ITERSIZE):
+    gpi.export(db_url, output, itersize=itersize)
 
 
 @cli.group("coordinates")
@@ -139,3 +162,31 @@ def format_as_gff3(json_file, output, allow_none=False):
     file.
     """
     gff3.from_file(json_file, output, allow_none=allow_none)
+
+
+@export_coordinates.command("export-assemblies")
+@click.option("--db-url", envvar="PGDATABASE")
+@click.option("--workers", default=4, type=int)
+@click.option("--shard-size", default=shards.SHARD_SIZE, type=int)
+@click.argument("assemblies", type=click.File("r"))
+@click.argument(
+    "output",
+    default=".",
+    type=click.Path(writable=True, dir_okay=True, file_okay=False),
+)
+def export_assemblies(assemblies, output, db_url, workers=4, shard_size=None):
+    """
+    This will export the sorted and gzipped BED and GFF3 files, along with the
+    bgzipped GFF3 file for IGV, for all assemblies in the given CSV file, as
+    produced by the known coordinates query. The files are written into the
+    bed, gff3 and igv directories of the output. Large assemblies are split by
+    chromosome and exported concurrently, using at most one database
+    connection per worker.
+    """
+    shards.export(
+        db_url,
+        shards.Assembly.from_file(assemblies),
+        Path(output),
+        workers=workers,
+        shard_size=shard_size,
+    )
@@ -19,6 +19,7 @@ from pathlib import Path
 import click
 
 from rnacentral_pipeline.databases.generic import v1
+from rnacentral_pipeline.databases.helpers import gtdb
 from rnacentral_pipeline.databases.mgnify.prepare import prepare_mgnify_data
 from rnacentral_pipeline.writers import entry_writer
 
@@ -38,7 +39,32 @@ def cli():
     type=click.Path(writable=True, dir_okay=True, file_okay=False),
 )
 @click.option("--db_url", envvar="PGDATABASE")
-def process_json_schema(json_file, output, db_url):
+@click.option(
+    "--taxonomy",
+    default=None,
+    type=click.Path(),
+    help="Name index built with `context index-names`",
+)
+@click.option(
+    "--lineage-cache",
+    default=None,
+    type=click.Path(),
+    help="File to store resolved lineages in between runs",
+)
+@click.option(
+    "--retry-unresolved",
+    is_flag=True,
+    default=False,
+    help="Try to resolve lineages the lineage cache has no taxid for again",
+)
+def process_json_schema(
+    json_file,
+    output,
+    db_url,
+    taxonomy=None,
+    lineage_cache=None,
+    retry_unresolved=False,
+):
     """
     Load and parse mgnify data
     """
@@ -47,7 +73,15 @@ def process_json_schema(json_file, output, db_url):
     # - Figuring out a taxid for each entry
     # - Adding a type based on the source model
     data = json.load(json_file)
-    data = prepare_mgnify_data(data, db_url)
+    resolver = gtdb.LineageResolver.build(
+        taxonomy=taxonomy,
+        cache=lineage_cache,
+        retry_unresolved=retry_unresolved,
+    )
+    try:
+        data = prepare_mgnify_data(data, db_url, resolver=resolver)
+    finally:
+        resolver.close()
 
     entries = v1.parse(data)
 
@@ -54,9 +54,21 @@ def genes():
 
 
 @genes.command("fetch")
-@click.argument("output", default="ncbi-genes.pickle", type=click.File("w"))
-def fetch_genes(output):
-    gene_fetch.write(output)
+@click.option("--workers", default=3, type=int)
+@click.option(
+    "--cache",
+    default=None,
+    type=click.Path(),
+    help="A SqliteDict of fetched sequences, used to only fetch changed genes",
+)
+@click.option("--api-key", default=None, help="The NCBI API key to use")
+@click.argument("output", default="ncbi-genes.pickle", type=click.File("wb"))
+def fetch_genes(output, workers=None, cache=None, api_key=None):
+    """
+    Fetch the sequences of all ncRNA genes in NCBI gene and write them as a
+    pickle stream to OUTPUT.
+    """
+    gene_fetch.write(output, api_key=api_key, cache_path=cache, workers=workers)
 
 
 @cli.command("parse")
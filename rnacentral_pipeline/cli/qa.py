@@ -31,12 +31,20 @@ def cli():
 @cli.command("rfam")
 @click.argument("tblout", default="-", type=click.File("r"))
 @click.argument("output", default="-", type=click.File("w"))
-def process_tblout(tblout, output):
+@click.option("--min-score", type=float, default=None)
+@click.option("--max-e-value", type=float, default=None)
+def process_tblout(tblout, output, min_score=None, max_e_value=None):
     """
     Process a table out file and create a CSV for importing into our database.
-    This will overwrite the given file.
+    This will overwrite the given file. Hits can be filtered by their score
+    and E-value.
     """
-    rfam.infernal_results.as_csv(tblout, output)
+    rfam.infernal_results.as_csv(
+        tblout,
+        output,
+        min_score=min_score,
+        max_e_value=max_e_value,
+    )
 
 
 @cli.command("dfam")
@@ -98,9 +98,15 @@ def fetch_inspect_data(filename, output, db_url=None):
 
 @should_show.command("build-model")
 @click.option("--db-url", envvar="PGDATABASE")
+@click.option(
+    "--features",
+    default=None,
+    type=click.File("r"),
+    help="Use the features from fetch-data instead of the database",
+)
 @click.argument("training-info", type=click.File("r"))
 @click.argument("model", type=click.Path())
-def build_model(training_info, model, db_url=None):
+def build_model(training_info, model, db_url=None, features=None):
     """
     This builds a model given then training information. The training
     information should be a csv file of:
@@ -109,7 +115,20 @@ def build_model(training_info, model, db_url=None):
     will fetch the data like the fetch-data command but will then build a model
     and write it out the the output file directly.
     """
-    r2dt.build_model(training_info, db_url, Path(model))
+    r2dt.build_model(training_info, db_url, Path(model), features=features)
+
+
+@should_show.command("evaluate")
+@click.argument("model", type=click.Path())
+@click.argument("training-info", type=click.File("r"))
+@click.argument("features", type=click.File("r"))
+@click.argument("output", default="-", type=click.File("w"))
+def evaluate_model(model, training_info, features, output):
+    """
+    Write the accuracy of the model on the labeled URS in training-info using
+    the features, as produced by fetch-data, in features.
+    """
+    r2dt.evaluate_model(Path(model), training_info, features, output)
 
 
 @should_show.command("compute")
@@ -38,11 +38,22 @@ def cli():
     default=".",
     type=click.Path(writable=True, dir_okay=True, file_okay=False),
 )
-def process_rfam(mapping_file, sequence_info, sequence_fasta, output):
+@click.option(
+    "--index",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="Where to store the sequence index, which is reused if it exists",
+)
+def process_rfam(mapping_file, sequence_info, sequence_fasta, output, index=None):
     """
     Process Rfam's JSON format into the files to import.
     """
-    entries = rfam.parser.parse(mapping_file, sequence_info, Path(sequence_fasta))
+    entries = rfam.parser.parse(
+        mapping_file,
+        sequence_info,
+        Path(sequence_fasta),
+        index_path=Path(index) if index else None,
+    )
     with entry_writer(Path(output)) as writer:
         writer.write(entries)
 
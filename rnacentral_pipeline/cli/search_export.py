@@ -13,6 +13,8 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+from pathlib import Path
+
 import click
 
 from rnacentral_pipeline.databases.sequence_ontology import tree as so
@@ -81,7 +83,62 @@ def so_term_tree(filename, output, ontology=None):
     metadata.write_so_term_tree(filename, ontology, output)
 
 
+def comparison_index(url, index):
+    if index:
+        with open(index, "r") as raw:
+            return compare.LocalIndex.load(raw)
+    return compare.RemoteIndex(url)
+
+
 @cli.command("compare")
+@click.option("--before-url", default=compare.PRODUCTION)
+@click.option("--after-url", default=compare.DEVELOPMENT)
+@click.option(
+    "--before-index",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+    help="Use a local index, from index-facets, instead of --before-url",
+)
+@click.option(
+    "--after-index",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+    help="Use a local index, from index-facets, instead of --after-url",
+)
+@click.option("--workers", default=8, type=int)
+@click.option("--format", default="tsv", type=click.Choice(["tsv", "json"]))
+@click.argument("output", type=click.File("w"))
+def compare_release(
+    output,
+    before_url=None,
+    after_url=None,
+    before_index=None,
+    after_index=None,
+    workers=None,
+    format=None,
+):
+    """
+    Compare the facet counts of two search indexes, by default the production
+    and development EBI Search indexes.
+    """
+    compare.write(
+        output,
+        before=comparison_index(before_url, before_index),
+        after=comparison_index(after_url, after_index),
+        workers=workers,
+        format=format,
+    )
+
+
+@cli.command("index-facets")
+@click.option("--name", default="local")
 @click.argument("output", type=click.File("w"))
-def compare_release(output):
-    compare.write(output)
+@click.argument("xml_files", nargs=-1, type=click.Path(exists=True, dir_okay=False))
+def index_facets(output, xml_files, name=None):
+    """
+    Compute the facet counts used by compare from the given search export XML
+    files, so that an export can be compared without EBI Search.
+    """
+    paths = [Path(f) for f in xml_files]
+    index = compare.LocalIndex.build(paths, compare.QUERIES, compare.FACETS, name=name)
+    index.dump(output)
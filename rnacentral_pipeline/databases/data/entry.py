@@ -47,7 +47,7 @@ FEATURE_TYPE_RNAS = set(
 )
 
 
-@attr.s(frozen=True)
+@attr.s(frozen=True, slots=True)
 class Entry:
     """
     This represents an RNAcentral entry that will be imported into the
@@ -55,6 +55,11 @@ class Entry:
     data that is loaded from expert databases. For example it should contain
     information for rna (sequence), rnc_accessions, rnc_coordinates, and so
     forth.
+
+    Building an Entry runs all converters and validators. Large producers,
+    like the generic JSON, pirBase and Rfam parsers, instead build entries
+    with `utils.trusted` and then convert and validate them in batches with
+    `utils.validated`.
     """
 
     # Also known as external_id
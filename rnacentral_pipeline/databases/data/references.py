@@ -48,7 +48,7 @@ class UnknownPublicationType(Exception):
     pass
 
 
-@attr.s(frozen=True)
+@attr.s(frozen=True, slots=True)
 class Reference(object):
     """
     This stores the data for a reference that will be written to out to csv
@@ -132,7 +132,7 @@ class Reference(object):
         return refs
 
 
-@attr.s(frozen=True, hash=True)
+@attr.s(frozen=True, hash=True, slots=True)
 class IdReference(object):
     namespace: KnownServices = attr.ib(validator=is_a(KnownServices))
     external_id: str = attr.ib(validator=is_a(str))
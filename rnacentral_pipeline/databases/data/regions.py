@@ -21,6 +21,8 @@ import attr
 from attr.validators import instance_of as is_a
 from attrs import field, frozen
 
+from . import utils
+
 
 class UnknownStrand(Exception):
     """
@@ -221,6 +223,10 @@ class Exon:
     def from_dict(cls, raw):
         return cls(start=raw["exon_start"], stop=raw["exon_stop"])
 
+    @classmethod
+    def trusted(cls, start: int, stop: int) -> "Exon":
+        return utils.trusted(cls, start=start, stop=stop)
+
     @stop.validator
     def greater_than_start(self, _attribute, value):
         if value < self.start:
@@ -248,6 +254,15 @@ class SequenceRegion:
         converter=CoordinateSystem.build,
     )
 
+    @classmethod
+    def trusted(cls, **kwargs) -> "SequenceRegion":
+        """
+        Build a region without running converters or validators. The exons
+        must already be a sorted tuple of Exons and the strand and coordinate
+        system must be built.
+        """
+        return utils.trusted(cls, **kwargs)
+
     @property
     def start(self):
         return self.exons[0].start
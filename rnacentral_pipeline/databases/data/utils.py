@@ -13,11 +13,17 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import functools as ft
+import operator as op
 import re
+import typing as ty
 
 import attr
 from attr.validators import instance_of as is_a
 from attr.validators import optional
+from more_itertools import chunked
+
+VALIDATION_BATCH_SIZE = 10000
 
 SO_PATTERN = re.compile(r"^SO:\d+$")
 
@@ -190,3 +196,156 @@ def as_so_term(rna_type: str) -> str:
     if rna_type not in INSDC_SO_MAPPING:
         raise UnxpectedRnaType(rna_type)
     return INSDC_SO_MAPPING[rna_type]
+
+
+class MissingTrustedValue(TypeError):
+    """
+    Raised when building a trusted instance without a value for a field that
+    has no default.
+    """
+
+    pass
+
+
+@ft.lru_cache(maxsize=None)
+def trusted_fields(cls) -> ty.Tuple[ty.Tuple[str, ty.Any], ...]:
+    """
+    Get the (name, default) pairs of all fields in the given attrs class. This
+    is cached per class so building many trusted instances only inspects the
+    class once.
+    """
+    return tuple((a.name, a.default) for a in attr.fields(cls))
+
+
+def trusted(cls, **kwargs):
+    """
+    Build an instance of the given attrs class without running any converters
+    or validators. This is meant for producers which already generate data in
+    the final, well typed, form, for example data that has been built by a
+    previous validated instance. Any validation that is required can be done
+    later with `validate_all`.
+    """
+
+    instance = object.__new__(cls)
+    for name, default in trusted_fields(cls):
+        if name in kwargs:
+            value = kwargs.pop(name)
+        elif isinstance(default, attr.Factory):
+            if default.takes_self:
+                value = default.factory(instance)
+            else:
+                value = default.factory()
+        elif default is attr.NOTHING:
+            raise MissingTrustedValue("Missing value for %s in %s" % (name, cls))
+        else:
+            value = default
+        object.__setattr__(instance, name, value)
+
+    if kwargs:
+        raise TypeError("Unknown fields for %s: %s" % (cls, ", ".join(kwargs)))
+    return instance
+
+
+def evolve_trusted(instance, **changes):
+    """
+    Like `attr.evolve` but does not rerun the converters or validators of the
+    class. The existing values have already been validated and the changes are
+    assumed to be correct.
+    """
+
+    cls = instance.__class__
+    values = {name: getattr(instance, name) for name, _ in trusted_fields(cls)}
+    values.update(changes)
+    return trusted(cls, **values)
+
+
+def validator_parts(validator) -> ty.List[ty.Any]:
+    """
+    Split a validator built with `attr.validators.and_` into the validators
+    it runs, in order.
+    """
+
+    parts = getattr(validator, "_validators", None)
+    if parts is None:
+        return [validator]
+    return [v for p in parts for v in validator_parts(p)]
+
+
+def passes_type_check(validator, values: ty.List[ty.Any]) -> bool:
+    """
+    Check if all values pass the given validator by only looking at the
+    distinct types of the values. This works for validators built with
+    `instance_of`, possibly wrapped in `optional`, and returns False for any
+    other validator or if any value has the wrong type, in which case the
+    validator must be run on each value.
+    """
+
+    allow_none = False
+    if hasattr(validator, "validator") and not hasattr(validator, "type"):
+        validator = validator.validator
+        allow_none = True
+
+    expected = getattr(validator, "type", None)
+    if not isinstance(expected, (type, tuple)):
+        return False
+
+    for kind in set(map(type, values)):
+        if allow_none and kind is type(None):
+            continue
+        if not issubclass(kind, expected):
+            return False
+    return True
+
+
+def validate_all(instances: ty.Iterable[ty.Any]) -> ty.List[ty.Any]:
+    """
+    Run the converters and then the validators of all given instances, which
+    must all be of the same attrs class and will usually have been built with
+    `trusted`. This does the same work as the constructor of the class, but
+    does it one field at a time across the whole batch. Type checks are done
+    once per distinct type of each field, instead of once per value, and only
+    other validators, like patterns, are run on every value. This returns the
+    instances as a list and will raise the same exception as the first
+    failing validator.
+    """
+
+    instances = list(instances)
+    if not instances:
+        return instances
+
+    cls = instances[0].__class__
+    fields = attr.fields(cls)
+    for attribute in fields:
+        converter = attribute.converter
+        if converter is None:
+            continue
+        getter = op.attrgetter(attribute.name)
+        for instance in instances:
+            value = getter(instance)
+            converted = converter(value)
+            if converted is not value:
+                object.__setattr__(instance, attribute.name, converted)
+
+    for attribute in fields:
+        if attribute.validator is None:
+            continue
+        values = list(map(op.attrgetter(attribute.name), instances))
+        for validator in validator_parts(attribute.validator):
+            if passes_type_check(validator, values):
+                continue
+            for instance, value in zip(instances, values):
+                validator(instance, attribute, value)
+    return instances
+
+
+def validated(
+    instances: ty.Iterable[ty.Any],
+    batch_size: int = VALIDATION_BATCH_SIZE,
+) -> ty.Iterator[ty.Any]:
+    """
+    Lazily validate, with `validate_all`, an iterable of trusted instances of
+    one attrs class in batches of the given size.
+    """
+
+    for batch in chunked(instances, batch_size):
+        yield from validate_all(batch)
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright [2009-2024] EMBL-European Bioinformatics Institute
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import logging
+import multiprocessing as mp
+import shutil
+import tempfile
+import typing as ty
+from collections import Counter
+from pathlib import Path
+
+import attr
+from attr.validators import instance_of as is_a
+from attr.validators import optional
+
+from rnacentral_pipeline.databases.ena import parser
+from rnacentral_pipeline.databases.ena.context import Context
+from rnacentral_pipeline.databases.ena import ribovore as ribo
+from rnacentral_pipeline.writers import EntryWriter, entry_writer
+
+LOGGER = logging.getLogger(__name__)
+
+_SHARED: ty.Optional["SharedContext"] = None
+
+
+@attr.s(frozen=True)
+class SharedContext:
+    """
+    The data needed to process any ENA file. The context is built once and
+    then sent to each worker, while the ribovore results, which are different
+    for each file, are loaded by the worker processing the file.
+    """
+
+    context: Context = attr.ib(validator=is_a(Context))
+    ribovore_directory: ty.Optional[Path] = attr.ib(
+        validator=optional(is_a(Path)), default=None
+    )
+    model_lengths: ty.Optional[Path] = attr.ib(
+        validator=optional(is_a(Path)), default=None
+    )
+
+    def ribovore_for(self, path: Path) -> ty.Optional[ribo.Results]:
+        if not self.ribovore_directory or not self.model_lengths:
+            return None
+        directory = self.ribovore_directory / path.name
+        if not directory.exists():
+            LOGGER.warn("No ribovore results for %s", path)
+            return None
+        return ribo.load(directory, self.model_lengths)
+
+
+def _init_worker(shared: SharedContext):
+    global _SHARED
+    _SHARED = shared
+
+
+def process_file(path: Path, output: Path) -> Counter:
+    """
+    Parse a single ENA file, using the context shared by this worker, and
+    write the entries into the given directory. This returns the counts of
+    the processing.
+    """
+
+    assert _SHARED, "Must initialize the shared context before processing"
+    ctx = _SHARED.context.for_file(_SHARED.ribovore_for(path))
+    entries = parser.parse_with_context(ctx, path)
+    try:
+        with entry_writer(output) as writer:
+            writer.write(entries)
+    except ValueError:
+        LOGGER.warn("No entries could be written for ENA file %s", path)
+        ctx.counts["empty_files"] += 1
+    return ctx.counts
+
+
+def _process(args: ty.Tuple[Path, Path]) -> Counter:
+    return process_file(*args)
+
+
+def merge(directories: ty.List[Path], output: Path):
+    """
+    Concatenate the CSV files written for each ENA file into one set of CSV
+    files in the output directory. Files are merged in the given order.
+    """
+
+    for field in attr.fields(EntryWriter):
+        filename = f"{field.name}.csv"
+        with (output / filename).open("w") as out:
+            for directory in directories:
+                path = directory / filename
+                if not path.exists():
+                    continue
+                with path.open("r") as raw:
+                    shutil.copyfileobj(raw, out)
+
+
+def process_files(
+    shared: SharedContext,
+    paths: ty.List[Path],
+    output: Path,
+    workers: ty.Optional[int] = None,
+) -> Counter:
+    """
+    Process all given ENA files with a pool of workers, which all use the
+    same context. The entries of all files are written as a single set of
+    CSV files in the output directory, which is created if needed. This
+    returns the total counts of the
+    processing.
+    """
+
+    counts: Counter = Counter()
+    output.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=output) as tmp:
+        directories = []
+        for index, _ in enumerate(paths):
+            directory = Path(tmp) / str(index)
+            directory.mkdir()
+            directories.append(directory)
+
+        jobs = list(zip(paths, directories))
+        if workers == 1:
+            _init_worker(shared)
+            for result in map(_process, jobs):
+                counts.update(result)
+        else:
+            with mp.Pool(workers, initializer=_init_worker, initargs=(shared,)) as pool:
+                for result in pool.imap(_process, jobs):
+                    counts.update(result)
+
+        merge(directories, output)
+    return counts
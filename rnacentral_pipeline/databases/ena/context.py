@@ -22,6 +22,7 @@ import attr
 from attr.validators import optional
 from attr.validators import instance_of as is_a
 
+from more_itertools import chunked
 from sqlitedict import SqliteDict
 
 from rnacentral_pipeline.databases.data import Entry
@@ -29,14 +30,24 @@ from rnacentral_pipeline.databases.ena import dr
 from rnacentral_pipeline.databases.ena import ribovore as ribo
 from rnacentral_pipeline.databases.ena import mapping as tpa
 
+DR_BATCH_SIZE = 10000
+
 
 @attr.s()
 class Context:
     ribovore: ty.Optional[ribo.Results] = attr.ib(validator=optional(is_a(dict)))
     tpa = attr.ib(validator=is_a(tpa.TpaMappings))
-    dr = attr.ib(validator=is_a(SqliteDict))
+    dr = attr.ib(validator=optional(is_a(SqliteDict)), default=None)
     counts = attr.ib(validator=is_a(Counter), factory=Counter)
 
+    def for_file(self, ribovore: ty.Optional[ribo.Results] = None) -> "Context":
+        """
+        Create a copy of this context for processing a single file. The copy
+        shares the (read-only) TPA mappings but has its own counts and the
+        given ribovore results, which are specific to each file.
+        """
+        return attr.evolve(self, ribovore=ribovore, counts=Counter())
+
     def expand_tpa(self, entries: ty.Iterable[Entry]) -> ty.Iterable[Entry]:
         yield from tpa.apply(self.tpa, entries)
 
@@ -80,6 +91,11 @@ class ContextBuilder:
         return self
 
     def with_dr(self, dr_path: Path, cache_filename=None):
+        """
+        Build a persistent index of the DR lines of the given file. This is not
+        needed for parsing, which collects DR lines while reading the file, but
+        is useful when the DR lines are needed elsewhere.
+        """
         self.dr_path = dr_path
         self.cache_filename = cache_filename
         return self
@@ -91,11 +107,12 @@ class ContextBuilder:
                 tpa_mapping = tpa.load(raw)
             tpa_mapping.validate()
 
-        dr_map = SqliteDict(filename=self.cache_filename)
+        dr_map = None
         if self.dr_path:
+            dr_map = SqliteDict(filename=self.cache_filename)
             with self.dr_path.open("r") as raw:
-                for (record_id, dbrefs) in dr.mappings(raw):
-                    dr_map[record_id] = dbrefs
+                for batch in chunked(dr.mappings(raw), DR_BATCH_SIZE):
+                    dr_map.update(batch)
                 dr_map.commit()
 
         ribovore: ty.Optional[ribo.Results] = None
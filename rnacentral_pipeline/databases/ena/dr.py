@@ -60,3 +60,34 @@ def mappings(lines: ty.Iterable[str]) -> ty.Iterable[ty.Tuple[str, ty.List[DBRef
 
     if current_id:
         yield (current_id, refs)
+
+
+def records(
+    lines: ty.Iterable[str],
+) -> ty.Iterable[ty.Tuple[str, ty.List[DBRef], str]]:
+    """
+    Split an EMBL file into records, while collecting the DR lines of each
+    one. This produces tuples of (record_id, dbrefs, raw_record) where the raw
+    record is the complete text of the record, which can be parsed by
+    Biopython. This allows parsing the file and extracting the DR lines in a
+    single pass.
+    """
+
+    buffer: ty.List[str] = []
+    refs: ty.List[DBRef] = []
+    current_id = None
+    for line in lines:
+        buffer.append(line)
+        if line.startswith("ID"):
+            current_id = line[5:].split(";")[0]
+        elif line.startswith("DR"):
+            refs.append(parse_line(line))
+        elif line.startswith("//"):
+            if current_id:
+                yield (current_id, refs, "".join(buffer))
+            buffer = []
+            refs = []
+            current_id = None
+
+    if current_id:
+        yield (current_id, refs, "".join(buffer))
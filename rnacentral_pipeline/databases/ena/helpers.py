@@ -343,7 +343,7 @@ def is_skippable_sequence(
     return model_coverage <= 0.90
 
 
-def as_entry(ctx, record, feature) -> Entry:
+def as_entry(ctx, record, feature, record_refs=None) -> Entry:
     prod = product(feature)
     gene = embl.gene(feature)
     if prod:
@@ -351,7 +351,8 @@ def as_entry(ctx, record, feature) -> Entry:
     if gene:
         gene = gene[0:200]
 
-    record_refs = ctx.dr[record.id]
+    if record_refs is None:
+        record_refs = ctx.dr[record.id]
     return Entry(
         primary_id=primary_id(feature),
         accession=accession(record),
@@ -13,6 +13,7 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import io
 import typing as ty
 import logging
 from pathlib import Path
@@ -40,44 +41,61 @@ def parse(ctx: context.Context, path: Path) -> ty.Iterable[Entry]:
     """
     Parse a file like object into an iterable of Entry objects. This will parse
     each feature in all records of the given EMBL formatted file to produce the
-    Entry objects.
+    Entry objects. The DR lines of each record are collected while reading the
+    file, so the file is only read once.
     """
 
-    for record in SeqIO.parse(str(path), "embl"):
-        if len(record.features) == 0:
-            LOGGER.warn("Skipping record %s with no features" % record.id)
-            continue
-
-        ctx.add_total()
-        if len(record.features) != 2:
-            raise InvalidEnaFile(
-                "ENA EMBL files must have 2 features/record %s" % record
-            )
-
-        feature = record.features[1]
-        if helpers.is_protein(feature):
-            LOGGER.info("Skipping mis-annotated protein: %s", record.id)
-            ctx.add_skipped_protein()
-            continue
-
-        if helpers.is_pseudogene(feature):
-            LOGGER.info("Skipping pseudogene")
-            ctx.add_skipped_pseudogene()
-            continue
-
-        if record.id not in ctx.dr:
-            raise InvalidEnaFile("Somehow parsed DR refs are for wrong record")
-
-        entry = helpers.as_entry(ctx, record, feature)
-        if ctx.ribovore is not None:
-            ribo_result = ctx.ribovore.get(record.id, None)
-            if helpers.is_skippable_sequence(entry, ribo_result):
-                LOGGER.info(f"Skipping record ({record.id}) excluded by ribotyper")
-                ctx.add_riboytper_skip()
-                continue
-
-        ctx.add_parsed()
-        yield entry
+    with path.open("r") as raw:
+        for record_id, record_refs, text in dr.records(raw):
+            record = SeqIO.read(io.StringIO(text), "embl")
+            entry = as_entry(ctx, record, record_id, record_refs)
+            if entry:
+                yield entry
+
+
+def as_entry(
+    ctx: context.Context,
+    record,
+    record_id: str,
+    record_refs: ty.List[dr.DBRef],
+) -> ty.Optional[Entry]:
+    """
+    Turn a single parsed EMBL record, and the DR lines for it, into an Entry.
+    This will return None if the record should be skipped.
+    """
+
+    if len(record.features) == 0:
+        LOGGER.warn("Skipping record %s with no features" % record.id)
+        return None
+
+    ctx.add_total()
+    if len(record.features) != 2:
+        raise InvalidEnaFile("ENA EMBL files must have 2 features/record %s" % record)
+
+    feature = record.features[1]
+    if helpers.is_protein(feature):
+        LOGGER.info("Skipping mis-annotated protein: %s", record.id)
+        ctx.add_skipped_protein()
+        return None
+
+    if helpers.is_pseudogene(feature):
+        LOGGER.info("Skipping pseudogene")
+        ctx.add_skipped_pseudogene()
+        return None
+
+    if record.id != record_id:
+        raise InvalidEnaFile("Somehow parsed DR refs are for wrong record")
+
+    entry = helpers.as_entry(ctx, record, feature, record_refs=record_refs)
+    if ctx.ribovore is not None:
+        ribo_result = ctx.ribovore.get(record.id, None)
+        if helpers.is_skippable_sequence(entry, ribo_result):
+            LOGGER.info(f"Skipping record ({record.id}) excluded by ribotyper")
+            ctx.add_riboytper_skip()
+            return None
+
+    ctx.add_parsed()
+    return entry
 
 
 def parse_with_context(ctx: context.Context, path: Path) -> ty.Iterable[Entry]:
@@ -227,35 +227,46 @@ def load_known(db_url, query_handle):
     return data
 
 
-def fetch(connections, query_handle, example_locations, known):
+def assembly_info(rows, example_locations, known, seen):
+    """
+    Build the assembly of a single core database from the rows of its meta
+    table. This returns None if the assembly should not be used. The taxids in
+    seen are those already used by another database, and are updated.
+    """
+
+    raw = {r["meta_key"]: str(r["meta_value"]) for r in rows}
+    if raw["species.division"] == "EnsemblBacteria":
+        return None
+    info = AssemblyInfo.build(raw, example_locations)
+    if info.assembly_id in known:
+        return known[info.assembly_id]
+    if is_ignored_assembly(info):
+        return None
+    if info.taxid in seen:
+        LOGGER.warn("Duplicate genome %s found for %i", info.assembly_id, info.taxid)
+        return None
+    seen.add(info.taxid)
+    return info
+
+
+def fetch(connections, query_handle, example_locations, known, **kwargs):
     seen = set()
-    results = db.run_queries_across_databases(connections, query_handle)
+    results = db.run_queries_across_databases(connections, query_handle, **kwargs)
     for (_, rows) in results:
-        raw = {r["meta_key"]: str(r["meta_value"]) for r in rows}
-        if raw["species.division"] == "EnsemblBacteria":
-            continue
-        info = AssemblyInfo.build(raw, example_locations)
-        if info.assembly_id in known:
-            yield known[info.assembly_id]
-        else:
-            if is_ignored_assembly(info):
-                continue
-            if info.taxid in seen:
-                LOGGER.warn(
-                    "Duplicate genome %s found for %i", info.assembly_id, info.taxid
-                )
-                continue
+        info = assembly_info(rows, example_locations, known, seen)
+        if info is not None:
             yield info
-            seen.add(info.taxid)
 
 
-def write(connections, query, example_file, known_handle, output, db_url=None):
+def write(
+    connections, query, example_file, known_handle, output, db_url=None, **kwargs
+):
     """
     Parse the given input handle and write the readable data to the CSV.
     """
 
     examples = json.load(example_file)
     known = load_known(db_url, known_handle)
-    data = fetch(connections, query, examples, known)
+    data = fetch(connections, query, examples, known, **kwargs)
     data = map(op.methodcaller("writeable"), data)
     csv.writer(output).writerows(data)
@@ -75,13 +75,13 @@ def top_level_only(data):
             yield [name, sys, assembly, is_ref, updated]
 
 
-def fetch(connections, query_handle):
-    results = db.run_queries_across_databases(connections, query_handle)
+def fetch(connections, query_handle, **kwargs):
+    results = db.run_queries_across_databases(connections, query_handle, **kwargs)
     for (_, rows) in results:
         for entry in top_level_only(rows):
             yield entry
 
 
-def write(connections, query, output):
-    data = fetch(connections, query)
+def write(connections, query, output, **kwargs):
+    data = fetch(connections, query, **kwargs)
     csv.writer(output).writerows(data)
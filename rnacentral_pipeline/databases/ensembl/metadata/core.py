@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright [2009-2024] EMBL-European Bioinformatics Institute
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import csv
+import json
+import logging
+import typing as ty
+from contextlib import ExitStack
+from pathlib import Path
+
+from . import assemblies
+from . import coordinate_systems
+from . import databases as db
+from . import proteins
+
+LOGGER = logging.getLogger(__name__)
+
+FILENAMES = ["assemblies.csv", "coordinate_systems.csv", "proteins.csv"]
+
+
+def write(
+    connections,
+    assembly_query,
+    coordinate_query,
+    protein_query,
+    example_file,
+    known_handle,
+    output: Path,
+    db_url=None,
+    workers: int = 1,
+    cache_path: ty.Optional[str] = None,
+):
+    """
+    Write the assemblies, coordinate systems and proteins of all Ensembl core
+    databases into assemblies.csv, coordinate_systems.csv and proteins.csv in
+    the output directory. All three queries are run in a single batch per
+    database, so each core database is only visited once.
+    """
+
+    examples = json.load(example_file)
+    known = assemblies.load_known(db_url, known_handle)
+    queries = [assembly_query.read(), coordinate_query.read(), protein_query.read()]
+    results = db.harvest_across_databases(
+        connections,
+        queries,
+        workers=workers,
+        cache_path=cache_path,
+    )
+
+    output.mkdir(parents=True, exist_ok=True)
+    seen: ty.Set[int] = set()
+    with ExitStack() as stack:
+        handles = [stack.enter_context((output / n).open("w")) for n in FILENAMES]
+        assembly_out, coordinate_out, protein_out = map(csv.writer, handles)
+        for database, (assembly_rows, coordinate_rows, protein_rows) in results:
+            LOGGER.info("Writing metadata of %s", database)
+            info = assemblies.assembly_info(assembly_rows, examples, known, seen)
+            if info is not None:
+                assembly_out.writerow(info.writeable())
+            coordinate_out.writerows(coordinate_systems.top_level_only(coordinate_rows))
+            protein_out.writerows(proteins.parse(protein_rows))
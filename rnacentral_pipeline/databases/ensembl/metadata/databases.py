@@ -15,9 +15,18 @@ limitations under the License.
 
 import re
 import json
+import hashlib
+import logging
+import threading
+import typing as ty
 import itertools as it
+from concurrent.futures import ThreadPoolExecutor
 
+import attr
 import pymysql
+from sqlitedict import SqliteDict
+
+LOGGER = logging.getLogger(__name__)
 
 
 DISALLOWED_DATABASE_TERMS = {
@@ -73,23 +82,138 @@ def databases(connection):
     return databases
 
 
-def run_queries(connection, query):
-    for database in databases(connection):
-        connection.select_db(database)
-        cursor = connection.cursor(cursor=pymysql.cursors.DictCursor)
-        cursor.execute(query)
-        yield (database, cursor.fetchall())
-        cursor.close()
-
-
-def run_queries_across_databases(connection_handle, query_handle):
+@attr.s()
+class ConnectionPool:
+    """
+    A pool of connections to a single MySQL server. Each thread using the
+    pool gets its own connection, which is reused for all databases it
+    queries, so running the pool with a fixed number of threads bounds the
+    number of open connections.
+    """
+
+    spec: ty.Dict[str, ty.Any] = attr.ib()
+    _local = attr.ib(factory=threading.local, repr=False)
+    _lock = attr.ib(factory=threading.Lock, repr=False)
+    _connections: ty.List = attr.ib(factory=list, repr=False)
+
+    def connection(self):
+        conn = getattr(self._local, "connection", None)
+        if conn is None:
+            conn = pymysql.Connection(**self.spec)
+            self._local.connection = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def query_database(self, database: str, queries: ty.List[str]) -> ty.List:
+        """
+        Run all queries against a single database, using one connection, and
+        return the rows of each query.
+        """
+
+        conn = self.connection()
+        conn.select_db(database)
+        results = []
+        for query in queries:
+            with conn.cursor(cursor=pymysql.cursors.DictCursor) as cursor:
+                cursor.execute(query)
+                results.append(cursor.fetchall())
+        return results
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+
+
+def cache_key(database: str, query: str) -> str:
+    """
+    The key for the results of a query against a database. Ensembl database
+    names contain the release, so the cache is per release.
+    """
+    digest = hashlib.sha1(query.encode("utf-8")).hexdigest()
+    return f"{database}:{digest}"
+
+
+def harvest(
+    spec: ty.Dict[str, ty.Any],
+    queries: ty.List[str],
+    workers: int = 1,
+    cache: ty.Optional[ty.MutableMapping[str, ty.Any]] = None,
+) -> ty.Iterable[ty.Tuple[str, ty.List]]:
+    """
+    Run all queries against the newest core database of each species on the
+    server described by spec. Databases are queried concurrently by the given
+    number of workers, each with a single connection. This produces a
+    (database, results) pair for each database, in the same order as
+    `databases`, where results has the rows for each query. If a cache is
+    given, the results for databases which are already in it are reused.
+    """
+
+    if cache is None:
+        cache = {}
+
+    pool = ConnectionPool(spec)
+    try:
+        names = list(databases(pool.connection()))
+
+        def query(database):
+            keys = [cache_key(database, q) for q in queries]
+            if all(k in cache for k in keys):
+                return None
+            return pool.query_database(database, queries)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for database, results in zip(names, executor.map(query, names)):
+                keys = [cache_key(database, q) for q in queries]
+                if results is None:
+                    results = [cache[k] for k in keys]
+                else:
+                    cache.update(zip(keys, results))
+                    if isinstance(cache, SqliteDict):
+                        cache.commit()
+                yield (database, results)
+    finally:
+        pool.close()
+
+
+def load_specs(connection_handle) -> ty.Iterable[ty.Dict[str, ty.Any]]:
     specs = json.load(connection_handle)
-    query = query_handle.read()
     for name, spec in specs.items():
         if not name.lower().startswith("ensembl"):
             continue
         if "command" in spec:
             del spec["command"]
-        connection = pymysql.Connection(**spec)
-        for results in run_queries(connection, query):
-            yield results
+        yield spec
+
+
+def harvest_across_databases(
+    connection_handle,
+    queries: ty.List[str],
+    workers: int = 1,
+    cache_path: ty.Optional[str] = None,
+) -> ty.Iterable[ty.Tuple[str, ty.List]]:
+    """
+    Run all queries against the core databases of every Ensembl server in the
+    connections file, see `harvest`. If cache_path is given the results are
+    stored there, so rerunning for the same release does not query the
+    servers again.
+    """
+
+    cache = None
+    if cache_path:
+        cache = SqliteDict(filename=cache_path, tablename="ensembl_metadata")
+    try:
+        for spec in load_specs(connection_handle):
+            yield from harvest(spec, queries, workers, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def run_queries_across_databases(connection_handle, query_handle, **kwargs):
+    queries = [query_handle.read()]
+    results = harvest_across_databases(connection_handle, queries, **kwargs)
+    for database, (rows,) in results:
+        yield (database, rows)
@@ -13,51 +13,83 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-import asyncio
 import csv
-import itertools as it
 import json
-from functools import lru_cache
+import logging
+import typing as ty
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
+import attr
 import requests
+from attr.validators import instance_of as is_a
 from retry import retry
-from throttler import throttle
+from sqlitedict import SqliteDict
 
-from rnacentral_pipeline.utils import cacheable
+from rnacentral_pipeline.databases.helpers.rate_limit import RateLimiter
+
+LOGGER = logging.getLogger(__name__)
 
 DOMAINS = {
     "ensembl",
 }
 
+Karyotype = ty.Tuple[str, ty.Dict[str, ty.Any]]
+
+
+@attr.s()
+class RestSource:
+    """
+    Fetch karyotype data from the Ensembl REST API of a domain.
+    """
+
+    domain: str = attr.ib(validator=is_a(str))
+    limiter: RateLimiter = attr.ib(factory=RateLimiter)
+    session: requests.Session = attr.ib(factory=requests.Session, repr=False)
+
+    @retry((requests.HTTPError, requests.ConnectionError), tries=5, delay=1, backoff=2)
+    def get(self, path: str) -> ty.Any:
+        self.limiter.wait()
+        response = self.session.get(
+            f"http://rest.{self.domain}.org/{path}",
+            headers={"Content-Type": "application/json"},
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def release(self) -> int:
+        return max(self.get("info/data")["releases"])
+
+    def species(self) -> ty.List[str]:
+        return [entry["name"] for entry in self.get("info/species")["species"]]
+
+    def assembly(self, species: str) -> ty.Dict[str, ty.Any]:
+        return self.get(f"info/assembly/{species}?bands=1")
 
-@lru_cache()
-@retry(requests.HTTPError, tries=5, delay=1)
-@throttle(rate_limit=15, period=1.0)
-@cacheable
-async def find_species(domain):
-    response = requests.get(
-        "http://rest.%s.org/info/species" % domain,
-        headers={"Content-Type": "application/json"},
-    )
-    response.raise_for_status()
-    species = []
-    raw = response.json()
-    for entry in raw["species"]:
-        species.append(entry["name"])
-    return species
-
-
-@lru_cache()
-@retry(requests.HTTPError, tries=5, delay=1)
-@throttle(rate_limit=15, period=1.0)
-@cacheable
-async def fetch(species, domain):
-    response = requests.get(
-        "http://rest.%s.org/info/assembly/%s?bands=1" % (domain, species),
-        headers={"Content-Type": "application/json"},
-    )
-    response.raise_for_status()
-    return response.json()
+
+@attr.s()
+class DirectorySource:
+    """
+    Read karyotype data from a directory of saved REST API responses. The
+    directory must contain data.json, species.json and an assembly/ directory
+    with one <species>.json file per species. This is meant for testing and
+    for rebuilding the karyotypes without network access.
+    """
+
+    path: Path = attr.ib(validator=is_a(Path), converter=Path)
+
+    def load(self, *parts: str) -> ty.Any:
+        with self.path.joinpath(*parts).open("r") as raw:
+            return json.load(raw)
+
+    def release(self) -> int:
+        return max(self.load("data.json")["releases"])
+
+    def species(self) -> ty.List[str]:
+        return [entry["name"] for entry in self.load("species.json")["species"]]
+
+    def assembly(self, species: str) -> ty.Dict[str, ty.Any]:
+        return self.load("assembly", f"{species}.json")
 
 
 def default_bands(entry):
@@ -91,19 +123,67 @@ def process(raw):
     return raw["default_coord_system_version"], result
 
 
-def for_domain(domain, allowed=None):
-    for species in asyncio.run(find_species(domain)):
-        if not species or (allowed and species in allowed):
-            raw_data = asyncio.run(fetch(species, domain))
-            yield process(raw_data)
+def cache_key(release: int, species: str) -> str:
+    return f"{release}:{species}"
+
+
+def fetch_all(
+    source,
+    allowed: ty.Optional[ty.Set[str]] = None,
+    cache: ty.Optional[ty.MutableMapping[str, Karyotype]] = None,
+    workers: int = 8,
+) -> ty.Iterable[Karyotype]:
+    """
+    Fetch and process the karyotypes of all species in the source, or only
+    the allowed ones if given. Species which are not in the cache for the
+    current release are fetched concurrently by a pool of workers, and each
+    one is stored in the cache as soon as it is fetched, so a failed run can
+    be resumed. Results are produced in the order of the species
+    list of the source.
+    """
+
+    if cache is None:
+        cache = {}
+
+    release = source.release()
+    species = [s for s in source.species() if s and (not allowed or s in allowed)]
+    missing = [s for s in species if cache_key(release, s) not in cache]
+    LOGGER.info(
+        "Fetching karyotypes of %i of %i species for release %i",
+        len(missing),
+        len(species),
+        release,
+    )
+
+    if missing:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            raw = executor.map(source.assembly, missing)
+            for name, result in zip(missing, raw):
+                cache[cache_key(release, name)] = process(result)
+                if isinstance(cache, SqliteDict):
+                    cache.commit()
+
+    for name in species:
+        yield cache[cache_key(release, name)]
+
+
+def data(species=None, sources=None, cache_path=None, workers=8):
+    if sources is None:
+        sources = [RestSource(domain) for domain in sorted(DOMAINS)]
 
+    cache = None
+    if cache_path:
+        cache = SqliteDict(filename=cache_path, tablename="karyotypes")
 
-def data(species=None):
-    results = map(lambda d: for_domain(d, allowed=species), DOMAINS)
-    return it.chain.from_iterable(results)
+    try:
+        for source in sources:
+            yield from fetch_all(source, allowed=species, cache=cache, workers=workers)
+    finally:
+        if cache is not None:
+            cache.close()
 
 
-def write(output, species=None):
+def write(output, species=None, **kwargs):
     writer = csv.writer(output)
-    for (assembly_id, bands) in data(species=species):
+    for assembly_id, bands in data(species=species, **kwargs):
         writer.writerow([assembly_id, json.dumps(bands)])
@@ -60,13 +60,13 @@ def parse(data):
         ]
 
 
-def fetch(connections, query_handle):
-    results = db.run_queries_across_databases(connections, query_handle)
+def fetch(connections, query_handle, **kwargs):
+    results = db.run_queries_across_databases(connections, query_handle, **kwargs)
     for (_, rows) in results:
         for protein in parse(rows):
             yield protein
 
 
-def write(connections, query, output):
-    data = fetch(connections, query)
+def write(connections, query, output, **kwargs):
+    data = fetch(connections, query, **kwargs)
     csv.writer(output).writerows(data)
@@ -13,18 +13,16 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-import io
+import itertools as it
 import operator as op
 import re
+import typing as ty
 from functools import partial
 from operator import is_not
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
-import requests
-from Bio import SeqIO
-from bs4 import BeautifulSoup
 from furl import furl
 from tqdm import tqdm
 
@@ -34,6 +32,7 @@ from rnacentral_pipeline.databases.helpers import phylogeny as phy
 from rnacentral_pipeline.rnacentral import lookup
 
 from . import helpers
+from . import sequences
 
 tqdm.pandas()
 
@@ -54,10 +53,6 @@ base_url = furl(
     "https://www.sdklab-biophysics-dzu.net/EVLncRNAs2/index.php/Home/Browsc/rna.html"
 )
 
-ensembl_rest_url = furl("https://rest.ensembl.org/sequence/id")
-
-entrez_base_url = furl("https://eutils.ncbi.nlm.nih.gov/entrez/eutils")
-
 chain_normalisation = {
     "minus": "-",
     "plus": "+",
@@ -103,53 +98,29 @@ def split(input_frame: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame, pd.Dat
     return (no_accessions, e_accessions, ncbi_accessions)
 
 
+def ncbi_accessions(raw: str) -> list[str]:
+    return [x.strip() for x in raw.split(",") if x.strip()]
+
+
 def get_ncbi_accessions(
     accession_frame_in: pd.DataFrame,
+    resolver: sequences.Resolver,
 ) -> tuple[pd.DataFrame, pd.DataFrame]:
     """
-    For each entry having at least one NCBI accession, build the commandline for the NCBI
-    datasets tool and download the data. Then extract the RNA sequence and build a new
-    dataframe with the necessary information.
+    For each entry having at least one NCBI accession, look up the sequences
+    of all accessions using the resolver, which fetches all accessions of the
+    frame in batches. Each entry has a row per distinct sequence record.
     """
 
-    def download_and_get_sequence(accessions):
-        accession_list = [x.strip() for x in accessions.split(",")]
-        sequences = []
-        search_url = entrez_base_url / "esearch.fcgi"
-        search_url.args["db"] = "nuccore"
-        search_url.args["term"] = " OR ".join(accession_list)
-        search_url.args["usehistory"] = "y"
-
-        search_result = requests.get(search_url.url)
-        if search_result.ok:
-            search_res_data = BeautifulSoup(search_result.text, features="xml")
-            num_hits = search_res_data.find("Count")
-            if num_hits and int(num_hits.text) > 0:
-                query_key = search_res_data.find("QueryKey").text
-                webenv = search_res_data.find("WebEnv")
-
-                fetch_url = entrez_base_url / "efetch.fcgi"
-                fetch_url.args["db"] = "nuccore"
-                fetch_url.args["term"] = " OR ".join(accession_list)
-                fetch_url.args["query_key"] = query_key
-                fetch_url.args["WebEnv"] = webenv
-                fetch_url.args["rettype"] = "gb"
-                fetch_url.args["retmode"] = "text"
-
-                fetch_res = requests.get(fetch_url.url)
-                if fetch_res.ok:
-                    sequence_data = SeqIO.parse(
-                        io.StringIO(fetch_res.text),
-                        "gb",
-                    )
-                    for record in sequence_data:
-                        sequences.append(str(record.seq).replace("U", "T"))
-        return sequences
-
     accession_frame = accession_frame_in.copy()
-    accession_frame["sequence"] = accession_frame["NCBI accession"].apply(
-        download_and_get_sequence
-    )
+    accessions = accession_frame["NCBI accession"].apply(ncbi_accessions)
+    found = resolver.resolve(it.chain.from_iterable(accessions))
+
+    def record_sequences(names):
+        records = dict(found[n] for n in names if n in found)
+        return list(records.values())
+
+    accession_frame["sequence"] = accessions.apply(record_sequences)
     accession_frame = accession_frame.explode("sequence")
     missing_frame = accession_frame[accession_frame["sequence"].isna()]
 
@@ -158,41 +129,29 @@ def get_ncbi_accessions(
 
 def get_ensembl_accessions(
     ensembl_frame_in: pd.DataFrame,
+    resolver: sequences.Resolver,
 ) -> tuple[pd.DataFrame, pd.DataFrame]:
-    def pull_ensembl_data(e_id: str):
-        id_url = ensembl_rest_url / e_id
-
-        data = requests.get(id_url.url, headers={"Content-Type": "text/x-fasta"})
-        if not data.ok:
-            return (None, None, None, None, None, None)
-        sequence_data = SeqIO.read(
-            io.StringIO(data.text),
-            "fasta",
-        )
-        details = sequence_data.description.split(":")
-        assembly = details[1]
-        chromosome = details[2]
-        region_start = details[3]
-        region_stop = details[4]
-        strand = details[5]
-
-        sequence = str(sequence_data.seq).replace("U", "T")
-        return (sequence, assembly, chromosome, region_start, region_stop, strand)
+    """
+    Look up the sequence and location of the Ensembl id of each entry using
+    the resolver, which fetches all ids of the frame in batches.
+    """
+
+    columns = [
+        "sequence",
+        "assembly_id",
+        "chromosome",
+        "region_start",
+        "region_stop",
+        "chain",
+    ]
+    empty = (None,) * len(columns)
 
     ensembl_frame = ensembl_frame_in.copy()
-    ensembl_frame[
-        [
-            "sequence",
-            "assembly_id",
-            "chromosome",
-            "region_start",
-            "region_stop",
-            "chain",
-        ]
-    ] = ensembl_frame.apply(
-        lambda row: pull_ensembl_data(row["Ensembl"]),
-        axis="columns",
-        result_type="expand",
+    found = resolver.resolve(ensembl_frame["Ensembl"])
+    ensembl_frame[columns] = pd.DataFrame(
+        [found.get(e, empty) for e in ensembl_frame["Ensembl"]],
+        columns=columns,
+        index=ensembl_frame.index,
     )
     missing_frame = ensembl_frame[ensembl_frame["sequence"].isna()]
     return (ensembl_frame.dropna(subset="sequence"), missing_frame)
@@ -233,11 +192,24 @@ def get_db_matches(match_frame_in: pd.DataFrame, db_dump: Path) -> pd.DataFrame:
     return matches
 
 
-def parse(db_dir: Path, db_dumps: tuple[Path], db_url: str) -> None:
+def parse(
+    db_dir: Path,
+    db_dumps: tuple[Path],
+    db_url: str,
+    ncbi: ty.Optional[sequences.Resolver] = None,
+    ensembl: ty.Optional[sequences.Resolver] = None,
+) -> None:
     """
     Parses the 3 excel sheets using pandas and joins them into one massive table
-    which is then parsed to produce entries
+    which is then parsed to produce entries. The sequences of NCBI and Ensembl
+    accessions are looked up with the given resolvers, which by default fetch
+    everything from NCBI and Ensembl.
     """
+    ncbi = ncbi or sequences.Resolver(sequences.NcbiSource(), prefix="ncbi:")
+    ensembl = ensembl or sequences.Resolver(
+        sequences.EnsemblSource(),
+        prefix="ensembl:",
+    )
     lncRNA = db_dir.joinpath("lncRNA.xlsx")
     interaction = db_dir.joinpath("interaction2.xlsx")
     disease = db_dir.joinpath("disease2.xlsx")
@@ -258,10 +230,12 @@ def parse(db_dir: Path, db_dumps: tuple[Path], db_url: str) -> None:
     no_accession_frame, ensembl_frame, ncbi_frame = split(lncRNA_df)
 
     ## These two look up directly from the source, so should be quick ish
-    ensembl_frame, missing_ensembl_frame = get_ensembl_accessions(ensembl_frame)
+    ensembl_frame, missing_ensembl_frame = get_ensembl_accessions(
+        ensembl_frame, ensembl
+    )
     print(f"Got all available ensembl accessions ({len(ensembl_frame)})")
 
-    ncbi_frame, missing_ncbi_frame = get_ncbi_accessions(ncbi_frame)
+    ncbi_frame, missing_ncbi_frame = get_ncbi_accessions(ncbi_frame, ncbi)
     print(f"Got all available NCBI accessions ({len(ncbi_frame)})")
 
     ## Stack the frames with missing accessions together to search RNAcentral
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright [2009-2024] EMBL-European Bioinformatics Institute
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import logging
+import typing as ty
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.error import HTTPError
+
+import attr
+import more_itertools as more
+import requests
+from attr.validators import instance_of as is_a
+from Bio import Entrez, SeqIO
+from sqlitedict import SqliteDict
+
+from rnacentral_pipeline.databases.helpers.rate_limit import RateLimiter
+
+LOGGER = logging.getLogger(__name__)
+
+NCBI_BATCH_SIZE = 200
+
+ENSEMBL_BATCH_SIZE = 50
+
+ENSEMBL_URL = "https://rest.ensembl.org/sequence/id"
+
+Entrez.email = "rnacentral@gmail.com"
+
+NcbiSequence = ty.Tuple[str, str]
+
+EnsemblSequence = ty.Tuple[str, str, str, str, str, str]
+
+
+def split_batch(fetch, ids: ty.List[str]) -> ty.Dict[str, ty.Any]:
+    """
+    Fetch the ids by fetching each half of them. This is used when a request
+    for a batch fails, which happens if any id in the batch is invalid, so that
+    only the invalid ids are lost.
+    """
+
+    if len(ids) == 1:
+        LOGGER.warning("Could not fetch %s", ids[0])
+        return {}
+    middle = len(ids) // 2
+    found = fetch(ids[:middle])
+    found.update(fetch(ids[middle:]))
+    return found
+
+
+@attr.s()
+class NcbiSource:
+    """
+    Fetch the sequences of NCBI nucleotide accessions using Entrez. Each
+    accession is mapped to the (id, sequence) of the record it refers to.
+    """
+
+    limiter: RateLimiter = attr.ib(factory=lambda: RateLimiter(rate_limit=3))
+    batch_size: int = attr.ib(default=NCBI_BATCH_SIZE, validator=is_a(int))
+
+    def fetch(self, accessions: ty.List[str]) -> ty.Dict[str, NcbiSequence]:
+        self.limiter.wait()
+        try:
+            handle = Entrez.efetch(
+                db="nuccore",
+                id=",".join(accessions),
+                rettype="gb",
+                retmode="text",
+            )
+        except HTTPError:
+            return split_batch(self.fetch, accessions)
+
+        records = {}
+        with handle:
+            for record in SeqIO.parse(handle, "genbank"):
+                value = (record.id, str(record.seq).replace("U", "T"))
+                records[record.id] = value
+                records[record.name] = value
+        return {a: records[a] for a in accessions if a in records}
+
+
+@attr.s()
+class EnsemblSource:
+    """
+    Fetch the sequences, and genomic location, of Ensembl ids using the batch
+    endpoint of the Ensembl REST API. Each id is mapped to a tuple of the
+    sequence, assembly, chromosome, start, stop and strand.
+    """
+
+    limiter: RateLimiter = attr.ib(factory=lambda: RateLimiter(rate_limit=15))
+    batch_size: int = attr.ib(default=ENSEMBL_BATCH_SIZE, validator=is_a(int))
+    url: str = attr.ib(default=ENSEMBL_URL, validator=is_a(str))
+
+    def fetch(self, ids: ty.List[str]) -> ty.Dict[str, EnsemblSequence]:
+        self.limiter.wait()
+        response = requests.post(
+            self.url,
+            headers={"Content-Type": "application/json", "Accept": "application/json"},
+            json={"ids": ids},
+        )
+        if not response.ok:
+            return split_batch(self.fetch, ids)
+
+        found = {}
+        for result in response.json():
+            details = (result.get("desc") or "").split(":")
+            if len(details) < 6:
+                LOGGER.warning("No location for %s", result["id"])
+                continue
+            sequence = result["seq"].replace("U", "T")
+            found[result.get("query", result["id"])] = (sequence, *details[1:6])
+        return found
+
+
+@attr.s()
+class MappingSource:
+    """
+    A source which only knows the sequences in the given mapping. This is
+    useful as a local stand in for one of the remote sources, for example in
+    tests or to only use the sequences which are already cached.
+    """
+
+    data: ty.Dict[str, ty.Any] = attr.ib(factory=dict, validator=is_a(dict))
+    batch_size: int = attr.ib(default=1000, validator=is_a(int))
+
+    def fetch(self, ids: ty.List[str]) -> ty.Dict[str, ty.Any]:
+        return {i: self.data[i] for i in ids if i in self.data}
+
+
+@attr.s()
+class Resolver:
+    """
+    Resolve ids into sequences using a source, where ids that are not cached
+    are fetched in batches by a pool of workers. All fetched sequences are
+    stored in the cache, under the given prefix, so a cache stored with a
+    SqliteDict can be reused between releases. Ids which could not be found
+    are not cached, and will be requested again the next time.
+    """
+
+    source = attr.ib()
+    cache: ty.MutableMapping[str, ty.Any] = attr.ib(factory=dict)
+    prefix: str = attr.ib(default="", validator=is_a(str))
+    workers: int = attr.ib(default=4, validator=is_a(int))
+
+    def resolve(self, ids: ty.Iterable[str]) -> ty.Dict[str, ty.Any]:
+        found = {}
+        missing = []
+        for name in sorted(set(ids)):
+            cached = self.cache.get(self.prefix + name)
+            if cached is not None:
+                found[name] = cached
+            else:
+                missing.append(name)
+
+        LOGGER.info("Found %i cached ids, fetching %i", len(found), len(missing))
+        batches = more.chunked(missing, self.source.batch_size)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for fetched in executor.map(self.source.fetch, batches):
+                for name, value in fetched.items():
+                    self.cache[self.prefix + name] = value
+                found.update(fetched)
+                if isinstance(self.cache, SqliteDict):
+                    self.cache.commit()
+        return found
+
+
+@contextmanager
+def resolvers(
+    cache_path: ty.Optional[str] = None,
+    workers: int = 4,
+    offline: bool = False,
+) -> ty.Iterator[ty.Tuple[Resolver, Resolver]]:
+    """
+    Create the NCBI and Ensembl resolvers, which share a cache stored at
+    cache_path, if given. If offline is set only the cached sequences are
+    used, which makes an import reproducible.
+    """
+
+    cache: ty.MutableMapping[str, ty.Any] = {}
+    if cache_path:
+        cache = SqliteDict(filename=cache_path, tablename="evlncrnas")
+
+    ncbi_source = MappingSource() if offline else NcbiSource()
+    ensembl_source = MappingSource() if offline else EnsemblSource()
+    try:
+        yield (
+            Resolver(ncbi_source, cache=cache, prefix="ncbi:", workers=workers),
+            Resolver(ensembl_source, cache=cache, prefix="ensembl:", workers=workers),
+        )
+    finally:
+        if isinstance(cache, SqliteDict):
+            cache.close()
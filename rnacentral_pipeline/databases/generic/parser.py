@@ -13,31 +13,80 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import io
 import json
 import typing as ty
 
+import ijson
+import more_itertools as more
 import semver
 
 from rnacentral_pipeline.databases.data import Entry
 from rnacentral_pipeline.databases.generic import v1
 
+Record = ty.Dict[str, ty.Any]
 
-def parse(handle: ty.IO) -> ty.Iterable[Entry]:
+Transform = ty.Callable[[Record], ty.Optional[Record]]
+
+
+def binary(handle: ty.IO) -> ty.IO:
+    """
+    Get a binary handle for the file, which is what ijson reads.
+    """
+
+    if isinstance(handle, io.TextIOWrapper):
+        return handle.buffer
+    return handle
+
+
+def records(handle: ty.IO) -> ty.Iterator[Record]:
+    """
+    Stream the ncRNA records from the data section of the JSON file.
+    """
+    yield from ijson.items(binary(handle), "data.item", use_float=True)
+
+
+def sections(handle: ty.IO) -> ty.Tuple[ty.Optional[Record], ty.Iterator[Record]]:
+    """
+    Get the metadata and an iterator over the ncRNA records of the JSON file.
+    The records are streamed from the file, which requires reading it twice as
+    the metadata may come after the data. Files which cannot be seeked are
+    loaded in full.
+    """
+
+    if not handle.seekable():
+        raw = json.load(handle) or {}
+        return (raw.get("metaData", None), iter(raw.get("data", None) or []))
+
+    start = handle.tell()
+    metadata = next(ijson.items(binary(handle), "metaData", use_float=True), None)
+    handle.seek(start)
+    return (metadata, records(handle))
+
+
+def parse(
+    handle: ty.IO, transform: ty.Optional[Transform] = None
+) -> ty.Iterable[Entry]:
     """
     This parses the file like object that should contain the RNAcentral data.
-    The file can contain data in any of the accepted versions.
+    The file can contain data in any of the accepted versions. If given, the
+    transform is called with each raw ncRNA record before it is parsed and may
+    return a modified record, or None to skip it. This allows databases to
+    filter and rewrite records while they are streamed from the file.
     """
 
-    data = json.load(handle)
-    if not data:
-        raise ValueError("No data loaded")
-    if not data["data"]:
+    metadata, records = sections(handle)
+    records = more.peekable(records)
+    if not records:
         raise ValueError("Missing data to import")
 
-    version = data.get("metaData", {}).get("schemaVersion", None)
+    version = (metadata or {}).get("schemaVersion", None)
     if not version:
         raise ValueError("Must specify a schema version in metadata")
 
+    if transform:
+        records = (r for r in map(transform, records) if r is not None)
+
     if semver.match(version, "<=2.0.0"):
-        return v1.parse(data)
+        return v1.parse_records(metadata, records)
     raise ValueError("Unknown schema version: %s" % version)
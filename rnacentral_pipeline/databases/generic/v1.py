@@ -20,6 +20,7 @@ import attr
 from attr.validators import instance_of as is_a
 from attr.validators import optional
 
+from rnacentral_pipeline import utils
 from rnacentral_pipeline.databases import data
 from rnacentral_pipeline.databases.helpers import phylogeny as phy
 from rnacentral_pipeline.databases.helpers import publications as pub
@@ -312,25 +313,26 @@ def related_sequences(record):
 def add_related_by_gene(entries):
     """
     This will modify the related sequences so that it contains between all
-    transcripts that have the same gene id.
+    transcripts that have the same gene id. The isoform relationships are
+    built once for the gene and shared between all transcripts, instead of
+    comparing every pair of transcripts.
     """
 
+    isoforms = [
+        data.RelatedSequence(sequence_id=e.accession, relationship="isoform")
+        for e in entries
+    ]
+    counts = coll.Counter(e.accession for e in entries)
+
     updated = []
-    for first in entries:
-        related = []
-        for second in entries:
-            if first.accession == second.accession:
-                continue
-
-            related.append(
-                data.RelatedSequence(
-                    sequence_id=second.accession,
-                    relationship="isoform",
-                )
-            )
+    for index, first in enumerate(entries):
+        if counts[first.accession] == 1:
+            related = isoforms[:index] + isoforms[index + 1 :]
+        else:
+            related = [r for r in isoforms if r.sequence_id != first.accession]
 
         updated.append(
-            attr.evolve(
+            data.utils.evolve_trusted(
                 first,
                 related_sequences=first.related_sequences + related,
             )
@@ -358,8 +360,12 @@ def coordinate_system(metadata):
 def as_entry(record, context):
     """
     Generate an Entry to import based off the database, exons and raw record.
+    The entry is built with `data.utils.trusted`, so no converters or
+    validators are run, callers must check the entries, in batches, with
+    `data.utils.validate_all` or `data.utils.validated`.
     """
-    return data.Entry(
+    return data.utils.trusted(
+        data.Entry,
         primary_id=external_id(record),
         accession=record["primaryId"],
         ncbi_tax_id=taxid(record),
@@ -389,43 +395,63 @@ def as_entry(record, context):
     )
 
 
-def parse(raw):
+def parse_records(metadata, ncrnas, run_size=utils.SORT_RUN_SIZE, directory=None):
     """
-    Parses the given dict into a Entry object. This assumes the data is
-    formatted according to version 1.0 (or equivalent) of the RNAcentral JSON
-    schema.
+    Parses the given metadata and iterable of ncRNA records, the data section
+    of a JSON file, into Entry objects. This assumes the data is formatted
+    according to version 1.0 (or equivalent) of the RNAcentral JSON schema.
+    The records are grouped by gene using an external sort so only a run of
+    records, and the entries of one gene, are held in memory. Entries are
+    built without validation and then validated in batches.
     """
 
     def key(raw):
         return gene(raw) or ""
 
     context = Context(
-        database=raw["metaData"]["dataProvider"],
-        coordinate_system=coordinate_system(raw["metaData"]),
+        database=metadata["dataProvider"],
+        coordinate_system=coordinate_system(metadata),
     )
 
-    ncrnas = sorted(raw["data"], key=key)
+    ncrnas = utils.external_sort(
+        ncrnas,
+        key=key,
+        run_size=run_size,
+        directory=directory,
+    )
 
-    metadata_pubs = raw["metaData"].get("publications", [])
+    metadata_pubs = metadata.get("publications", [])
     metadata_refs = [pub.reference(r) for r in metadata_pubs]
 
-    for gene_id, records in it.groupby(ncrnas, gene):
-        entries = []
-        for r in records:
-            try:
-                entries.append(as_entry(r, context))
-            except phy.UnknownTaxonId as e:
-                print("Unknown taxid for %s" % r["primaryId"])
-                print(f"UnknownTaxonId: {e}")
-                continue
-            except phy.FailedTaxonId as e:
-                print("Taxid failed for %s" % r["primaryId"])
-                print(f"FailingTaxonId: {e}")
-                continue
-
-        if gene_id:
-            entries = add_related_by_gene(entries)
-
-        for entry in entries:
-            refs = entry.references + metadata_refs
-            yield attr.evolve(entry, references=refs)
+    def entries():
+        for gene_id, records in it.groupby(ncrnas, gene):
+            found = []
+            for r in records:
+                try:
+                    found.append(as_entry(r, context))
+                except phy.UnknownTaxonId as e:
+                    print("Unknown taxid for %s" % r["primaryId"])
+                    print(f"UnknownTaxonId: {e}")
+                    continue
+                except phy.FailedTaxonId as e:
+                    print("Taxid failed for %s" % r["primaryId"])
+                    print(f"FailingTaxonId: {e}")
+                    continue
+
+            if gene_id:
+                found = add_related_by_gene(found)
+
+            for entry in found:
+                refs = entry.references + metadata_refs
+                yield data.utils.evolve_trusted(entry, references=refs)
+
+    yield from data.utils.validated(entries())
+
+
+def parse(raw):
+    """
+    Parses the given dict into a Entry object. This assumes the data is
+    formatted according to version 1.0 (or equivalent) of the RNAcentral JSON
+    schema.
+    """
+    yield from parse_records(raw["metaData"], raw["data"])
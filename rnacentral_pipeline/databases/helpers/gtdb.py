@@ -18,13 +18,21 @@ import re
 import typing as ty
 from functools import lru_cache
 
+import attr
+from attr.validators import instance_of as is_a
+from sqlitedict import SqliteDict
+
 from rnacentral_pipeline.databases.helpers import phylogeny as phy
 
 LOGGER = logging.getLogger(__name__)
 
+TaxidLookup = ty.Callable[[str], int]
+
 
 @lru_cache
-def get_inferred_species_taxid(inferred_lineage: str) -> ty.Optional[int]:
+def get_inferred_species_taxid(
+    inferred_lineage: str, taxid: TaxidLookup = phy.taxid
+) -> ty.Optional[int]:
     species = re.findall(";s__(.*)", inferred_lineage)
     if not species:
         return None
@@ -32,26 +40,28 @@ def get_inferred_species_taxid(inferred_lineage: str) -> ty.Optional[int]:
     if len(species) == 0:
         ## There is no species in the inferred phylogeny, so try next layer up
         return None
-    taxid = None
+    found = None
 
     try:
-        taxid = phy.taxid(species)
+        found = taxid(species)
     except:
         LOGGER.warning(f"{species} doesn't have a taxid, trying something else")
         species_name = species.split()[0]
         env_sample_name = f"uncultured {species_name} sp."
         try:
-            taxid = phy.taxid(env_sample_name)
+            found = taxid(env_sample_name)
         except:
             LOGGER.warning(
                 f"Uncultured species {env_sample_name} doesn't have a taxid, trying something else"
             )
 
-    return taxid
+    return found
 
 
 @lru_cache
-def get_inferred_genus_taxid(inferred_lineage: str) -> ty.Optional[int]:
+def get_inferred_genus_taxid(
+    inferred_lineage: str, taxid: TaxidLookup = phy.taxid
+) -> ty.Optional[int]:
     genus = re.findall(";g__(.*);", inferred_lineage)
     if not genus or not genus[0]:
         ## There is no genus in the inferred phylogeny, so try next layer up
@@ -59,28 +69,32 @@ def get_inferred_genus_taxid(inferred_lineage: str) -> ty.Optional[int]:
 
     genus = genus[0].split("_")[0]
     try:
-        return phy.taxid(f"uncultured {genus} sp.")
+        return taxid(f"uncultured {genus} sp.")
     except:
         LOGGER.warning(f"{genus} doesn't have a taxid, trying something else")
     return None
 
 
 @lru_cache
-def get_inferred_family_taxid(inferred_lineage: str) -> ty.Optional[int]:
+def get_inferred_family_taxid(
+    inferred_lineage: str, taxid: TaxidLookup = phy.taxid
+) -> ty.Optional[int]:
     family = re.findall(r";f__(.*)[;g|$]", inferred_lineage)
     if not family or not family[0]:
         ## There is no family in the inferred phylogeny, so try next layer up
         return None
 
     try:
-        return phy.taxid(f"{family} bacterium")
+        return taxid(f"{family} bacterium")
     except:
         LOGGER.warning(f"{family} doesn't have a taxid, trying something else")
     return None
 
 
 @lru_cache
-def get_inferred_order_taxid(inferred_lineage: str) -> ty.Optional[int]:
+def get_inferred_order_taxid(
+    inferred_lineage: str, taxid: TaxidLookup = phy.taxid
+) -> ty.Optional[int]:
     """
     Get the taxid for the order entry, if any in the given lineage. If no order
     entry can be found then None is returned.
@@ -97,7 +111,7 @@ def get_inferred_order_taxid(inferred_lineage: str) -> ty.Optional[int]:
         ## There is no order in the inferred phylogeny, so try next layer up
         return None
     try:
-        return phy.taxid(f"{order}")
+        return taxid(f"{order}")
     except:
         LOGGER.warning(f"{order} doesn't have a taxid, trying something else")
     return None
@@ -105,7 +119,9 @@ def get_inferred_order_taxid(inferred_lineage: str) -> ty.Optional[int]:
 
 @lru_cache
 def get_by_part(
-    lineage: str, bacteria_fallback: str | int = "bacterium"
+    lineage: str,
+    bacteria_fallback: str | int = "bacterium",
+    taxid: TaxidLookup = phy.taxid,
 ) -> ty.Optional[int]:
     """
     Tries to fetch the NCBI taxid for a lineage from GTDB. The lineage can be
@@ -139,9 +155,9 @@ def get_by_part(
         if name.lower() == "bacteria" and bacteria_fallback:
             if isinstance(bacteria_fallback, int):
                 return bacteria_fallback
-            return phy.taxid(bacteria_fallback)
+            return taxid(bacteria_fallback)
         try:
-            return phy.taxid(name.lower())
+            return taxid(name.lower())
         except:
             LOGGER.info("Failed to get taxid for %s (%s)", name, part)
     return None
@@ -153,14 +169,123 @@ def phylogeny_to_taxid(lineage: str) -> int:
     Tries to fetch the phylogeny using a variety of strategies. This will try
     the get_by_part function, and then all other strategies in this module.
     """
-    getters = [
-        get_by_part,
-        get_inferred_species_taxid,
-        get_inferred_genus_taxid,
-        get_inferred_family_taxid,
-        get_inferred_order_taxid,
-    ]
-    for getter in getters:
+    for getter in LINEAGE_GETTERS:
         if value := getter(lineage):
             return value
     raise ValueError(f"Could not get taxid for `{lineage}`")
+
+
+INFERRED_GETTERS = [
+    get_inferred_species_taxid,
+    get_inferred_genus_taxid,
+    get_inferred_family_taxid,
+    get_inferred_order_taxid,
+]
+
+LINEAGE_GETTERS = [get_by_part] + INFERRED_GETTERS
+
+
+@attr.s(eq=False)
+class LocalTaxonomy:
+    """
+    Find taxids using an index of names built from the NCBI taxonomy, see
+    `ncbi.taxonomy.index_names`. This can be used in place of
+    `phylogeny.taxid` to avoid any requests to the EBI taxonomy API.
+    """
+
+    names = attr.ib()
+
+    @classmethod
+    def load(cls, path: str) -> "LocalTaxonomy":
+        return cls(SqliteDict(filename=path, flag="r"))
+
+    def __call__(self, name: str) -> int:
+        try:
+            return self.names[name.lower()]
+        except KeyError:
+            raise phy.UnknownTaxonId(name)
+
+    def close(self):
+        if isinstance(self.names, SqliteDict):
+            self.names.close()
+
+
+@attr.s()
+class LineageResolver:
+    """
+    Resolves many lineages to taxids at once. Each distinct lineage is only
+    resolved once, by trying each getter in order, and the result is stored
+    in the table. Lineages without a taxid are stored as None. If the table is
+    persistent, like a SqliteDict, then later runs will not resolve the same
+    lineages again, unless retry_unresolved is set, in which case lineages
+    stored as None are tried again.
+    """
+
+    table: ty.MutableMapping[str, ty.Optional[int]] = attr.ib()
+    taxid: TaxidLookup = attr.ib(default=phy.taxid)
+    getters: ty.List[ty.Callable] = attr.ib(factory=lambda: list(INFERRED_GETTERS))
+    retry_unresolved: bool = attr.ib(default=False, validator=is_a(bool))
+
+    @classmethod
+    def build(
+        cls,
+        taxonomy: ty.Optional[str] = None,
+        cache: ty.Optional[str] = None,
+        tablename: str = "lineages",
+        **kwargs,
+    ) -> "LineageResolver":
+        """
+        Create a resolver which uses the name index at taxonomy, if given, and
+        otherwise the EBI taxonomy API. If cache is given, resolved lineages,
+        including those without a taxid, are stored in that file and reused
+        between runs.
+        """
+
+        table: ty.MutableMapping[str, ty.Optional[int]] = {}
+        if cache:
+            table = SqliteDict(filename=cache, tablename=tablename)
+        if taxonomy:
+            kwargs["taxid"] = LocalTaxonomy.load(taxonomy)
+        return cls(table=table, **kwargs)
+
+    def resolve_one(self, lineage: str) -> ty.Optional[int]:
+        for getter in self.getters:
+            if value := getter(lineage, taxid=self.taxid):
+                return value
+        return None
+
+    def resolve_all(self, lineages: ty.Iterable[str]) -> ty.Dict[str, ty.Optional[int]]:
+        """
+        Resolve all given lineages, returning a mapping of each lineage to the
+        found taxid, or None if no taxid could be found.
+        """
+
+        resolved: ty.Dict[str, ty.Optional[int]] = {}
+        missing = []
+        for lineage in set(lineages):
+            if lineage in self.table:
+                known = self.table[lineage]
+                if known is not None or not self.retry_unresolved:
+                    resolved[lineage] = known
+                    continue
+            missing.append(lineage)
+
+        LOGGER.info(
+            "Resolving %i lineages, %i already known", len(missing), len(resolved)
+        )
+        found = {}
+        for lineage in sorted(missing):
+            found[lineage] = self.resolve_one(lineage)
+        resolved.update(found)
+
+        if found:
+            self.table.update(found)
+            if isinstance(self.table, SqliteDict):
+                self.table.commit()
+        return resolved
+
+    def close(self):
+        if isinstance(self.table, SqliteDict):
+            self.table.close()
+        if isinstance(self.taxid, LocalTaxonomy):
+            self.taxid.close()
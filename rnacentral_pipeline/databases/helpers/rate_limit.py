@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright [2009-2024] EMBL-European Bioinformatics Institute
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import threading
+import time
+
+import attr
+from attr.validators import instance_of as is_a
+
+
+@attr.s()
+class RateLimiter:
+    """
+    Limit the number of requests started per period across all threads using
+    this limiter.
+    """
+
+    rate_limit: int = attr.ib(default=15, validator=is_a(int))
+    period: float = attr.ib(default=1.0, validator=is_a(float))
+    _lock = attr.ib(factory=threading.Lock, repr=False)
+    _next: float = attr.ib(default=0.0, repr=False)
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.period / self.rate_limit
+        if start > now:
+            time.sleep(start - now)
@@ -38,8 +38,12 @@ def ids(interactions):
     return {getter(r) for r in interactions}
 
 
-def mapping(db_url, data):
-    mapping = lookup.as_mapping(db_url, ids(data), QUERY)
+def id_mapping(db_url, ids):
+    mapping = lookup.as_mapping(db_url, ids, QUERY)
     for value in mapping.values():
         value["sequence"] = value["sequence"].replace("U", "T")
     return mapping
+
+
+def mapping(db_url, data):
+    return id_mapping(db_url, ids(data))
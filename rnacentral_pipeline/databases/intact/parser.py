@@ -14,9 +14,9 @@ limitations under the License.
 """
 
 import operator as op
-import itertools as it
+from functools import partial
 
-from rnacentral_pipeline.databases.psi_mi import tab
+from rnacentral_pipeline.databases.psi_mi import grouping, tab
 
 from . import lookup
 from . import helpers
@@ -33,7 +33,7 @@ IGNORE = {
 
 
 def parse_interactions(handle):
-    data = tab.parse(handle)
+    data = tab.parse(handle, rnacentral_only=True)
     data = filter(op.methodcaller("involves_rnacentral"), data)
     data = filter(lambda i: i.urs_taxid.startswith("URS"), data)
     data = filter(lambda i: i.urs_taxid not in IGNORE, data)
@@ -41,16 +41,9 @@ def parse_interactions(handle):
     return data
 
 
-def parse(handle, db_url):
-    key = op.attrgetter("urs_taxid")
-    interactions = sorted(parse_interactions(handle), key=key)
-    mapping = lookup.mapping(db_url, interactions)
-    interactions = sorted(interactions, key=key)
-    grouped = it.groupby(interactions, key)
-    for urs_taxid, interactions in grouped:
-        if urs_taxid not in mapping:
-            raise ValueError("Found no sequence info for %s" % urs_taxid)
-
-        info = mapping[urs_taxid]
-        entry = helpers.as_entry(urs_taxid, list(interactions), info)
+def parse(handle, db_url, **kwargs):
+    groups = grouping.grouped(parse_interactions(handle), **kwargs)
+    mapping = partial(lookup.id_mapping, db_url)
+    for urs_taxid, interactions, info in grouping.with_sequence_info(groups, mapping):
+        entry = helpers.as_entry(urs_taxid, interactions, info)
         yield entry
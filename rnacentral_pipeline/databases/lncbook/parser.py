@@ -13,41 +13,44 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-import json
-from io import StringIO
-import attr
+import typing as ty
 
+from rnacentral_pipeline.databases.data import Entry
 from rnacentral_pipeline.databases.generic import parser as generic
 
+MITOCHONDRIAL = {"M", "chrM"}
 
-def parse(handle):
-    raw = json.load(handle)
-    data = []
-    for ncrna in raw["data"]:
-        regions = ncrna["genomeLocations"]
-        regions = filter(lambda r: r["assembly"] == "GRCh38", regions)
-        regions = list(regions)
-        if not regions:
-            continue
-        ncrna["genomeLocations"] = regions
-        ncrna["sequence"] = ncrna["sequence"].upper()
-        data.append(ncrna)
-    if not data:
+
+def as_grch38(ncrna: generic.Record) -> ty.Optional[generic.Record]:
+    """
+    Modify a raw LncBook record so it only has GRCh38 locations, with the
+    mitochondrial chromosome named MT. Records without any GRCh38 location
+    are skipped by returning None.
+    """
+
+    regions = [r for r in ncrna["genomeLocations"] if r["assembly"] == "GRCh38"]
+    if not regions:
+        return None
+
+    for region in regions:
+        for exon in region.get("exons", []):
+            if exon["chromosome"] in MITOCHONDRIAL:
+                exon["chromosome"] = "MT"
+    ncrna["genomeLocations"] = regions
+    ncrna["sequence"] = ncrna["sequence"].upper()
+    return ncrna
+
+
+def parse(handle) -> ty.Iterable[Entry]:
+    kept = 0
+
+    def transform(ncrna):
+        nonlocal kept
+        ncrna = as_grch38(ncrna)
+        if ncrna:
+            kept += 1
+        return ncrna
+
+    yield from generic.parse(handle, transform=transform)
+    if not kept:
         raise ValueError("All ncRNA are not from GRCh38, failing")
-    raw = {
-        "metaData": raw["metaData"],
-        "data": data,
-    }
-    processed = StringIO()
-    json.dump(raw, processed)
-    processed.seek(0)
-
-    for entry in generic.parse(processed):
-        updates = []
-        for region in entry.regions:
-            if region.chromosome == "M":
-                updates.append(attr.evolve(region, chromosome="MT"))
-            else:
-                updates.append(region)
-        entry = attr.evolve(entry, regions=updates)
-        yield entry
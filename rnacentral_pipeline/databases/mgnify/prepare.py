@@ -29,7 +29,7 @@ def get_so_type(conn_str):
     return so_type
 
 
-def prepare_mgnify_data(data, conn_str):
+def prepare_mgnify_data(data, conn_str, resolver=None):
 
     ## Get Rfam model ID to SO type lookup
     so_type = get_so_type(conn_str)
@@ -51,19 +51,15 @@ def prepare_mgnify_data(data, conn_str):
         "mouse gut genome catalogue": 410661,  # mouse gut metagenome
     }
 
+    if resolver is None:
+        resolver = gtdb.LineageResolver(table={})
+    lineages = (entry["inferredPhylogeny"] for entry in data["data"])
+    taxids = resolver.resolve_all(lineages)
+
     prepared_data = []
     for entry in data["data"]:
 
-        taxid = gtdb.get_inferred_species_taxid(entry["inferredPhylogeny"])
-
-        if taxid is None:
-            taxid = gtdb.get_inferred_genus_taxid(entry["inferredPhylogeny"])
-
-        if taxid is None:
-            taxid = gtdb.get_inferred_family_taxid(entry["inferredPhylogeny"])
-
-        if taxid is None:
-            taxid = gtdb.get_inferred_order_taxid(entry["inferredPhylogeny"])
+        taxid = taxids[entry["inferredPhylogeny"]]
 
         if taxid is None:
             LOGGER.warning("falling back to generic metagenome taxid")
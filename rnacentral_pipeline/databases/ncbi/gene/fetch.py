@@ -13,23 +13,50 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import collections as coll
+import logging
 import subprocess as sp
 import tempfile
+import typing as ty
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from ftplib import FTP
 
+import attr
 import more_itertools as more
+from attr.validators import instance_of as is_a
 from Bio import Entrez, SeqIO
+from sqlitedict import SqliteDict
 
+from rnacentral_pipeline.databases.helpers.rate_limit import RateLimiter
 from rnacentral_pipeline.utils import pickle_stream
 
 from . import helpers
 
-BATCH_SIZE = 300
+LOGGER = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+NUCLEOTIDE_BATCH_SIZE = 500
 
 Entrez.email = "rnacentral@gmail.com"
 
 
+def default_limiter() -> RateLimiter:
+    """
+    NCBI allows 10 requests per second with an API key and 3 without one.
+    """
+    if Entrez.api_key:
+        return RateLimiter(rate_limit=10)
+    return RateLimiter(rate_limit=3)
+
+
+def efetch(limiter: ty.Optional[RateLimiter], **kwargs):
+    if limiter:
+        limiter.wait()
+    return Entrez.efetch(**kwargs)
+
+
 def raw():
     ftp = FTP("ftp.ncbi.nih.gov")
     ftp.login()
@@ -112,27 +139,30 @@ def find_genome_id(cur_id, entry):
     return result
 
 
-def lookup_by_nt(mapping):
-    handle = Entrez.efetch(
-        db="nucleotide",
-        id=",".join(mapping.keys()),
-        rettype="gb",
-        retmode="text",
-    )
+def lookup_by_nt(mapping, limiter=None):
     data = {}
-    for sequence in SeqIO.parse(handle, "genbank"):
-        # The ID has a version ID, which we do not want, while name does not.
-        gene_id = mapping[sequence.name]
-        data[gene_id] = sequence
-    handle.close()
+    for chunk in more.chunked(mapping.keys(), NUCLEOTIDE_BATCH_SIZE):
+        handle = efetch(
+            limiter,
+            db="nucleotide",
+            id=",".join(chunk),
+            rettype="gb",
+            retmode="text",
+        )
+        for sequence in SeqIO.parse(handle, "genbank"):
+            # The ID has a version ID, which we do not want, while name does not.
+            gene_id = mapping[sequence.name]
+            data[gene_id] = sequence
+        handle.close()
     assert len(data) == len(mapping)
     return data
 
 
-def lookup_by_genome(mapping):
+def lookup_by_genome(mapping, limiter=None):
     data = {}
     for gene_id, coord in mapping.items():
-        handle = Entrez.efetch(
+        handle = efetch(
+            limiter,
             db="nuccore",
             rettype="gb",
             retmode="text",
@@ -143,9 +173,9 @@ def lookup_by_genome(mapping):
     return data
 
 
-def sequences(batch):
+def sequences(batch, limiter=None):
     ids = [ncrna["GeneID"] for ncrna in batch]
-    handle = Entrez.efetch(db="gene", id=ids, retmode="xml")
+    handle = efetch(limiter, db="gene", id=ids, retmode="xml")
     ncrna_ids = {}
     genomic_ids = {}
     for entry in Entrez.read(handle):
@@ -165,30 +195,112 @@ def sequences(batch):
             raise ValueError("Could not find sequence id for: %s" % cur_id)
 
     data = {}
-    data.update(lookup_by_nt(ncrna_ids))
-    data.update(lookup_by_genome(genomic_ids))
+    data.update(lookup_by_nt(ncrna_ids, limiter=limiter))
+    data.update(lookup_by_genome(genomic_ids, limiter=limiter))
     return data
 
 
-def data(raw_ncrnas):
-    batches = more.chunked(raw_ncrnas, BATCH_SIZE)
-    for batch in batches:
-        seqs = sequences(batch)
+def modification_date(ncrna) -> ty.Optional[str]:
+    return helpers.value(ncrna, "Modification_date")
+
+
+@attr.s()
+class Fetcher:
+    """
+    Fetch the sequences of NCBI genes. Genes are fetched in batches by a pool
+    of workers, which share a rate limiter. The sequence of each fetched gene
+    is stored in the cache along with the modification date of the gene.
+    Genes whose modification date matches the cache are not fetched again.
+    If the cache is a SqliteDict it is committed after each batch, so an
+    interrupted fetch can be resumed.
+    """
+
+    cache: ty.MutableMapping[str, ty.Tuple] = attr.ib(factory=dict)
+    limiter: RateLimiter = attr.ib(factory=default_limiter)
+    workers: int = attr.ib(default=3, validator=is_a(int))
+    batch_size: int = attr.ib(default=BATCH_SIZE, validator=is_a(int))
+
+    def cached(self, ncrna):
+        found = self.cache.get(helpers.gene_id(ncrna))
+        if found is None:
+            return None
+        date, sequence = found
+        if date != modification_date(ncrna):
+            return None
+        return sequence
+
+    def fetch_batch(self, batch):
+        seqs = sequences(batch, limiter=self.limiter)
+        results = []
         for ncrna in batch:
             gene_id = helpers.gene_id(ncrna)
             if gene_id not in seqs:
                 LOGGER.warn("No sequence found for %s" % gene_id)
                 continue
             ncrna["sequence"] = seqs[gene_id]
-            yield ncrna
-
-
-def fetch_and_write(raw_ncrnas, output, api_key=None):
+            results.append(ncrna)
+        return results
+
+    def store(self, fetched):
+        for ncrna in fetched:
+            key = helpers.gene_id(ncrna)
+            self.cache[key] = (modification_date(ncrna), ncrna["sequence"])
+        if isinstance(self.cache, SqliteDict):
+            self.cache.commit()
+
+    def data(self, raw_ncrnas):
+        """
+        Produce all ncRNAs with their sequence. Cached genes are produced
+        as they are read, while all others are produced once their batch has
+        been fetched, so the order may differ from the input.
+        """
+
+        pending = coll.deque()
+        batch = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+
+            def completed(future):
+                fetched = future.result()
+                self.store(fetched)
+                return fetched
+
+            for ncrna in raw_ncrnas:
+                sequence = self.cached(ncrna)
+                if sequence is not None:
+                    ncrna["sequence"] = sequence
+                    yield ncrna
+                    continue
+
+                batch.append(ncrna)
+                if len(batch) == self.batch_size:
+                    pending.append(executor.submit(self.fetch_batch, batch))
+                    batch = []
+                while len(pending) > 2 * self.workers:
+                    yield from completed(pending.popleft())
+
+            if batch:
+                pending.append(executor.submit(self.fetch_batch, batch))
+            while pending:
+                yield from completed(pending.popleft())
+
+
+def data(raw_ncrnas, **kwargs):
+    return Fetcher(**kwargs).data(raw_ncrnas)
+
+
+def fetch_and_write(raw_ncrnas, output, api_key=None, cache_path=None, **kwargs):
     if api_key:
         Entrez.api_key = api_key
-    fetched = data(raw_ncrnas)
-    return pickle_stream(fetched, output)
-
-
-def write(output, api_key=None):
-    return fetch_and_write(raw(), output, api_key=api_key)
+    cache = {}
+    if cache_path:
+        cache = SqliteDict(filename=cache_path, tablename="genes")
+    try:
+        fetched = data(raw_ncrnas, cache=cache, **kwargs)
+        return pickle_stream(fetched, output)
+    finally:
+        if isinstance(cache, SqliteDict):
+            cache.close()
+
+
+def write(output, api_key=None, **kwargs):
+    return fetch_and_write(raw(), output, api_key=api_key, **kwargs)
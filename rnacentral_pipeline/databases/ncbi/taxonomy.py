@@ -126,3 +126,39 @@ def index(directory: Path, output: str):
     for entry in parse_directory(directory):
         mapping[str(entry.tax_id)] = entry
     mapping.commit()
+
+
+def name_index(entries: ty.Iterable[TaxonomyEntry]) -> ty.Dict[str, int]:
+    """
+    Build a mapping from lower case names to taxids. Scientific names take
+    precedence over aliases, and replaced taxids are ignored.
+    """
+
+    names: ty.Dict[str, int] = {}
+    aliases: ty.Dict[str, int] = {}
+    for entry in entries:
+        if entry.replaced_by is not None:
+            continue
+        names.setdefault(entry.name.lower(), entry.tax_id)
+        for alias in entry.aliases:
+            aliases.setdefault(alias.lower(), entry.tax_id)
+
+    for alias, tax_id in aliases.items():
+        names.setdefault(alias, tax_id)
+    return names
+
+
+def index_names(directory: Path, output: str, batch_size=100000):
+    """
+    Write an index of name to taxid for all names and aliases in the NCBI
+    taxonomy. This is used to find taxids without using the EBI taxonomy
+    API.
+    """
+
+    names = name_index(parse_directory(directory))
+    mapping = SqliteDict(filename=output)
+    items = iter(names.items())
+    while batch := list(it.islice(items, batch_size)):
+        mapping.update(batch)
+        mapping.commit()
+    mapping.close()
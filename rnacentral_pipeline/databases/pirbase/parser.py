@@ -44,8 +44,6 @@ def parse(path: Path, known_path: Path) -> ty.Iterable[data.Entry]:
     )
 
     with path.open("r") as handle:
-        for raw in ijson.items(handle, "data.item"):
-            entry = v1.as_entry(raw, ctx)
-            if entry.md5() in known:
-                yield entry
+        entries = (v1.as_entry(raw, ctx) for raw in ijson.items(handle, "data.item"))
+        yield from data.utils.validated(e for e in entries if e.md5() in known)
     known.close()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright [2009-2024] EMBL-European Bioinformatics Institute
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import itertools as it
+import operator as op
+import typing as ty
+from pathlib import Path
+
+import more_itertools as more
+
+from rnacentral_pipeline import utils
+from rnacentral_pipeline.databases.data import Interaction
+
+LOOKUP_SIZE = 5000
+
+Group = ty.Tuple[str, ty.List[Interaction]]
+
+SequenceInfo = ty.Dict[str, ty.Any]
+
+urs_taxid = op.attrgetter("urs_taxid")
+
+
+def grouped(
+    interactions: ty.Iterable[Interaction],
+    run_size=utils.SORT_RUN_SIZE,
+    directory: ty.Optional[Path] = None,
+) -> ty.Iterator[Group]:
+    """
+    Group all interactions by urs_taxid, in sorted order, using an external
+    merge sort so that only a run of interactions, and one group, is held in
+    memory. Interactions with the same urs_taxid keep the order they were
+    given in, which is the same as sorting all of them at once.
+    """
+
+    ordered = utils.external_sort(
+        interactions,
+        key=urs_taxid,
+        run_size=run_size,
+        directory=directory,
+    )
+    for key, group in it.groupby(ordered, urs_taxid):
+        yield (key, list(group))
+
+
+def with_sequence_info(
+    groups: ty.Iterable[Group],
+    mapping: ty.Callable[[ty.Set[str]], ty.Dict[str, SequenceInfo]],
+    batch_size=LOOKUP_SIZE,
+) -> ty.Iterator[ty.Tuple[str, ty.List[Interaction], SequenceInfo]]:
+    """
+    Add the sequence info to each group. The info is looked up in bulk, using
+    the mapping function, for each batch of batch_size groups so that entries
+    can be produced before all interactions have been seen.
+    """
+
+    for batch in more.chunked(groups, batch_size):
+        found = mapping({key for (key, _) in batch})
+        for key, interactions in batch:
+            if key not in found:
+                raise ValueError("Found no sequence info for %s" % key)
+            yield (key, interactions, found[key])
@@ -13,68 +13,138 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-import re
-import csv
 import logging
+import re
 import typing as ty
 from datetime import date
-import collections as coll
-
-import tatsu
+from functools import lru_cache
 
 from rnacentral_pipeline.databases import data
 from rnacentral_pipeline.databases.helpers import publications as pubs
 
 LOGGER = logging.getLogger(__name__)
 
-IDENT_GRAMMAR = r"""
-@@grammar::PSI_MI_IDENTIFIER
+CACHE_SIZE = 2**16
 
-start = empty:empty | idents $ ;
+WHITESPACE = re.compile(r"\s*")
 
-empty = '-' ;
+SIMPLE_STRING = re.compile(r"[^|():\t]+")
 
-idents = '|'.{ ident }+ ;
+QUOTED_STRING = re.compile(r'(?:\\"|[^"])+')
 
-ident = xref:string ':' [ value:string [ '(' description:string ')' ] ] ;
+RNACENTRAL_COLUMNS = [
+    "#ID(s) interactor A",
+    "ID(s) interactor B",
+    "Alt. ID(s) interactor A",
+    "Alt. ID(s) interactor B",
+    "Alias(es) interactor A",
+    "Alias(es) interactor B",
+]
 
-string = ('"' quoted_string  '"') | simple_string ;
 
-simple_string = /[^|():\t]+/ ;
+class InvalidIdentifiers(ValueError):
+    """
+    Raised if a column of identifiers cannot be parsed.
+    """
 
-quoted_string = /(\\"|[^"])+/ ;
-"""
+
+def _skip(raw: str, pos: int) -> int:
+    return WHITESPACE.match(raw, pos).end()
+
+
+def _token(raw: str, pos: int, token: str) -> ty.Optional[int]:
+    pos = _skip(raw, pos)
+    if raw.startswith(token, pos):
+        return pos + len(token)
+    return None
 
 
-class IdentSemantics(object):
-    def string(self, ast):
-        if isinstance(ast, (list, tuple)):
-            l, v, r = ast
-            ast = v
-        ast = ast.replace(r"\"", '"')
-        return ast
+def _string(raw: str, pos: int) -> ty.Optional[ty.Tuple[str, int]]:
+    pos = _skip(raw, pos)
+    if raw.startswith('"', pos):
+        quoted = QUOTED_STRING.match(raw, _skip(raw, pos + 1))
+        if quoted:
+            end = _token(raw, quoted.end(), '"')
+            if end is not None:
+                return (quoted.group(0).replace(r"\"", '"'), end)
+    simple = SIMPLE_STRING.match(raw, pos)
+    if simple:
+        return (simple.group(0).replace(r"\"", '"'), simple.end())
+    return None
 
 
-IDENT_MODEL = tatsu.compile(IDENT_GRAMMAR, semantics=IdentSemantics())
+def _identifier(
+    raw: str, pos: int
+) -> ty.Optional[ty.Tuple[data.InteractionIdentifier, int]]:
+    xref = _string(raw, pos)
+    if not xref:
+        return None
+    pos = _token(raw, xref[1], ":")
+    if pos is None:
+        return None
+    value = _string(raw, pos)
+    if not value:
+        return (data.InteractionIdentifier(xref[0], "", None), pos)
+    pos = value[1]
+
+    description = None
+    start = _token(raw, pos, "(")
+    if start is not None:
+        found = _string(raw, start)
+        if found:
+            end = _token(raw, found[1], ")")
+            if end is not None:
+                description = found[0]
+                pos = end
+
+    ident = data.InteractionIdentifier(xref[0], value[0], description)
+    return (ident, pos)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_identifiers(raw: str) -> ty.Tuple[data.InteractionIdentifier, ...]:
+    """
+    Parse a column of PSI-MI identifiers. This is a hand written version of
+    the grammar:
+
+        start = empty:'-' | idents $ ;
+        idents = '|'.{ ident }+ ;
+        ident = xref:string ':' [ value:string [ '(' description:string ')' ] ] ;
+        string = ('"' /(\\"|[^"])+/ '"') | /[^|():\t]+/ ;
+
+    where whitespace is skipped before each token. The same values appear in
+    many rows, for example ontology terms, so the results are cached.
+    """
+
+    if _token(raw, 0, "-") is not None:
+        return ()
+
+    found = _identifier(raw, 0)
+    if not found:
+        raise InvalidIdentifiers("Could not parse: %s" % raw)
+    idents = [found[0]]
+    pos = found[1]
+    while True:
+        following = _token(raw, pos, "|")
+        if following is None:
+            break
+        found = _identifier(raw, following)
+        if not found:
+            break
+        idents.append(found[0])
+        pos = found[1]
+
+    if _skip(raw, pos) != len(raw):
+        raise InvalidIdentifiers("Could not parse: %s" % raw)
+    return tuple(idents)
 
 
 def identifiers(raw: str) -> ty.List[data.InteractionIdentifier]:
     assert raw, "Must have at least one identifier"
-    idents = []
-    for possible in IDENT_MODEL.parse(raw):
-        if "empty" in possible:
-            continue
-        idents.append(
-            data.InteractionIdentifier(
-                possible["xref"],
-                possible.get("value", ""),
-                possible.get("description", None),
-            )
-        )
-
-    return idents
+    return list(parse_identifiers(raw))
 
 
+@lru_cache(maxsize=CACHE_SIZE)
 def as_taxid(value):
     if value == "-":
         return None
@@ -129,60 +199,106 @@ def stoichiometry(value):
     return int(value)
 
 
-def as_interactor(row, interactor: data.InteractorType) -> ty.Optional[data.Interactor]:
-    field_names = {
-        "ID(s) interactor": ("id", as_unique_id),
-        "Alt. ID(s) interactor": ("alt_ids", identifiers),
-        "Alias(es) interactor": ("aliases", identifiers),
-        "Taxid interactor": ("taxid", as_taxid),
-        "Biological role(s) interactor": ("biological_role", identifiers),
-        "Experimental role(s) interactor": ("experimental_role", identifiers),
-        "Type(s) interactor": ("interactor_type", identifiers),
-        "Xref(s) interactor": ("xrefs", identifiers),
-        "Annotation(s) interactor": ("annotations", str),
-        "Feature(s) interactor": ("features", identifiers),
-        "Stoichiometry(s) interactor": ("stoichiometry", stoichiometry),
-        "Identification method participant": (
-            "participant_identification",
-            identifiers,
-        ),
-    }
+class Row:
+    """
+    A single row of a MITAB file. The line is only split into columns, each
+    column is parsed when it is requested.
+    """
 
-    parts: ty.Dict[str, ty.Any] = {}
-    for field_template, (key, fn) in field_names.items():
+    __slots__ = ("index", "columns")
+
+    def __init__(self, index: ty.Dict[str, int], columns: ty.List[str]):
+        self.index = index
+        self.columns = columns
+
+    def __getitem__(self, name: str) -> str:
+        return self.columns[self.index[name]]
+
+    def as_dict(self) -> ty.Dict[str, str]:
+        return {name: self.columns[i] for name, i in self.index.items()}
+
+
+def rows(handle) -> ty.Iterator[Row]:
+    header = None
+    for line in handle:
+        line = line.rstrip("\r\n")
+        if not line:
+            continue
+        columns = line.split("\t")
+        if header is None:
+            header = {name: i for i, name in enumerate(columns)}
+            continue
+        yield Row(header, columns)
+
+
+def mentions_rnacentral(row: Row) -> bool:
+    """
+    Check if any of the id columns mention RNAcentral. This is a quick check,
+    done before parsing the row, which is true for all rows where
+    `Interaction.involves_rnacentral` is true.
+    """
+    return any("rnacentral" in row[name].lower() for name in RNACENTRAL_COLUMNS)
+
+
+INTERACTOR_FIELDS = {
+    "ID(s) interactor": ("id", as_unique_id),
+    "Alt. ID(s) interactor": ("alt_ids", identifiers),
+    "Alias(es) interactor": ("aliases", identifiers),
+    "Taxid interactor": ("taxid", as_taxid),
+    "Biological role(s) interactor": ("biological_role", identifiers),
+    "Experimental role(s) interactor": ("experimental_role", identifiers),
+    "Type(s) interactor": ("interactor_type", identifiers),
+    "Xref(s) interactor": ("xrefs", identifiers),
+    "Annotation(s) interactor": ("annotations", str),
+    "Feature(s) interactor": ("features", identifiers),
+    "Stoichiometry(s) interactor": ("stoichiometry", stoichiometry),
+    "Identification method participant": (
+        "participant_identification",
+        identifiers,
+    ),
+}
+
+INTERACTION_FIELDS = {
+    "Interaction detection method(s)": ("methods", identifiers),
+    "Publication Identifier(s)": ("publications", as_pubs),
+    "Interaction type(s)": ("types", identifiers),
+    "Source database(s)": ("source_database", identifiers),
+    "Interaction identifier(s)": ("ids", identifiers),
+    "Confidence value(s)": ("confidence", identifiers),
+    "Expansion method(s)": ("methods", identifiers),
+    "Interaction Xref(s)": ("xrefs", identifiers),
+    "Interaction annotation(s)": ("annotations", identifiers),
+    "Host organism(s)": ("host_organisms", as_taxid),
+    "Creation date": ("create_date", as_date),
+    "Update date": ("update_date", as_date),
+    "Negative": ("is_negative", as_bool),
+}
+
+
+@lru_cache()
+def interactor_fields(interactor: data.InteractorType):
+    fields = []
+    for field_template, (key, fn) in INTERACTOR_FIELDS.items():
         if interactor == data.InteractorType.A and field_template == "ID(s) interactor":
             field_template = "#ID(s) interactor"
+        fields.append(("%s %s" % (field_template, interactor.name), key, fn))
+    return fields
+
 
-        field_name = "%s %s" % (field_template, interactor.name)
+def as_interactor(row, interactor: data.InteractorType) -> ty.Optional[data.Interactor]:
+    parts: ty.Dict[str, ty.Any] = {}
+    for field_name, key, fn in interactor_fields(interactor):
         parts[key] = fn(row[field_name])
 
     if not parts["id"]:
-        from pprint import pprint
-
-        pprint(row)
+        LOGGER.warn("No id for interactor %s in %s", interactor.name, row.as_dict())
         return None
     return data.Interactor(**parts)
 
 
 def as_interaction(row) -> ty.Optional[data.Interaction]:
-    field_names = {
-        "Interaction detection method(s)": ("methods", identifiers),
-        "Publication Identifier(s)": ("publications", as_pubs),
-        "Interaction type(s)": ("types", identifiers),
-        "Source database(s)": ("source_database", identifiers),
-        "Interaction identifier(s)": ("ids", identifiers),
-        "Confidence value(s)": ("confidence", identifiers),
-        "Expansion method(s)": ("methods", identifiers),
-        "Interaction Xref(s)": ("xrefs", identifiers),
-        "Interaction annotation(s)": ("annotations", identifiers),
-        "Host organism(s)": ("host_organisms", as_taxid),
-        "Creation date": ("create_date", as_date),
-        "Update date": ("update_date", as_date),
-        "Negative": ("is_negative", as_bool),
-    }
-
     parts: ty.Dict[str, ty.Any] = {}
-    for field_name, (key, fn) in field_names.items():
+    for field_name, (key, fn) in INTERACTION_FIELDS.items():
         parts[key] = fn(row[field_name])
 
     parts["interactor1"] = as_interactor(row, data.InteractorType.A)
@@ -194,8 +310,16 @@ def as_interaction(row) -> ty.Optional[data.Interaction]:
     return data.Interaction(**parts)
 
 
-def parse(handle) -> ty.Iterator[data.Interaction]:
-    rows = csv.DictReader(handle, delimiter="\t", quoting=csv.QUOTE_NONE)
-    interactions = map(as_interaction, rows)
+def parse(handle, rnacentral_only=False) -> ty.Iterator[data.Interaction]:
+    """
+    Parse all interactions in the given MITAB file. If rnacentral_only is set,
+    rows which do not mention RNAcentral are skipped before they are parsed,
+    but interactions must still be checked with `involves_rnacentral`.
+    """
+
+    data_rows: ty.Iterable[Row] = rows(handle)
+    if rnacentral_only:
+        data_rows = filter(mentions_rnacentral, data_rows)
+    interactions = map(as_interaction, data_rows)
     valid = filter(None, interactions)
     return valid
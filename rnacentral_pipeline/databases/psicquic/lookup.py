@@ -33,7 +33,11 @@ where
 """
 
 
+def id_mapping(db_url: str, ids: ty.Set[str]):
+    return lookup.as_mapping(db_url, ids, QUERY)
+
+
 def mapping(db_url: str, interactions: ty.List[Interaction]):
     getter = op.attrgetter("urs_taxid")
     ids = {getter(r) for r in interactions}
-    return lookup.as_mapping(db_url, ids, QUERY)
+    return id_mapping(db_url, ids)
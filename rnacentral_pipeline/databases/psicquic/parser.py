@@ -16,11 +16,11 @@ limitations under the License.
 import typing as ty
 from pathlib import Path
 import operator as op
-import itertools as it
+from functools import partial
 
 import attr
 
-from rnacentral_pipeline.databases.psi_mi import tab
+from rnacentral_pipeline.databases.psi_mi import grouping, tab
 from rnacentral_pipeline.databases.data import Entry, Interaction, InteractionIdentifier
 
 from . import lookup
@@ -36,23 +36,16 @@ def set_interaction_id(interaction: Interaction, index: int) -> Interaction:
 
 
 def parse_interactions(handle: ty.IO) -> ty.Iterable[Interaction]:
-    data = tab.parse(handle)
+    data = tab.parse(handle, rnacentral_only=True)
     data = filter(op.methodcaller("involves_rnacentral"), data)
     return data
 
 
-def parse(path: Path, db_url: str) -> ty.Iterable[Entry]:
+def parse(path: Path, db_url: str, **kwargs) -> ty.Iterable[Entry]:
     with path.open("r") as raw:
-        key = op.attrgetter("urs_taxid")
-        interactions = sorted(parse_interactions(raw), key=key)
-        mapping = lookup.mapping(db_url, interactions)
-        interactions = sorted(interactions, key=key)
-        grouped = it.groupby(interactions, key)
-        for urs_taxid, current in grouped:
-            if urs_taxid not in mapping:
-                raise ValueError("Found no sequence info for %s" % urs_taxid)
-
-            info = mapping[urs_taxid]
+        groups = grouping.grouped(parse_interactions(raw), **kwargs)
+        mapping = partial(lookup.id_mapping, db_url)
+        for urs_taxid, current, info in grouping.with_sequence_info(groups, mapping):
             current = sorted(current)
             current = [set_interaction_id(inter, i) for i, inter in enumerate(current)]
             entry = helpers.as_entry(urs_taxid, current, info)
@@ -20,6 +20,10 @@ import rnacentral_pipeline.databases.helpers.publications as pub
 
 from rnacentral_pipeline.databases import data
 
+PMID = re.compile(r"^PMID:(\d+)$")
+
+EXTENSION = re.compile(r"(\w+)\((.+)\)")
+
 go_id = op.itemgetter("GO_ID")
 evidence = op.itemgetter("Evidence")
 assigned_by = op.itemgetter("Assigned_by")
@@ -45,7 +49,7 @@ def qualifier(entry):
 def publications(entry):
     references = []
     for reference in entry["DB:Reference"]:
-        match = re.match(r"^PMID:(\d+)$", reference)
+        match = PMID.match(reference)
         if match:
             references.append(pub.reference(match.group(1)))
     return references
@@ -55,7 +59,7 @@ def extensions(record):
     result = []
     for extension in record["Annotation Extension"]:
         for part in extension.split(","):
-            match = re.match(r"(\w+)\((.+)\)", part)
+            match = EXTENSION.match(part)
             if match:
                 result.append(
                     data.AnnotationExtension(
@@ -19,6 +19,7 @@ import typing as ty
 
 from Bio.UniProt.GOA import gpa_iterator as raw_parser
 
+from rnacentral_pipeline import utils
 from rnacentral_pipeline.databases.data.go_annotations import GoTermAnnotation
 
 from rnacentral_pipeline.databases.quickgo import helpers
@@ -40,9 +41,11 @@ def as_annotation(record: ty.Dict[str, ty.Any]) -> GoTermAnnotation:
     )
 
 
-def parse(handle: ty.IO) -> ty.Iterable[GoTermAnnotation]:
+def parse(handle: ty.IO, **kwargs) -> ty.Iterable[GoTermAnnotation]:
     """
     Parse the given file to produce an iterable of GoTerm objects to import.
+    Duplicate annotations are merged after sorting them with an external
+    sort, any extra arguments are given to `utils.external_sort`.
     """
 
     key = op.attrgetter(
@@ -52,8 +55,8 @@ def parse(handle: ty.IO) -> ty.Iterable[GoTermAnnotation]:
     records = raw_parser(handle)
     records = filter(lambda r: r["Assigned_by"] != "RNAcentral", records)
     records = filter(lambda r: r["DB:Reference"] != "GO_REF:0000115", records)
-    annotations = list(map(as_annotation, records))
-    annotations.sort(key=key)
+    annotations = map(as_annotation, records)
+    annotations = utils.external_sort(annotations, key=key, **kwargs)
 
     for _, similar_iter in it.groupby(annotations, key):
         similar = list(similar_iter)
@@ -13,35 +13,76 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-import collections as coll
+import itertools as it
+import operator as op
+import typing as ty
+from pathlib import Path
 
 from Bio import SeqIO
 
+from rnacentral_pipeline import utils
+from rnacentral_pipeline.databases import data as dat
+
 from . import helpers
 
+group_index = op.itemgetter(0)
+
 
-def parse(handle):
+def entries(handle) -> ty.Iterator[dat.Entry]:
     """
-    Parse all entries in the handle to produce an iterable of all RefSeq
-    entries.
+    Produce an entry for each ncRNA feature of each record in the handle, in
+    the order they appear in the file.
     """
 
-    grouped = coll.defaultdict(coll.OrderedDict)
     for record in SeqIO.parse(handle, "genbank"):
         source = record.features[0]
         assert source.type == "source"
 
         for ncrna in helpers.ncrna_features(record.features[1:]):
-            entry = helpers.as_entry(record, source, ncrna)
-            if entry.accession in grouped[entry.optional_id]:
-                continue
-            grouped[entry.optional_id][entry.accession] = entry
-
-    for key, related in grouped.items():
-        if not key:
-            modified = related.values()
-        else:
-            modified = helpers.generate_related(related.values())
+            yield helpers.as_entry(record, source, ncrna)
+
+
+def grouped(
+    entries: ty.Iterable[dat.Entry],
+    run_size=utils.SORT_RUN_SIZE,
+    directory: ty.Optional[Path] = None,
+) -> ty.Iterator[ty.List[dat.Entry]]:
+    """
+    Group the entries by gene, the optional_id, using an external sort so
+    that only a run of entries, and one group, is held in memory. Groups are
+    produced in the order their gene is first seen and entries within a group
+    keep their order, with only the first entry of each accession kept.
+    """
+
+    genes: ty.Dict[ty.Optional[str], int] = {}
 
-        for entry in modified:
-            yield entry
+    def indexed():
+        for entry in entries:
+            index = genes.setdefault(entry.optional_id, len(genes))
+            yield (index, entry)
+
+    ordered = utils.external_sort(
+        indexed(),
+        key=group_index,
+        run_size=run_size,
+        directory=directory,
+    )
+    for _, group in it.groupby(ordered, group_index):
+        unique: ty.Dict[str, dat.Entry] = {}
+        for _, entry in group:
+            unique.setdefault(entry.accession, entry)
+        yield list(unique.values())
+
+
+def parse(handle, run_size=utils.SORT_RUN_SIZE, directory=None):
+    """
+    Parse all entries in the handle to produce an iterable of all RefSeq
+    entries. Entries from the same gene are marked as related to each other
+    and are produced as soon as their group is complete.
+    """
+
+    for related in grouped(entries(handle), run_size=run_size, directory=directory):
+        if not related[0].optional_id:
+            yield from related
+        else:
+            yield from helpers.generate_related(related)
@@ -40,11 +40,9 @@ def sequence_id(data: ty.Dict[str, str]) -> str:
     return f"{data['rfamseq_acc']}/{data['seq_start']}-{data['seq_end']}"
 
 
-def sequence(sequences, data: ty.Dict[str, str]) -> str:
+def sequence(sequences: ty.Mapping[str, str], data: ty.Dict[str, str]) -> str:
     seq_id = sequence_id(data)
-    # print((seq_id, data["sequence_type"]))
-    sequence = str(sequences[seq_id].seq)
-    return sequence.upper().replace("U", "T")
+    return sequences[seq_id].upper().replace("U", "T")
 
 
 def seq_version(data: ty.Dict[str, str]) -> str:
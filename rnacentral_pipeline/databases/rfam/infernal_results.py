@@ -187,22 +187,67 @@ def parse(raw, clan_competition=False):
         yield model(*parts)  # pylint: disable=star-args
 
 
-def as_csv(tblout, output):
+CLAN_INDEX = {a.name: i for (i, a) in enumerate(attr.fields(RfamClanHit))}
+
+KEPT_OVERLAPS = {"unique", "best"}
+
+
+def csv_rows(tblout, min_score=None, max_e_value=None):
+    """
+    Stream the rows, with the CSV_COLUMNS, for all unique and best hits in
+    the tblout file produced after clan competition. Unlike `parse` this only
+    splits the columns that are needed and only converts the values of hits
+    that are kept. Hits below min_score or above max_e_value, if given, are
+    skipped.
+    """
+
+    indexes = [CLAN_INDEX[c] for c in CSV_COLUMNS]
+    maxsplit = max(indexes) + 1
+    overlap_index = CLAN_INDEX["overlap"]
+    score_index = CLAN_INDEX["score"]
+    e_value_index = CLAN_INDEX["e_value"]
+    converters = {
+        "seq_from": as_0_based,
+        "seq_to": int,
+        "strand": convert_strand,
+        "mdl_from": as_0_based,
+        "mdl_to": int,
+        "overlap": convert_overlap,
+        "e_value": float,
+        "score": float,
+    }
+
+    for line in tblout:
+        if line.startswith("#"):
+            continue
+        parts = line.split(None, maxsplit)
+        if not parts:
+            continue
+        if convert_overlap(parts[overlap_index]) not in KEPT_OVERLAPS:
+            continue
+        if min_score is not None and float(parts[score_index]) < min_score:
+            continue
+        if max_e_value is not None and float(parts[e_value_index]) > max_e_value:
+            continue
+
+        row = []
+        for column, index in zip(CSV_COLUMNS, indexes):
+            convert = converters.get(column)
+            row.append(convert(parts[index]) if convert else parts[index])
+        yield row
+
+
+def as_csv(tblout, output, min_score=None, max_e_value=None):
     """
     This will parse the givn tblout filehandle and turn the data into a CSV
     file that can be loaded into the database.
     """
 
-    writer = csv.DictWriter(
+    writer = csv.writer(
         output,
-        CSV_COLUMNS,
-        extrasaction="ignore",
         delimiter=",",
         quotechar='"',
         quoting=csv.QUOTE_ALL,
         lineterminator="\n",
     )
-
-    for hit in parse(tblout, clan_competition=True):
-        if hit.overlap == "unique" or hit.overlap == "best":
-            writer.writerow(attr.asdict(hit))
+    writer.writerows(csv_rows(tblout, min_score=min_score, max_e_value=max_e_value))
@@ -19,20 +19,29 @@ import tempfile
 import typing as ty
 from pathlib import Path
 
-from Bio import SeqIO
-from Bio.SeqIO import SeqRecord
+from more_itertools import chunked
+
+from rnacentral_pipeline import utils
 
 from ..data import Entry
+from ..data.utils import trusted, validated
 from . import helpers
+from .sequence_index import SequenceIndex
 
 LOGGER = logging.getLogger(__name__)
 
+LOOKUP_SIZE = 5000
+
 
 def as_entry(
-    families: ty.Dict[str, ty.Dict[str, str]], sequences, data: ty.Dict[str, str]
+    families: ty.Dict[str, ty.Dict[str, str]],
+    sequences: ty.Mapping[str, str],
+    data: ty.Dict[str, str],
 ) -> ty.Optional[Entry]:
     """
-    Turn an entry from the JSON file into a Entry object for writing.
+    Turn an entry from the JSON file into a Entry object for writing. The
+    entry is built with `data.utils.trusted`, so it must be checked with
+    `data.utils.validate_all` before it is used.
     """
 
     family = families[data["rfam_acc"]]
@@ -42,7 +51,8 @@ def as_entry(
         LOGGER.warn("Could not load sequence for %s", helpers.sequence_id(data))
         return None
 
-    return Entry(
+    return trusted(
+        Entry,
         primary_id=helpers.primary_id(data),
         accession=helpers.accession(data),
         ncbi_tax_id=helpers.taxid(data),
@@ -74,39 +84,63 @@ def load_mapping(handle: ty.TextIO) -> ty.Dict[str, ty.Dict[str, str]]:
     return data
 
 
-def dedup_sequences(path: Path) -> ty.Iterator[SeqRecord]:
-    seen = set()
-    for record in SeqIO.parse(str(path), "fasta"):
-        if record.id in seen:
-            LOGGER.warn("Duplicate id seen %s", record.id)
-            continue
-        seen.add(record.id)
-        yield record
+def joined(
+    index: SequenceIndex,
+    sequence_info: ty.TextIO,
+    run_size=utils.SORT_RUN_SIZE,
+    batch_size=LOOKUP_SIZE,
+) -> ty.Iterator[ty.Tuple[ty.Dict[str, str], ty.Dict[str, str]]]:
+    """
+    Produce each row of the sequence info file along with the sequences of a
+    batch of rows, which includes the sequence of the row if it is indexed.
+    The rows are sorted by sequence id, with an external sort, so the index is
+    read in key order and only a run of rows is held in memory.
+    """
+
+    reader = csv.DictReader(sequence_info, delimiter="\t")
+    rows = utils.external_sort(reader, key=helpers.sequence_id, run_size=run_size)
+    for batch in chunked(rows, batch_size):
+        sequences = index.lookup([helpers.sequence_id(r) for r in batch])
+        for row in batch:
+            yield (row, sequences)
 
 
 def parse(
-    family_file: ty.TextIO, sequence_info: ty.TextIO, fasta: Path
+    family_file: ty.TextIO,
+    sequence_info: ty.TextIO,
+    fasta: Path,
+    index_path: ty.Optional[Path] = None,
+    run_size=utils.SORT_RUN_SIZE,
 ) -> ty.Iterable[Entry]:
     """
-    Parse the JSON file of Rfam data and produce a generator of all Entry
-    objects in the file.
+    Parse the Rfam family and sequence info files, along with the FASTA file
+    of all sequences, to produce a generator of all Entry objects. The
+    sequences are stored in an on disk index at index_path, which is reused if
+    it was already built from the same FASTA file. Without an index_path a
+    temporary index is used. Entries are validated in batches.
     """
 
-    with tempfile.NamedTemporaryFile() as temp:
-        SeqIO.write(dedup_sequences(fasta), temp.name, "fasta")
-        temp.flush()
-        indexed = SeqIO.index(temp.name, "fasta")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = index_path or Path(tmp) / "sequences.sqlite"
+        index = SequenceIndex.load(fasta, path)
         families = load_mapping(family_file)
-        reader = csv.DictReader(sequence_info, delimiter="\t")
         total = 0
         missing = 0
-        for row in reader:
-            total += 1
-            entry = as_entry(families, indexed, row)
-            if entry is None:
-                missing += 1
-                continue
-            yield entry
+
+        def entries():
+            nonlocal total, missing
+            for row, sequences in joined(index, sequence_info, run_size=run_size):
+                total += 1
+                entry = as_entry(families, sequences, row)
+                if entry is None:
+                    missing += 1
+                    continue
+                yield entry
+
+        try:
+            yield from validated(entries())
+        finally:
+            index.close()
 
     if missing:
         LOGGER.warn(
@@ -115,5 +149,5 @@ def parse(
             total,
             total - missing,
         )
-    if float(missing) / float(total) >= 0.5:
+    if total and float(missing) / float(total) >= 0.5:
         raise ValueError("Failed to find too many sequences")
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright [2009-2024] EMBL-European Bioinformatics Institute
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import logging
+import sqlite3
+import typing as ty
+from pathlib import Path
+
+import attr
+from attr.validators import instance_of as is_a
+from Bio.SeqIO.FastaIO import SimpleFastaParser
+from more_itertools import chunked
+
+LOGGER = logging.getLogger(__name__)
+
+INSERT_SIZE = 10000
+
+LOOKUP_SIZE = 500
+
+CREATE = """CREATE TABLE IF NOT EXISTS sequences (
+    sequence_id TEXT PRIMARY KEY,
+    sequence TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS info (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+INSERT = "INSERT OR IGNORE INTO sequences(sequence_id, sequence) VALUES (?, ?)"
+
+LOOKUP = "SELECT sequence_id, sequence FROM sequences WHERE sequence_id IN (%s)"
+
+SOURCE_QUERY = "SELECT value FROM info WHERE name = 'source'"
+
+SET_SOURCE = "INSERT OR REPLACE INTO info(name, value) VALUES ('source', ?)"
+
+
+def source_id(fasta: Path) -> str:
+    """
+    Identify the FASTA file an index was built from, so an index is only
+    reused for the file it was built from.
+    """
+
+    stat = fasta.stat()
+    return f"{fasta.name}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def fasta_sequences(fasta: Path) -> ty.Iterator[ty.Tuple[str, str]]:
+    with fasta.open("r") as handle:
+        for title, sequence in SimpleFastaParser(handle):
+            yield (title.split(None, 1)[0], sequence)
+
+
+@attr.s()
+class SequenceIndex:
+    """
+    An on disk index of the sequences in the Rfam FASTA file, keyed by the
+    sequence id. If a sequence id is repeated only the first sequence is kept.
+    The index records which file it was built from and is only marked as
+    complete once all sequences have been stored, so an existing index can be
+    reused for later imports of the same file.
+    """
+
+    path: Path = attr.ib(validator=is_a(Path))
+    conn: sqlite3.Connection = attr.ib(validator=is_a(sqlite3.Connection))
+
+    @classmethod
+    def build(cls, fasta: Path, path: Path, size=INSERT_SIZE) -> "SequenceIndex":
+        LOGGER.info("Building sequence index of %s in %s", fasta, path)
+        if path.exists():
+            path.unlink()
+        conn = sqlite3.connect(str(path))
+        conn.executescript(CREATE)
+
+        total = 0
+        stored = 0
+        for chunk in chunked(fasta_sequences(fasta), size):
+            cursor = conn.executemany(INSERT, chunk)
+            total += len(chunk)
+            stored += cursor.rowcount
+        if stored != total:
+            LOGGER.warn("Ignored %i duplicate sequence ids", total - stored)
+
+        conn.execute(SET_SOURCE, (source_id(fasta),))
+        conn.commit()
+        return cls(path=path, conn=conn)
+
+    @classmethod
+    def load(cls, fasta: Path, path: Path) -> "SequenceIndex":
+        """
+        Open the index of the FASTA file at path, building it if it does not
+        exist or was built from a different file.
+        """
+
+        if path.exists():
+            conn = sqlite3.connect(str(path))
+            try:
+                found = conn.execute(SOURCE_QUERY).fetchone()
+            except sqlite3.DatabaseError:
+                found = None
+            if found and found[0] == source_id(fasta):
+                LOGGER.info("Reusing sequence index %s", path)
+                return cls(path=path, conn=conn)
+            conn.close()
+        return cls.build(fasta, path)
+
+    def lookup(self, sequence_ids: ty.List[str]) -> ty.Dict[str, str]:
+        """
+        Get the sequences of all given ids, ids without a sequence are not
+        present in the result.
+        """
+
+        found = {}
+        for chunk in chunked(sequence_ids, LOOKUP_SIZE):
+            placeholders = ",".join("?" for _ in chunk)
+            cursor = self.conn.execute(LOOKUP % placeholders, chunk)
+            found.update(cursor.fetchall())
+        return found
+
+    def close(self):
+        self.conn.close()
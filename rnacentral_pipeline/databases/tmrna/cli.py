@@ -17,6 +17,7 @@ from pathlib import Path
 
 import click
 
+from rnacentral_pipeline.databases.helpers import gtdb
 from rnacentral_pipeline.databases.tmrna import parser
 from rnacentral_pipeline.writers import entry_writer
 
@@ -30,9 +31,37 @@ def cli():
 
 
 @cli.command("parse")
+@click.option(
+    "--taxonomy",
+    default=None,
+    type=click.Path(),
+    help="Name index built with `context index-names`",
+)
+@click.option(
+    "--lineage-cache",
+    default=None,
+    type=click.Path(),
+    help="File to store resolved lineages in between runs",
+)
+@click.option(
+    "--retry-unresolved",
+    is_flag=True,
+    default=False,
+    help="Try to resolve lineages the lineage cache has no taxid for again",
+)
 @click.argument("raw", type=click.File("r"))
 @click.argument("output", type=click.Path())
-def parse(raw, output):
-    entries = parser.parse(raw)
-    with entry_writer(Path(output)) as writer:
-        writer.write(entries)
+def parse(raw, output, taxonomy=None, lineage_cache=None, retry_unresolved=False):
+    resolver = gtdb.LineageResolver.build(
+        taxonomy=taxonomy,
+        cache=lineage_cache,
+        tablename="tmrna",
+        getters=list(gtdb.LINEAGE_GETTERS),
+        retry_unresolved=retry_unresolved,
+    )
+    try:
+        entries = parser.parse(raw, resolver=resolver)
+        with entry_writer(Path(output)) as writer:
+            writer.write(entries)
+    finally:
+        resolver.close()
@@ -78,15 +78,40 @@ def features(raw: ty.Dict[str, str]) -> ty.List[SequenceFeature]:
     return features
 
 
-def parse(raw: ty.IO) -> ty.Iterable[Entry]:
-    reader = csv.DictReader(raw, delimiter="\t")
-    rows = list(reader)
-    for row in rows:
+def rows(raw: ty.IO) -> ty.Iterator[ty.Dict[str, str]]:
+    return csv.DictReader(raw, delimiter="\t")
+
+
+def tax_string(row: ty.Dict[str, str]) -> str:
+    species = inferred_species(row["#ID"])
+    return ",".join([row["Taxonomy"], species])
+
+
+def default_resolver() -> gtdb.LineageResolver:
+    return gtdb.LineageResolver(table={}, getters=list(gtdb.LINEAGE_GETTERS))
+
+
+def parse(raw: ty.IO, resolver=None) -> ty.Iterable[Entry]:
+    """
+    Parse the tmRNA TSV file. This reads the file twice, first to find and
+    resolve all distinct lineages at once, using the given
+    `gtdb.LineageResolver`, and then to produce the entries. The handle must
+    be seekable.
+    """
+
+    resolver = resolver or default_resolver()
+    start = raw.tell()
+    taxids = resolver.resolve_all(tax_string(row) for row in rows(raw))
+    raw.seek(start)
+
+    for row in rows(raw):
         accessions = row["Instances"].split(",")
         assert len(accessions) == int(row["InstanceCt"])
         species = inferred_species(row["#ID"])
-        tax_string = ",".join([row["Taxonomy"], species])
-        tax_id = gtdb.phylogeny_to_taxid(tax_string)
+        lineage = tax_string(row)
+        tax_id = taxids[lineage]
+        if tax_id is None:
+            raise ValueError(f"Could not get taxid for `{lineage}`")
         for accession in accessions:
             accession_parts = accession.split("/")
             note = {
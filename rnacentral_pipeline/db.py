@@ -13,10 +13,14 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import typing as ty
+import uuid
 from contextlib import contextmanager
 
 import psycopg2
 
+ITERSIZE = 10000
+
 
 @contextmanager
 def connection(config, commit_on_leave=True):
@@ -61,6 +65,37 @@ def run_query(url, query, **kwargs):
             yield result
 
 
+@contextmanager
+def named_cursor(conn, name=None, itersize=ITERSIZE, **kwargs):
+    """
+    Create a named, server side, cursor on the given connection. Rows are
+    fetched from the server in batches of itersize as the cursor is iterated
+    instead of all at once, so memory use does not depend on the number of
+    rows the query produces. Any extra arguments are passed to conn.cursor,
+    for example cursor_factory.
+    """
+
+    name = name or f"stream_{uuid.uuid4().hex}"
+    cur = conn.cursor(name=name, **kwargs)
+    cur.itersize = itersize
+    try:
+        yield cur
+    finally:
+        cur.close()
+
+
+def stream(conn, query, params=None, **kwargs) -> ty.Iterator[ty.Any]:
+    """
+    Run the given query using a named cursor and yield each row. This is meant
+    for the large, full table, queries done when exporting data.
+    """
+
+    with named_cursor(conn, **kwargs) as cur:
+        cur.execute(str(query), params)
+        for result in cur:
+            yield result
+
+
 def get_db_connection(config, **options):
     """
     Open a database connection.
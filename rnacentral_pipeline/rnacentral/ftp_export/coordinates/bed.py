@@ -14,17 +14,24 @@ limitations under the License.
 """
 
 import csv
+import io
 import itertools as it
 import operator as op
+import re
 import typing as ty
 
 import attr
 from attr.validators import instance_of as is_a
 
 from rnacentral_pipeline.databases.data import regions
+from rnacentral_pipeline.databases.data.regions import CoordinateStart
 
 from . import data as coord
 
+DEFAULT_RGB = "63,125,151"
+
+NEEDS_QUOTING = re.compile('[\t"\r\n]')
+
 
 @attr.s(slots=True, frozen=True)
 class BedEntry:
@@ -96,11 +103,70 @@ def write_bed_text(entries, out, extended=True):
     writer.writerows(data)
 
 
+def bed_chromosome(chromosome: str) -> str:
+    if chromosome in ["MT", "chrMT"]:
+        return "chrM"
+    return "chr" + chromosome
+
+
+def format_line(coordinate: coord.Region, extended=True) -> str:
+    """
+    Format a region as a single BED12 line, without the trailing newline. This
+    produces the same text as writing the `BedEntry` for the region with
+    `write_bed_text`, but does not build the entry or a zero based copy of the
+    region.
+    """
+
+    region = coordinate.region
+    offset = 0
+    if region.coordinate_system.basis is CoordinateStart.one:
+        offset = 1
+
+    exons = region.exons
+    first = exons[0].start - offset
+    stop = exons[-1].stop
+    sizes = []
+    starts = []
+    for index, exon in enumerate(exons):
+        start = exon.start - offset
+        relative = start - first
+        assert index == 0 or relative > 0, "Invalid start for %s" % coordinate
+        sizes.append(str(exon.stop - start))
+        starts.append(str(relative))
+
+    fields = [
+        bed_chromosome(region.chromosome),
+        str(first),
+        str(stop),
+        coordinate.rna_id,
+        "0",
+        region.strand.display_string(),
+        str(first),
+        str(stop),
+        DEFAULT_RGB,
+        str(len(exons)),
+        ",".join(sizes),
+        ",".join(starts),
+    ]
+    if extended:
+        fields += [
+            ".",
+            coordinate.metadata["rna_type"],
+            ",".join(coordinate.metadata["databases"]),
+        ]
+
+    if any(NEEDS_QUOTING.search(f) for f in fields):
+        out = io.StringIO()
+        csv.writer(out, delimiter="\t", lineterminator="\n").writerow(fields)
+        return out.getvalue()[:-1]
+    return "\t".join(fields)
+
+
 def from_json(handle, out):
     """
     Transform raw coordinate data into bed format.
     """
 
-    data = coord.from_file(handle)
-    data = map(BedEntry.from_coordinate, data)
-    write_bed_text(data, out)
+    for coordinate in coord.from_file(handle):
+        out.write(format_line(coordinate))
+        out.write("\n")
@@ -13,6 +13,7 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import functools as ft
 import itertools as it
 import json
 import operator as op
@@ -24,15 +25,38 @@ from attr.validators import optional
 
 from rnacentral_pipeline.databases.data import Database, regions
 
+ONE_BASED = regions.CoordinateSystem.one_based()
+
+
+@ft.lru_cache()
+def pretty_database_name(db: str) -> str:
+    found = Database.lookup(db)
+    if not found:
+        raise ValueError(f"Failed to lookup database {db}")
+    return found.pretty()
+
 
 def lookup_databases(raw):
-    databases = []
-    for db in raw:
-        found = Database.lookup(db)
-        if not found:
-            raise ValueError(f"Failed to lookup database {db}")
-        databases.append(found.pretty())
-    return databases
+    return [pretty_database_name(db) for db in raw]
+
+
+def build_exons(raw) -> ty.Tuple[regions.Exon, ...]:
+    """
+    Build the sorted tuple of exons for a region. This does the same checks
+    as creating each `Exon` normally, but builds them without going through
+    the attrs validators.
+    """
+
+    exons = []
+    for exon in raw:
+        start = exon["exon_start"]
+        stop = exon["exon_stop"]
+        if not isinstance(start, int) or not isinstance(stop, int):
+            raise TypeError(f"Exon endpoints must be integers: {exon}")
+        if stop < start:
+            raise ValueError("stop (%i) must be >= start (%i)" % (stop, start))
+        exons.append(regions.Exon.trusted(start, stop))
+    return tuple(sorted(exons, key=op.attrgetter("start")))
 
 
 def clean_databases(raw):
@@ -58,16 +82,7 @@ class Region(object):
         if raw["identity"] is not None:
             identity = float(raw["identity"])
 
-        exons = []
-        for exon in raw["exons"]:
-            exons.append(
-                regions.Exon(
-                    start=exon["exon_start"],
-                    stop=exon["exon_stop"],
-                )
-            )
-
-        region_id = "{rna_id}.{index}".format(rna_id=raw["rna_id"], index=index)
+        region_id = f"{raw['rna_id']}.{index}"
 
         metadata = {
             "description": raw["description"],
@@ -81,12 +96,12 @@ class Region(object):
         return cls(
             region_id=region_id,
             rna_id=raw["rna_id"],
-            region=regions.SequenceRegion(
-                assembly_id=raw["assembly_id"],
-                chromosome=raw["chromosome"],
-                strand=raw["strand"],
-                exons=exons,
-                coordinate_system=regions.CoordinateSystem.one_based(),
+            region=regions.SequenceRegion.trusted(
+                assembly_id=str(raw["assembly_id"]),
+                chromosome=str(raw["chromosome"]),
+                strand=regions.Strand.build(raw["strand"]),
+                exons=build_exons(raw["exons"]),
+                coordinate_system=ONE_BASED,
             ),
             identity=identity,
             was_mapped=raw["was_mapped"],
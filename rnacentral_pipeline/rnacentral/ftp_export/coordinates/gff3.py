@@ -19,10 +19,63 @@ from collections import OrderedDict
 
 from gffutils import Feature
 
+from rnacentral_pipeline.databases.data.regions import CoordinateStart
+
 from . import data as coord
 
 LOGGER = logging.getLogger(__name__)
 
+Attributes = ty.Iterable[ty.Tuple[str, ty.List[str]]]
+
+ESCAPED = "\n\t\r%;=&," + "".join(chr(i) for i in range(32)) + chr(127)
+ESCAPE_TABLE = str.maketrans({c: "%{:02X}".format(ord(c)) for c in ESCAPED})
+
+
+def format_attributes(attributes: Attributes) -> str:
+    """
+    Format the given (key, values) pairs as the attributes column of a GFF3
+    file. This escapes values in the same way as gffutils does when writing a
+    GFF3 feature.
+    """
+
+    parts = []
+    for key, values in attributes:
+        value = ",".join(v.translate(ESCAPE_TABLE) for v in values)
+        if value:
+            parts.append(key + "=" + value)
+        else:
+            parts.append(key)
+    return ";".join(parts)
+
+
+def format_line(
+    seqid: str,
+    featuretype: str,
+    start: int,
+    end: int,
+    strand: str,
+    attributes: Attributes,
+    source="RNAcentral",
+) -> str:
+    """
+    Format a single GFF3 line. This produces the same text as calling `str`
+    on the equivalent gffutils `Feature`, without building one.
+    """
+
+    return "\t".join(
+        [
+            seqid,
+            source,
+            featuretype,
+            str(start),
+            str(end),
+            ".",
+            strand,
+            ".",
+            format_attributes(attributes),
+        ]
+    )
+
 
 def regions_as_features(regions: ty.Iterable[coord.Region]) -> ty.Iterable[Feature]:
     """
@@ -89,10 +142,88 @@ def regions_as_features(regions: ty.Iterable[coord.Region]) -> ty.Iterable[Featu
             )
 
 
+def region_as_lines(raw_region: coord.Region) -> ty.Iterable[str]:
+    """
+    Format a region as the GFF3 lines for the transcript and its exons. This
+    produces the same text as formatting the features from
+    `regions_as_features`, but does not build any intermediate objects.
+    """
+
+    region = raw_region.region
+    offset = 0
+    if region.coordinate_system.basis is CoordinateStart.zero:
+        offset = 1
+
+    metadata = raw_region.metadata
+    shared = format_attributes(
+        [
+            ("Name", [raw_region.rna_id]),
+            ("description", [metadata["description"]]),
+            ("type", [metadata["rna_type"]]),
+            ("databases", metadata["databases"]),
+        ]
+    )
+
+    region_id = raw_region.region_id
+    source = raw_region.source
+    providing = []
+    if source == "expert-database":
+        providing = [("providing_databases", metadata["providing_databases"])]
+
+    transcript = [("ID", [region_id]), ("source", [source])] + providing
+    if source == "alignment" and raw_region.identity:
+        transcript.append(("identity", ["%.2f" % raw_region.identity]))
+
+    prefix = region.chromosome + "\tRNAcentral\t"
+    suffix = "\t.\t" + region.strand.display_string() + "\t.\t" + shared + ";"
+    exons = region.exons
+    yield (
+        f"{prefix}transcript\t{exons[0].start + offset}\t{exons[-1].stop}"
+        f"{suffix}{format_attributes(transcript)}"
+    )
+
+    escaped_id = region_id.translate(ESCAPE_TABLE)
+    exon_suffix = ""
+    if providing:
+        exon_suffix = ";" + format_attributes(providing)
+    for index, exon in enumerate(exons):
+        yield (
+            f"{prefix}noncoding_exon\t{exon.start + offset}\t{exon.stop}{suffix}"
+            f"ID={escaped_id}:ncRNA_exon{index + 1};Parent={escaped_id}{exon_suffix}"
+        )
+
+
+def regions_as_lines(regions: ty.Iterable[coord.Region]) -> ty.Iterable[str]:
+    for region in regions:
+        yield from region_as_lines(region)
+
+
 def parse(iterable):
     return regions_as_features(coord.parse(iterable))
 
 
+def write_gff_lines(lines, output, allow_no_features=False, header=True) -> bool:
+    """
+    Write the given, already formatted, GFF3 lines to the output handle.
+    """
+
+    first_line = next(lines, None)
+    if first_line is None:
+        if not allow_no_features:
+            raise ValueError("No features written to GFF3 file")
+        LOGGER.warn("No features written to GFF3 file")
+        return False
+
+    if header:
+        output.write("##gff-version 3\n")
+    output.write(first_line)
+    output.write("\n")
+    for line in lines:
+        output.write(line)
+        output.write("\n")
+    return True
+
+
 def write_gff_text(features, output, allow_no_features=False, header=True) -> bool:
     first_feature = next(features, None)
     if first_feature is None:
@@ -118,5 +249,5 @@ def from_file(handle, output, allow_none=False):
     """
 
     parsed = coord.from_file(handle)
-    features = regions_as_features(parsed)
-    write_gff_text(features, output, allow_no_features=allow_none)
+    lines = regions_as_lines(parsed)
+    write_gff_lines(lines, output, allow_no_features=allow_none)
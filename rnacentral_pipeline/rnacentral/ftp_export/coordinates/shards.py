@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright [2009-2024] EMBL-European Bioinformatics Institute
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import csv
+import gzip
+import heapq
+import logging
+import multiprocessing as mp
+import tempfile
+import typing as ty
+from contextlib import closing
+from pathlib import Path
+
+import attr
+import psycopg2
+from attr.validators import instance_of as is_a
+from Bio import bgzf
+
+from rnacentral_pipeline import db
+from rnacentral_pipeline import utils
+
+from . import bed
+from . import data as coord
+from . import gff3
+
+LOGGER = logging.getLogger(__name__)
+
+QUERY_DIRECTORY = Path("files") / "ftp-export" / "genome_coordinates"
+
+SHARD_SIZE = 500000
+
+_CONNECTION = None
+
+
+@attr.s(frozen=True, slots=True)
+class Assembly:
+    assembly_id: str = attr.ib(validator=is_a(str))
+    species: str = attr.ib(validator=is_a(str))
+    taxid: int = attr.ib(validator=is_a(int), converter=int)
+
+    @classmethod
+    def from_file(cls, handle) -> ty.List["Assembly"]:
+        """
+        Read the CSV of assembly_id, species, taxid produced by the
+        known-coordinates query.
+        """
+        return [cls(*row) for row in csv.reader(handle) if row]
+
+    def filename(self, extension: str) -> str:
+        return f"{self.species}.{self.assembly_id}.{extension}"
+
+
+@attr.s(frozen=True, slots=True)
+class Shard:
+    """
+    A set of chromosomes from one assembly which are exported together. The
+    chromosomes are consecutive in the order used by the coordinate query and
+    offset is the number of regions in the assembly before the first of them.
+    This is needed to give each region the same id as exporting the complete
+    assembly at once.
+    """
+
+    assembly: Assembly = attr.ib(validator=is_a(Assembly))
+    chromosomes: ty.Tuple[str, ...] = attr.ib(validator=is_a(tuple))
+    offset: int = attr.ib(validator=is_a(int))
+    size: int = attr.ib(validator=is_a(int))
+
+
+@attr.s(frozen=True, slots=True)
+class ShardOutput:
+    shard: Shard = attr.ib(validator=is_a(Shard))
+    bed: Path = attr.ib(validator=is_a(Path))
+    gff3: Path = attr.ib(validator=is_a(Path))
+
+
+def plan(
+    assembly: Assembly,
+    counts: ty.Iterable[ty.Tuple[str, int]],
+    shard_size=SHARD_SIZE,
+) -> ty.List[Shard]:
+    """
+    Split an assembly into shards given the number of regions in each
+    chromosome. The counts must be in the same order as the coordinate query
+    sorts chromosomes. Chromosomes are never split, large ones become a single
+    shard and small ones are grouped until they reach the shard size.
+    """
+
+    shards = []
+    chromosomes: ty.List[str] = []
+    offset = 0
+    size = 0
+    for chromosome, count in counts:
+        chromosomes.append(chromosome)
+        size += count
+        if size >= shard_size:
+            shards.append(Shard(assembly, tuple(chromosomes), offset, size))
+            offset += size
+            chromosomes = []
+            size = 0
+
+    if chromosomes:
+        shards.append(Shard(assembly, tuple(chromosomes), offset, size))
+    return shards
+
+
+def chromosome_counts(conn, assembly: Assembly) -> ty.List[ty.Tuple[str, int]]:
+    query = (QUERY_DIRECTORY / "chromosomes.sql").read_text()
+    with conn.cursor() as cur:
+        cur.execute(query, {"assembly_id": assembly.assembly_id})
+        return [(chromosome, count) for (chromosome, count) in cur]
+
+
+def fetch(conn, shard: Shard) -> ty.Iterable[coord.Region]:
+    query = (QUERY_DIRECTORY / "shard-query.sql").read_text()
+    params = {
+        "assembly_id": shard.assembly.assembly_id,
+        "chromosomes": list(shard.chromosomes),
+    }
+    rows = (row[0] for row in db.stream(conn, query, params=params))
+    rows = (r for r in rows if r["rna_type"] != "NULL")
+    for index, raw in enumerate(rows):
+        yield coord.Region.build(shard.offset + index, raw)
+
+
+def bed_key(line: str) -> ty.Tuple[str, int]:
+    fields = line.split("\t", 2)
+    return (fields[0], int(fields[1]))
+
+
+def gff3_key(line: str) -> ty.Tuple[str, int]:
+    fields = line.split("\t", 4)
+    return (fields[0], int(fields[3]))
+
+
+def read_lines(path: Path) -> ty.Iterable[str]:
+    with path.open("r") as raw:
+        for line in raw:
+            yield line.rstrip("\n")
+
+
+def write_sorted(
+    lines: ty.Iterable[str],
+    key,
+    path: Path,
+    directory=None,
+    run_size=utils.SORT_RUN_SIZE,
+):
+    """
+    Write the lines sorted by the given key to the path. This uses an
+    external sort, spilling runs into the given directory, so only a run of
+    lines is held in memory.
+    """
+
+    lines = utils.external_sort(
+        lines,
+        key=key,
+        run_size=run_size,
+        directory=directory,
+    )
+    with path.open("w") as out:
+        for line in lines:
+            out.write(line)
+            out.write("\n")
+
+
+def _init_worker(db_url: str):
+    global _CONNECTION
+    _CONNECTION = psycopg2.connect(db_url)
+
+
+def export_shard(shard: Shard, directory: Path) -> ShardOutput:
+    """
+    Export a single shard, using the connection of this worker, into sorted
+    BED and GFF3 files in the given directory. The formatted lines are first
+    written unsorted to disk and then sorted with an external sort, so a
+    shard, which may be a complete chromosome, is never held in memory.
+    """
+
+    assert _CONNECTION, "Must initialize the connection before exporting"
+    name = f"{shard.assembly.assembly_id}-{shard.offset}"
+    result = ShardOutput(
+        shard=shard,
+        bed=directory / f"{name}.bed",
+        gff3=directory / f"{name}.gff3",
+    )
+
+    unsorted_bed = directory / f"{name}.unsorted.bed"
+    unsorted_gff3 = directory / f"{name}.unsorted.gff3"
+    with unsorted_bed.open("w") as bed_out, unsorted_gff3.open("w") as gff3_out:
+        with _CONNECTION:
+            for region in fetch(_CONNECTION, shard):
+                bed_out.write(bed.format_line(region))
+                bed_out.write("\n")
+                for line in gff3.region_as_lines(region):
+                    gff3_out.write(line)
+                    gff3_out.write("\n")
+
+    write_sorted(read_lines(unsorted_bed), bed_key, result.bed, directory)
+    unsorted_bed.unlink()
+    write_sorted(read_lines(unsorted_gff3), gff3_key, result.gff3, directory)
+    unsorted_gff3.unlink()
+    return result
+
+
+def _export(args: ty.Tuple[Shard, Path]) -> ShardOutput:
+    return export_shard(*args)
+
+
+def merged_lines(paths: ty.List[Path], key) -> ty.Iterable[str]:
+    """
+    Merge the lines of the given sorted files, keeping the ordering given by
+    the key. The lines keep their trailing newline.
+    """
+
+    handles = [path.open("r") for path in paths]
+    try:
+        yield from heapq.merge(*handles, key=lambda l: key(l.rstrip("\n")))
+    finally:
+        for handle in handles:
+            handle.close()
+
+
+def merge_files(paths: ty.List[Path], key, out: ty.IO):
+    """
+    Merge the given sorted files into the output handle, keeping the
+    ordering given by the key.
+    """
+
+    for line in merged_lines(paths, key):
+        out.write(line)
+
+
+def merge(assembly: Assembly, outputs: ty.List[ShardOutput], output: Path):
+    """
+    Merge the exported shards of an assembly into the published files. These
+    are the gzipped BED file in bed/, the gzipped GFF3 file in gff3/ and the
+    bgzipped GFF3 file for IGV, which uses exon in place of noncoding_exon,
+    in igv/. All files are sorted by chromosome and start, the same as the
+    sorting done after formatting a complete assembly.
+    """
+
+    for name in ["bed", "gff3", "igv"]:
+        (output / name).mkdir(parents=True, exist_ok=True)
+
+    bed_path = output / "bed" / assembly.filename("bed.gz")
+    with gzip.open(bed_path, "wt", encoding="utf-8") as out:
+        merge_files([o.bed for o in outputs], bed_key, out)
+
+    gff3_path = output / "gff3" / assembly.filename("gff3.gz")
+    igv_path = output / "igv" / assembly.filename("rnacentral.gff3.gz")
+    with gzip.open(gff3_path, "wt", encoding="utf-8") as out, bgzf.BgzfWriter(
+        str(igv_path), "wb"
+    ) as igv:
+        out.write("##gff-version 3\n")
+        igv.write(b"##gff-version 3\n")
+        for line in merged_lines([o.gff3 for o in outputs], gff3_key):
+            out.write(line)
+            igv.write(line.replace("noncoding_exon", "exon").encode("utf-8"))
+
+
+def export(
+    db_url: str,
+    assemblies: ty.List[Assembly],
+    output: Path,
+    workers: int = 4,
+    shard_size: int = SHARD_SIZE,
+):
+    """
+    Export the BED and GFF3 files for all given assemblies. Each assembly is
+    split into shards which are exported concurrently, with each worker using
+    a single database connection, so that at most `workers` connections are
+    used. The largest shards are started first and each assembly is merged
+    once all of its shards are done. Assemblies without any regions produce
+    no files.
+    """
+
+    shards: ty.List[Shard] = []
+    with closing(psycopg2.connect(db_url)) as conn:
+        for assembly in assemblies:
+            found = plan(assembly, chromosome_counts(conn, assembly), shard_size)
+            if not found:
+                LOGGER.warn("No coordinates found for %s", assembly.assembly_id)
+            shards.extend(found)
+    shards.sort(key=lambda s: s.size, reverse=True)
+
+    remaining = {a: 0 for a in assemblies}
+    for shard in shards:
+        remaining[shard.assembly] += 1
+
+    with tempfile.TemporaryDirectory(dir=output) as tmp:
+        jobs = [(shard, Path(tmp)) for shard in shards]
+        outputs: ty.Dict[Assembly, ty.List[ShardOutput]] = {}
+
+        def completed(result: ShardOutput):
+            assembly = result.shard.assembly
+            outputs.setdefault(assembly, []).append(result)
+            remaining[assembly] -= 1
+            if not remaining[assembly]:
+                LOGGER.info("Merging shards of %s", assembly.assembly_id)
+                merge(assembly, outputs.pop(assembly), output)
+
+        if workers == 1:
+            _init_worker(db_url)
+            try:
+                for result in map(_export, jobs):
+                    completed(result)
+            finally:
+                _CONNECTION.close()
+        else:
+            with mp.Pool(workers, initializer=_init_worker, initargs=(db_url,)) as pool:
+                for result in pool.imap_unordered(_export, jobs):
+                    completed(result)
@@ -14,12 +14,19 @@ limitations under the License.
 """
 
 import re
-import itertools as it
-
-from Bio import SeqIO
+import typing as ty
+from pathlib import Path
 
 NHMMER_PATTERN = re.compile("^[ABCDGHKMNRSTVWXYU]+$", re.IGNORECASE)
 
+NHMMER_ALPHABET = b"ABCDGHKMNRSTVWXYUabcdghkmnrstvwxyu"
+
+INTERNAL_WHITESPACE = b" \r"
+
+LINE_WIDTH = 60
+
+FastaRecord = ty.Tuple[bytes, bytes]
+
 
 def is_valid_nhmmer_record(record):
     """
@@ -28,13 +35,123 @@ def is_valid_nhmmer_record(record):
     return bool(NHMMER_PATTERN.match(str(record.seq)))
 
 
+def is_valid_nhmmer_sequence(sequence: bytes) -> bool:
+    """
+    The same check as `is_valid_nhmmer_record` but done on the raw bytes of
+    the sequence. Deleting all allowed bytes leaves nothing for a valid
+    sequence.
+    """
+    return bool(sequence) and not sequence.translate(None, NHMMER_ALPHABET)
+
+
+def records(handle: ty.BinaryIO) -> ty.Iterable[FastaRecord]:
+    """
+    Parse a FASTA file into (title, sequence) pairs of bytes, in the same way
+    as Biopython does, but without building a SeqRecord for each entry. Like
+    Biopython, trailing whitespace and internal spaces are removed from each
+    line, but any other whitespace, such as a tab, is kept in the sequence
+    and so makes the record invalid for nhmmer.
+    """
+
+    title = None
+    lines: ty.List[bytes] = []
+    for line in handle:
+        if line.startswith(b">"):
+            if title is not None:
+                yield (title, b"".join(lines).translate(None, INTERNAL_WHITESPACE))
+            title = line[1:].rstrip()
+            lines = []
+        elif title is None:
+            raise ValueError("FASTA file must start with a '>' title line")
+        else:
+            lines.append(line.rstrip())
+
+    if title is not None:
+        yield (title, b"".join(lines).translate(None, INTERNAL_WHITESPACE))
+
+
+def format_record(title: bytes, sequence: bytes) -> bytes:
+    """
+    Format a record the same way as writing it with SeqIO.
+    """
+
+    parts = [b">", title, b"\n"]
+    for start in range(0, len(sequence), LINE_WIDTH):
+        parts.append(sequence[start : start + LINE_WIDTH])
+        parts.append(b"\n")
+    return b"".join(parts)
+
+
+class ShardedOutput:
+    """
+    Write FASTA records into a series of numbered files in a directory,
+    starting a new file once the current one would grow past the maximum
+    size. A single record is never split between files.
+    """
+
+    def __init__(self, directory: Path, max_size: int, prefix="chunk"):
+        self.directory = directory
+        self.max_size = max_size
+        self.prefix = prefix
+        self.index = 0
+        self.size = 0
+        self.handle = None
+
+    def write(self, data: bytes):
+        if self.handle is None or (self.size and self.size + len(data) > self.max_size):
+            self.close()
+            self.index += 1
+            path = self.directory / f"{self.prefix}-{self.index}.fasta"
+            self.handle = path.open("wb")
+            self.size = 0
+        self.handle.write(data)
+        self.size += len(data)
+
+    def close(self):
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def split_nhmmer(
+    handle: ty.BinaryIO,
+    valid: ty.Optional[ty.BinaryIO],
+    invalid: ty.Optional[ty.BinaryIO],
+):
+    """
+    Write all records which are valid for nhmmer to valid and all others to
+    invalid, in a single pass over the file. Either output may be None to
+    skip writing those records.
+    """
+
+    for title, sequence in records(handle):
+        if is_valid_nhmmer_sequence(sequence):
+            output = valid
+        else:
+            output = invalid
+        if output is not None:
+            output.write(format_record(title, sequence))
+
+
 def valid_nhmmer(handle, output):
-    sequences = SeqIO.parse(handle, "fasta")
-    accepted = filter(is_valid_nhmmer_record, sequences)
-    SeqIO.write(accepted, output, "fasta")
+    split_nhmmer(handle, output, None)
 
 
 def invalid_nhmmer(handle, output):
-    sequences = SeqIO.parse(handle, "fasta")
-    rejected = it.filterfalse(is_valid_nhmmer_record, sequences)
-    SeqIO.write(rejected, output, "fasta")
+    split_nhmmer(handle, None, output)
+
+
+def shard_nhmmer(handle, directory: Path, max_size: int, invalid=None):
+    """
+    Write the valid nhmmer records into files of at most max_size bytes in
+    the given directory.
+    """
+
+    with ShardedOutput(directory, max_size) as output:
+        split_nhmmer(handle, output, invalid)
@@ -13,7 +13,6 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-import collections as coll
 import typing as ty
 
 import psycopg2
@@ -24,6 +23,10 @@ from attr.validators import optional
 from pypika import CustomFunction, Query, Table
 from pypika import functions as fn
 
+from rnacentral_pipeline import db
+
+Formatter = ty.Callable[["GpiEntry"], ty.List[str]]
+
 
 @define
 class GpiEntry:
@@ -143,60 +146,92 @@ def mirbase_info_query() -> Query:
     )
 
 
-def get_generic(
-    conn, mirbase_info, generic_query=generic_query(), **kwargs
-) -> ty.Iterable[GpiEntry]:
-    with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
-        cur.execute(str(generic_query))
-        for result in cur:
-            precursors = set()
-            aliases = []
-            symbol = None
-            if info := mirbase_info.get(result["id"], None):
-                precursors = info["precursors"]
-                aliases = sorted(info["symbol"])
-                symbol = aliases.pop(0)
-            assert result["taxid"]
-            yield GpiEntry(
-                urs_taxid=result["id"],
-                description=result["description"],
-                rna_type=result["rna_type"],
-                symbol=symbol,
-                precursors=precursors,
-                aliases=aliases,
-            )
-
-
-def get_mirbase_info(
-    conn, mirbase_query: Query = mirbase_info_query(), **kwargs
-) -> ty.Dict[str, ty.List[str]]:
-    data = coll.defaultdict(lambda: coll.defaultdict(set))
-    with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
-        cur.execute(str(mirbase_query))
-        for result in cur:
-            urs_id = result["source_urs_taxid"]
-            data[urs_id]["precursors"].add(result["target_urs_taxid"])
-            data[urs_id]["symbol"].add(result["symbol"])
-    return dict(data)
-
-
-def write(results: ty.Iterable[GpiEntry], out: ty.IO):
+def combined_query(
+    generic_query: Query = generic_query(),
+    mirbase_query: Query = mirbase_info_query(),
+) -> Query:
+    """
+    Build a query which joins the miRBase information onto the generic query,
+    so that each row contains all data needed for a single entry.
+    """
+
+    pre = Table("rnc_rna_precomputed")
+    array_agg = CustomFunction("ARRAY_AGG", ["value"])
+    mirbase = mirbase_query.as_("mirbase")
+    info = (
+        Query.from_(mirbase)
+        .select(
+            mirbase.source_urs_taxid,
+            array_agg(mirbase.target_urs_taxid).as_("precursors"),
+            array_agg(mirbase.symbol).as_("symbols"),
+        )
+        .groupby(mirbase.source_urs_taxid)
+        .as_("mirbase_info")
+    )
+    return (
+        generic_query.left_join(info)
+        .on(info.source_urs_taxid == pre.id)
+        .select(info.precursors, info.symbols)
+    )
+
+
+def as_entry(result, precursors: ty.Set[str], symbols: ty.Set[str]) -> GpiEntry:
+    symbol = None
+    aliases = []
+    if symbols:
+        aliases = sorted(symbols)
+        symbol = aliases.pop(0)
+    assert result["taxid"]
+    return GpiEntry(
+        urs_taxid=result["id"],
+        description=result["description"],
+        rna_type=result["rna_type"],
+        symbol=symbol,
+        precursors=precursors,
+        aliases=aliases,
+    )
+
+
+def write(
+    results: ty.Iterable[GpiEntry],
+    out: ty.IO,
+    formatter: Formatter = GpiEntry.writeable,
+):
     out.write("!gpi-version: 1.2\n")
     for result in results:
-        out.write("\t".join(result.writeable()))
+        out.write("\t".join(formatter(result)))
         out.write("\n")
 
 
-def load(conn, **kwargs) -> ty.Iterable[GpiEntry]:
-    precusors = get_mirbase_info(conn, **kwargs)
-    return get_generic(conn, precusors, **kwargs)
+def load(
+    conn,
+    generic_query: Query = generic_query(),
+    mirbase_query: Query = mirbase_info_query(),
+    itersize: int = db.ITERSIZE,
+    **kwargs,
+) -> ty.Iterable[GpiEntry]:
+    """
+    Load all entries using a single named cursor. The miRBase information is
+    joined in the database, so nothing is kept in memory beyond a single batch
+    of rows.
+    """
+
+    query = combined_query(generic_query=generic_query, mirbase_query=mirbase_query)
+    cursor_factory = psycopg2.extras.DictCursor
+    results = db.stream(conn, query, cursor_factory=cursor_factory, itersize=itersize)
+    for result in results:
+        precursors = set(result["precursors"] or [])
+        symbols = set(result["symbols"] or [])
+        yield as_entry(result, precursors, symbols)
 
 
-def export(db_url: str, output: ty.IO, **kwargs):
+def export(
+    db_url: str, output: ty.IO, formatter: Formatter = GpiEntry.writeable, **kwargs
+):
     """
     Create a GPI file of for all active RNAcentral sequences. This will
     generate a file formatted for version 1.2.
     """
     with psycopg2.connect(db_url) as conn:
-        results = load(conn)
-        write(results, output)
+        results = load(conn, **kwargs)
+        write(results, output, formatter=formatter)
@@ -27,13 +27,21 @@ from rnacentral_pipeline.rnacentral.genes.data import Methods
 LOGGER = logging.getLogger(__name__)
 
 
-def load(context: data.Context, handle: ty.IO) -> ty.Iterable[data.LocationInfo]:
-    for entry in psql.json_handler(handle):
-        location = data.LocationInfo.build(context, entry)
-        yield location
+def load(context: data.Context, handle: ty.IO) -> ty.Iterable[data.LocationBatch]:
+    """
+    Load all locations into one `LocationBatch` per chromosome and strand. This
+    requires the locations to be sorted by chromosome and strand.
+    """
 
+    entries = psql.json_handler(handle)
+    for (chromosome, strand), rows in it.groupby(
+        entries, lambda e: (e["chromosome"], e["strand"])
+    ):
+        key = data.ClusteringKey(chromosome=chromosome, strand=strand)
+        yield data.LocationBatch.build(context, key, rows)
 
-def always_bad_location(location: data.LocationInfo) -> bool:
+
+def always_bad_location(location: data.BatchLocation) -> bool:
     if location.qa.has_issue:
         if location.extent.chromosome == "MT":
             state = location.qa.as_tuple()
@@ -47,12 +55,12 @@ def always_bad_location(location: data.LocationInfo) -> bool:
     return False
 
 
-def always_ignorable_location(location: data.LocationInfo) -> bool:
+def always_ignorable_location(location: data.BatchLocation) -> bool:
     return False
 
 
 def has_compatible_rna_types(
-    location: data.LocationInfo, cluster: data.Cluster
+    location: data.BatchLocation, cluster: data.Cluster
 ) -> bool:
     rna_types = cluster.rna_types()
     if not rna_types:
@@ -65,7 +73,7 @@ def has_compatible_rna_types(
 
 
 def select_mergable(
-    location: data.LocationInfo, clusters: ty.List[data.Cluster]
+    location: data.BatchLocation, clusters: ty.List[data.Cluster]
 ) -> ty.Optional[ty.List[data.Cluster]]:
     to_merge = []
     target = location.as_interval()
@@ -95,7 +103,7 @@ def handle_rfam_only(state: data.State, cluster: int):
             state.reject_location(location)
 
 
-def overlaps_pseudogene(context: data.Context, location: data.LocationInfo) -> bool:
+def overlaps_pseudogene(context: data.Context, location: data.BatchLocation) -> bool:
     LOGGER.debug("Checking %s for overlaps to pseudogenes", location.id)
     overlaps = context.overlaps_pseudogene(location)
     if overlaps:
@@ -116,15 +124,15 @@ def is_pirna_singleton(state: data.State, cluster: int) -> bool:
 
 
 def build(
-    context: data.Context, method: Methods, locations: ty.Iterable[data.LocationInfo]
+    context: data.Context, method: Methods, batches: ty.Iterable[data.LocationBatch]
 ) -> ty.Iterable[data.FinalizedState]:
     handler = method.handler()
-    for (key, locations) in it.groupby(locations, data.ClusteringKey.from_location):
+    for batch in batches:
+        key = batch.key
         LOGGER.debug("Building clusters for %s", key)
-        state = data.State(key=key, method=method.name)
-        for location in locations:
+        state = data.State(batch=batch, method=method.name)
+        for location in batch.locations():
             LOGGER.debug("Testing %s", location.id)
-            state.add_location(location)
             LOGGER.debug(
                 "Lengths, locations: %i, tree: %i, clusters: %i", *state.lengths()
             )
@@ -163,5 +171,5 @@ def build(
 def from_json(
     context: data.Context, method: Methods, handle: ty.IO
 ) -> ty.Iterable[data.FinalizedState]:
-    locations = load(context, handle)
-    return build(context, method, locations)
+    batches = load(context, handle)
+    return build(context, method, batches)
@@ -39,15 +39,15 @@ def ordered_choice_highlight(
         if not locations:
             continue
         for location in locations:
-            state.highlight_location(location.id)
+            state.highlight_location(location)
         return
 
 
-def is_mature(location: data.LocationInfo) -> bool:
+def is_mature(location: data.BatchLocation) -> bool:
     return location.rna_type.is_a("SO:0001244")
 
 
-def is_precursor(location: data.LocationInfo) -> bool:
+def is_precursor(location: data.BatchLocation) -> bool:
     return location.rna_type.is_a("SO:0000276")
 
 
@@ -25,13 +25,13 @@ REP_DBS = {
 }
 
 
-def should_reject(location: data.LocationInfo) -> bool:
+def should_reject(location: data.BatchLocation) -> bool:
     if any(d in REP_DBS for d in location.databases):
         return False
     return location.qa.has_issue
 
 
-def should_highlight(location: data.LocationInfo) -> bool:
+def should_highlight(location: data.BatchLocation) -> bool:
     qa = location.qa
     if any(d in REP_DBS for d in location.databases):
         return True
@@ -43,4 +43,4 @@ def should_highlight(location: data.LocationInfo) -> bool:
 def classify_cluster(state: data.State, cluster: int):
     for location in state.members_of(cluster):
         if should_highlight(location):
-            state.highlight_location(location.id)
+            state.highlight_location(location)
@@ -16,6 +16,7 @@ limitations under the License.
 from .rna_type import *
 from .extent import *
 from .location import *
+from .batch import *
 from .cluster import *
 from .state import *
 from .context import *
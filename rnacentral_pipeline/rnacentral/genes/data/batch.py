@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright [2009-2024] EMBL-European Bioinformatics Institute
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from __future__ import annotations
+
+import typing as ty
+from array import array
+from collections import abc
+
+import attr
+from attr.validators import instance_of as is_a
+from intervaltree import Interval
+
+from rnacentral_pipeline.databases.data.databases import Database
+from rnacentral_pipeline.databases.data.regions import Exon
+from rnacentral_pipeline.databases.data.utils import trusted
+
+from .extent import Extent
+from .location import Count, LocationInfo, QaInfo, is_rfam_only
+from .rna_type import RnaType
+
+DatabaseInfo = ty.Tuple[ty.Tuple[Database, ...], ty.Tuple[Database, ...]]
+
+
+def database_info(
+    names: ty.Tuple[ty.Tuple[str, ...], ty.Tuple[str, ...]],
+) -> DatabaseInfo:
+    providing, databases = names
+    return (
+        tuple(Database.build(d) for d in providing),
+        tuple(Database.build(d) for d in databases),
+    )
+
+
+@attr.s()
+class ClusteringKey:
+    chromosome = attr.ib(validator=is_a(str))
+    strand = attr.ib(validator=is_a(int))
+
+    @classmethod
+    def from_location(cls, location: LocationInfo) -> ClusteringKey:
+        return cls(chromosome=location.extent.chromosome, strand=location.extent.strand)
+
+
+@attr.s(slots=True)
+class Codes:
+    """
+    This assigns a small integer code to each distinct value it is given, so
+    a column can store the code instead of a reference to the value.
+    """
+
+    values: ty.List[ty.Any] = attr.ib(validator=is_a(list), factory=list)
+    _codes: ty.Dict[ty.Any, int] = attr.ib(validator=is_a(dict), factory=dict)
+
+    def code(self, key, build: ty.Callable[[], ty.Any]) -> int:
+        if key not in self._codes:
+            self._codes[key] = len(self.values)
+            self.values.append(build())
+        return self._codes[key]
+
+
+@attr.s(slots=True)
+class LocationBatch:
+    """
+    All locations of a single chromosome and strand, stored as columns. Each
+    location is a row and the numeric data (ids, starts, stops, exons and the
+    codes of the RNA type, QA and database values) are kept in arrays, while
+    the distinct RnaType, QaInfo and database values are stored once per
+    batch. Rows are checked as they are added, so the rich `LocationInfo` of
+    a row can be built later without validation, and only for the rows that
+    are written.
+    """
+
+    key: ClusteringKey = attr.ib(validator=is_a(ClusteringKey))
+    assembly: str = attr.ib(validator=is_a(str))
+    taxid: int = attr.ib(validator=is_a(int))
+    ids: array = attr.ib(validator=is_a(array), factory=lambda: array("q"))
+    starts: array = attr.ib(validator=is_a(array), factory=lambda: array("q"))
+    stops: array = attr.ib(validator=is_a(array), factory=lambda: array("q"))
+    type_codes: array = attr.ib(validator=is_a(array), factory=lambda: array("I"))
+    qa_codes: array = attr.ib(validator=is_a(array), factory=lambda: array("I"))
+    database_codes: array = attr.ib(validator=is_a(array), factory=lambda: array("I"))
+    exon_offsets: array = attr.ib(
+        validator=is_a(array), factory=lambda: array("q", [0])
+    )
+    exon_starts: array = attr.ib(validator=is_a(array), factory=lambda: array("q"))
+    exon_stops: array = attr.ib(validator=is_a(array), factory=lambda: array("q"))
+    urs_taxids: ty.List[str] = attr.ib(validator=is_a(list), factory=list)
+    region_names: ty.List[str] = attr.ib(validator=is_a(list), factory=list)
+    counts: ty.List[Count] = attr.ib(validator=is_a(list), factory=list)
+    rna_types: Codes = attr.ib(validator=is_a(Codes), factory=Codes)
+    qas: Codes = attr.ib(validator=is_a(Codes), factory=Codes)
+    databases: Codes = attr.ib(validator=is_a(Codes), factory=Codes)
+
+    @classmethod
+    def build(
+        cls, context, key: ClusteringKey, rows: ty.Iterable[ty.Dict[str, ty.Any]]
+    ) -> LocationBatch:
+        batch = None
+        for raw in rows:
+            if batch is None:
+                batch = cls(key=key, assembly=raw["assembly_id"], taxid=raw["taxid"])
+            batch.add(context, raw)
+        if batch is None:
+            raise ValueError(f"Cannot build an empty batch for {key}")
+        if len(set(batch.ids)) != len(batch.ids):
+            raise ValueError(f"Duplicate location ids in {key}")
+        return batch
+
+    def add(self, context, raw: ty.Dict[str, ty.Any]):
+        """
+        Check and add a single location, in the format produced by the genes
+        query, to this batch.
+        """
+
+        region_id = raw["region_id"]
+        if raw["chromosome"] != self.key.chromosome or raw["strand"] != self.key.strand:
+            raise ValueError(f"Location {region_id} is not part of {self.key}")
+        if raw["assembly_id"] != self.assembly or raw["taxid"] != self.taxid:
+            raise ValueError(f"Location {region_id} is not from {self.assembly}")
+        if not isinstance(raw["urs_taxid"], str):
+            raise TypeError(f"Invalid urs_taxid for {region_id}")
+        if not isinstance(raw["region_name"], str):
+            raise TypeError(f"Invalid region_name for {region_id}")
+        assert raw["region_start"] < raw["region_stop"]
+
+        exons = sorted((e["exon_start"], e["exon_stop"]) for e in raw["exons"])
+        for start, stop in exons:
+            if stop < start:
+                raise ValueError("stop (%i) must be >= start (%i)" % (stop, start))
+
+        insdc = raw["insdc_rna_type"]
+        so_term = raw["so_rna_type"]
+        type_code = self.rna_types.code(
+            (insdc, so_term),
+            lambda: context.rna_type(insdc, so_term),
+        )
+
+        qa = raw["qa"][0]
+        qa_code = self.qas.code(
+            (
+                qa["has_issue"],
+                qa["incomplete_sequence"],
+                qa["possible_contamination"],
+                qa["missing_rfam_match"],
+            ),
+            lambda: QaInfo.build(qa),
+        )
+
+        names = (tuple(raw["providing_databases"]), tuple(raw["databases"]))
+        database_code = self.databases.code(names, lambda: database_info(names))
+
+        counts = context.count_for(raw["urs_taxid"])
+
+        self.ids.append(region_id)
+        self.starts.append(raw["region_start"])
+        self.stops.append(raw["region_stop"])
+        self.type_codes.append(type_code)
+        self.qa_codes.append(qa_code)
+        self.database_codes.append(database_code)
+        for start, stop in exons:
+            self.exon_starts.append(start)
+            self.exon_stops.append(stop)
+        self.exon_offsets.append(len(self.exon_starts))
+        self.urs_taxids.append(raw["urs_taxid"])
+        self.region_names.append(raw["region_name"])
+        self.counts.append(counts)
+
+    def extent(self, start: int, stop: int) -> Extent:
+        return trusted(
+            Extent,
+            assembly=self.assembly,
+            taxid=self.taxid,
+            chromosome=self.key.chromosome,
+            strand=self.key.strand,
+            start=start,
+            stop=stop,
+        )
+
+    def exons(self, row: int) -> ty.Tuple[Exon, ...]:
+        first = self.exon_offsets[row]
+        last = self.exon_offsets[row + 1]
+        return tuple(
+            Exon.trusted(self.exon_starts[i], self.exon_stops[i])
+            for i in range(first, last)
+        )
+
+    def rna_type(self, row: int) -> RnaType:
+        return self.rna_types.values[self.type_codes[row]]
+
+    def location(self, row: int) -> LocationInfo:
+        """
+        Build the `LocationInfo` of the given row. The row was checked when it
+        was added, so this does not rerun any validation.
+        """
+
+        providing, databases = self.databases.values[self.database_codes[row]]
+        return trusted(
+            LocationInfo,
+            id=self.ids[row],
+            urs_taxid=self.urs_taxids[row],
+            extent=self.extent(self.starts[row], self.stops[row]),
+            exons=self.exons(row),
+            region_name=self.region_names[row],
+            rna_type=self.rna_type(row),
+            qa=self.qas.values[self.qa_codes[row]],
+            providing_databases=providing,
+            databases=databases,
+            counts=self.counts[row],
+        )
+
+    def locations(self) -> ty.Iterable[BatchLocation]:
+        for row in range(len(self)):
+            yield BatchLocation(self, row)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+@attr.s(frozen=True, slots=True)
+class BatchLocation:
+    """
+    A light weight view of a single row in a `LocationBatch`. This provides
+    the parts of `LocationInfo` which are needed to cluster locations, and
+    reads them from the columns of the batch, so clustering never has to
+    build the rich objects.
+    """
+
+    batch: LocationBatch = attr.ib(validator=is_a(LocationBatch), repr=False)
+    row: int = attr.ib(validator=is_a(int))
+
+    @property
+    def id(self) -> int:
+        return self.batch.ids[self.row]
+
+    @property
+    def start(self) -> int:
+        return self.batch.starts[self.row]
+
+    @property
+    def stop(self) -> int:
+        return self.batch.stops[self.row]
+
+    @property
+    def extent(self) -> Extent:
+        return self.batch.extent(self.start, self.stop)
+
+    @property
+    def rna_type(self) -> RnaType:
+        return self.batch.rna_type(self.row)
+
+    @property
+    def qa(self) -> QaInfo:
+        return self.batch.qas.values[self.batch.qa_codes[self.row]]
+
+    @property
+    def providing_databases(self) -> ty.Tuple[Database, ...]:
+        return self.batch.databases.values[self.batch.database_codes[self.row]][0]
+
+    @property
+    def databases(self) -> ty.Tuple[Database, ...]:
+        return self.batch.databases.values[self.batch.database_codes[self.row]][1]
+
+    @property
+    def counts(self) -> Count:
+        return self.batch.counts[self.row]
+
+    def has_introns(self) -> bool:
+        offsets = self.batch.exon_offsets
+        return offsets[self.row + 1] - offsets[self.row] > 1
+
+    def is_rfam_only(self) -> bool:
+        return is_rfam_only(self.databases)
+
+    def as_interval(self) -> Interval:
+        return Interval(self.start, self.stop, self.id)
+
+    def location(self) -> LocationInfo:
+        return self.batch.location(self.row)
+
+
+@attr.s(frozen=True, slots=True)
+class LazySequence(abc.Sequence):
+    """
+    A sequence which builds each of its values, from the given items, only
+    when it is accessed. This lets the results of a batch be written without
+    building all rich objects of the batch at once.
+    """
+
+    items: ty.Sequence[ty.Any] = attr.ib(validator=is_a(abc.Sequence))
+    build: ty.Callable[[ty.Any], ty.Any] = attr.ib()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.build(i) for i in self.items[index]]
+        return self.build(self.items[index])
+
+    def __len__(self):
+        return len(self.items)
@@ -17,9 +17,9 @@ limitations under the License.
 
 import enum
 import hashlib
+import itertools as it
 import logging
 import typing as ty
-import uuid
 from collections import OrderedDict
 
 import attr
@@ -28,14 +28,18 @@ from gffutils import Feature
 from intervaltree import Interval
 
 from rnacentral_pipeline.databases.helpers.hashes import crc64
+from rnacentral_pipeline.rnacentral.ftp_export.coordinates import gff3
 from rnacentral_pipeline.rnacentral.ftp_export.coordinates.bed import BedEntry
 
+from .batch import BatchLocation, LocationBatch
 from .extent import Extent
 from .location import LocationInfo
 from .rna_type import RnaType
 
 LOGGER = logging.getLogger(__name__)
 
+CLUSTER_IDS = it.count()
+
 
 class EmptyCluster(Exception):
     """
@@ -54,7 +58,7 @@ class NonOverlappingMember(Exception):
 
 
 def next_id():
-    return uuid.uuid4().int
+    return next(CLUSTER_IDS)
 
 
 @enum.unique
@@ -63,117 +67,89 @@ class MemberType(enum.Enum):
     member = enum.auto()
 
 
-@attr.s()
-class ClusteringKey:
-    chromosome = attr.ib(validator=is_a(str))
-    strand = attr.ib(validator=is_a(int))
-
-    @classmethod
-    def from_location(cls, location: LocationInfo) -> ClusteringKey:
-        return cls(chromosome=location.extent.chromosome, strand=location.extent.strand)
-
-
-@attr.s(slots=True)
-class ClusterMember:
-    location_id = attr.ib(validator=is_a(int))
-    rna_type = attr.ib(validator=is_a(RnaType))
-    extent = attr.ib(validator=is_a(Extent))
-    member_type = attr.ib(validator=is_a(MemberType))
-
-    @classmethod
-    def from_location(
-        cls, location: LocationInfo, member_type=MemberType.member
-    ) -> "ClusterMember":
-        return cls(
-            location_id=location.id,
-            rna_type=location.rna_type,
-            extent=location.extent,
-            member_type=member_type,
-        )
-
-    @classmethod
-    def from_member(
-        cls, member: "ClusterMember", member_type=MemberType.member
-    ) -> "ClusterMember":
-        return cls(
-            location_id=member.location_id,
-            rna_type=member.rna_type,
-            extent=member.extent,
-            member_type=member_type,
-        )
-
-
 @attr.s(slots=True)
 class Cluster:
-    extent: Extent = attr.ib(validator=is_a(Extent))
-    _members: ty.Dict[int, ClusterMember] = attr.ib(validator=is_a(dict), factory=dict)
+    """
+    A cluster of locations from a single `LocationBatch`. This only tracks the
+    rows of the batch which are members, and their type, along with the
+    extent of all members. The rich objects of the members are only built if
+    the cluster is written.
+    """
+
+    batch: LocationBatch = attr.ib(validator=is_a(LocationBatch), repr=False)
+    start: int = attr.ib(validator=is_a(int))
+    stop: int = attr.ib(validator=is_a(int))
+    _members: ty.Dict[int, MemberType] = attr.ib(validator=is_a(dict), factory=dict)
     id: int = attr.ib(validator=is_a(int), factory=next_id)
 
     @classmethod
-    def from_locations(cls, locations: ty.List[LocationInfo]) -> "Cluster":
+    def from_locations(cls, locations: ty.List[BatchLocation]) -> "Cluster":
         if not locations:
             raise ValueError("Cannot build with empty members")
 
-        members = {l.id: ClusterMember.from_location(l) for l in locations}
+        members = {l.row: MemberType.member for l in locations}
         if len(members) != len(locations):
             raise ValueError("Cannot build cluster with duplicate locations")
 
-        if len(locations) == 1:
-            return cls(extent=locations[0].extent, members=members)
-
-        extent = locations[0].extent
-        for location in locations[1:]:
-            extent = extent.merge(location.extent)
         return cls(
-            extent=extent,
+            batch=locations[0].batch,
+            start=min(l.start for l in locations),
+            stop=max(l.stop for l in locations),
             members=members,
         )
 
+    @property
+    def extent(self) -> Extent:
+        return self.batch.extent(self.start, self.stop)
+
     def as_interval(self) -> Interval:
-        return Interval(self.extent.start, self.extent.stop, self.id)
+        return Interval(self.start, self.stop, self.id)
 
-    def remove_location(self, location: LocationInfo):
-        if location.id not in self._members:
+    def remove_location(self, location: BatchLocation):
+        if location.row not in self._members:
             raise ValueError(f"Location {location} not part of cluster")
 
         if len(self._members) == 1:
             raise ValueError("Cannot create empty cluster")
 
-        del self._members[location.id]
-        first = next(iter(self._members.values()))
-        self.extent = first.extent
-        for member in self._members.values():
-            self.extent = self.extent.merge(member.extent)
+        del self._members[location.row]
+        self.start = min(self.batch.starts[r] for r in self._members)
+        self.stop = max(self.batch.stops[r] for r in self._members)
 
-    def add_location(self, location: LocationInfo):
-        if location.id in self._members:
+    def add_location(self, location: BatchLocation):
+        if location.row in self._members:
             raise ValueError(f"Cannot add duplicate location {location}")
 
-        self._members[location.id] = ClusterMember.from_location(location)
-        self.extent = self.extent.merge(location.extent)
+        self._members[location.row] = MemberType.member
+        self.start = min(self.start, location.start)
+        self.stop = max(self.stop, location.stop)
 
-    def highlight_location(self, location: LocationInfo):
-        if location.id not in self._members:
+    def highlight_location(self, location: BatchLocation):
+        if location.row not in self._members:
             raise ValueError(f"Unknown location {location}")
 
-        self._members[location.id].member_type = MemberType.highlighted
+        self._members[location.row] = MemberType.highlighted
 
     def merge(self, cluster: "Cluster"):
-        for lid in self._members.keys():
-            self._members[lid].member_type = MemberType.member
+        for row in self._members.keys():
+            self._members[row] = MemberType.member
 
-        for lid, member in cluster._members.items():
-            if lid in self._members:
-                raise ValueError(f"Illegal state, location {lid} in two clusters")
-            self._members[lid] = ClusterMember.from_member(member)
-            self.extent = self.extent.merge(member.extent)
+        for row in cluster._members.keys():
+            if row in self._members:
+                raise ValueError(f"Illegal state, location {row} in two clusters")
+            self._members[row] = MemberType.member
+        self.start = min(self.start, cluster.start)
+        self.stop = max(self.stop, cluster.stop)
 
     def rna_types(self) -> ty.Set[RnaType]:
-        return {m.rna_type for m in self._members.values()}
+        return {self.batch.rna_type(row) for row in self._members}
 
-    def location_ids(self) -> ty.List[int]:
+    def rows(self) -> ty.List[int]:
         return list(self._members.keys())
 
+    def location_ids(self) -> ty.List[int]:
+        return [self.batch.ids[row] for row in self._members]
+
     def __len__(self):
         return len(self._members)
 
@@ -183,12 +159,6 @@ class WriteableClusterMember:
     location = attr.ib(validator=is_a(LocationInfo))
     member_type = attr.ib(validator=is_a(MemberType))
 
-    @classmethod
-    def build(
-        cls, member: ClusterMember, location: LocationInfo
-    ) -> "WriteableClusterMember":
-        return cls(location=location, member_type=member.member_type)
-
     def as_bed(self) -> ty.Iterable[BedEntry]:
         yield from self.location.as_bed()
 
@@ -200,6 +170,12 @@ class WriteableClusterMember:
         for feature in features:
             yield feature
 
+    def as_gff(self, parent=None) -> ty.Iterable[str]:
+        attributes = [("member_type", [str(self.member_type.name.lower())])]
+        if parent:
+            attributes.append(("Parent", [parent]))
+        return self.location.as_gff(transcript_attributes=attributes)
+
     def as_writeable(self):
         return self.location.writeable()
 
@@ -210,13 +186,16 @@ class WriteableCluster:
     members: ty.Set[WriteableClusterMember] = attr.ib(validator=is_a(set), factory=set)
 
     @classmethod
-    def build(
-        cls, cluster: Cluster, mapping: ty.Dict[int, LocationInfo]
-    ) -> "WriteableCluster":
+    def build(cls, cluster: Cluster) -> "WriteableCluster":
+        """
+        Build the cluster to write, this builds the `LocationInfo` of all
+        members of the cluster.
+        """
+
         members = set()
-        for lid, member in cluster._members.items():
-            location = mapping[lid]
-            members.add(WriteableClusterMember.build(member, location))
+        for row, member_type in cluster._members.items():
+            location = cluster.batch.location(row)
+            members.add(WriteableClusterMember(location, member_type))
         return cls(extent=cluster.extent, members=members)
 
     def id_hash(self):
@@ -294,5 +273,27 @@ class WriteableCluster:
                     feature.attributes["Parent"] = [gene_id]
                 yield feature
 
+    def as_gff(
+        self, include_gene=True, allowed_members={MemberType.highlighted}
+    ) -> ty.Iterable[str]:
+        """
+        Produce the same GFF3 lines as `as_features`, without building any
+        gffutils Features.
+        """
+
+        gene_id = self.id_hash()
+        members = self.__writeable_members__(allowed_members)
+        if members and include_gene:
+            yield gff3.format_line(
+                self.extent.chromosome,
+                "gene",
+                self.extent.start,
+                self.extent.stop,
+                self.extent.string_strand(),
+                [("ID", [gene_id])],
+            )
+        for member in self.members:
+            yield from member.as_gff(parent=gene_id)
+
     def __len__(self):
         return len(self.members)
@@ -27,6 +27,7 @@ from rnacentral_pipeline import psql
 from rnacentral_pipeline.databases.sequence_ontology import tree as so_tree
 
 from .location import Count, LocationInfo
+from .rna_type import RnaType
 
 
 def load_counts(handle: ty.IO) -> ty.Dict[str, Count]:
@@ -66,6 +67,9 @@ class Context:
     )
     counts: ty.Dict[str, Count] = attr.ib(validator=is_a(dict))
     max_rfam_shift = attr.ib(validator=is_a(int), default=10)
+    _rna_types: ty.Dict[ty.Tuple[str, str], RnaType] = attr.ib(
+        validator=is_a(dict), factory=dict
+    )
 
     @classmethod
     def from_files(cls, genes: Path, repetitive: ty.IO, counts: ty.IO) -> Context:
@@ -77,6 +81,16 @@ class Context:
             counts=load_counts(counts),
         )
 
+    def rna_type(self, insdc: str, so_term: str) -> RnaType:
+        """
+        Get the RnaType for the given INSDC and SO names. These are built once
+        and shared by all locations with the same names.
+        """
+        key = (insdc, so_term)
+        if key not in self._rna_types:
+            self._rna_types[key] = RnaType.build(insdc, so_term, self.ontology)
+        return self._rna_types[key]
+
     def count_for(self, urs_taxid: str) -> Count:
         if urs_taxid not in self.counts:
             raise ValueError(f"Missing counts for {urs_taxid}")
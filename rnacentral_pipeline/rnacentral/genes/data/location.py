@@ -24,12 +24,24 @@ from intervaltree import Interval
 
 from rnacentral_pipeline.databases.data.regions import Exon
 from rnacentral_pipeline.databases.data.databases import Database
+from rnacentral_pipeline.rnacentral.ftp_export.coordinates import gff3
 from rnacentral_pipeline.rnacentral.ftp_export.coordinates.bed import BedEntry
 
 from .extent import Extent
 from .rna_type import RnaType
 
 
+def sorted_exons(raw: ty.List[ty.Dict[str, int]]) -> ty.Tuple[Exon, ...]:
+    exons = (Exon.from_dict(e) for e in raw)
+    return tuple(sorted(exons, key=lambda e: (e.start, e.stop)))
+
+
+def is_rfam_only(databases: ty.Iterable[Database]) -> bool:
+    inferred = {Database.genecards, Database.malacards, Database.pirbase}
+    dbs = set(databases) - inferred
+    return dbs == set([Database.rfam])
+
+
 @attr.s(auto_attribs=True, frozen=True, slots=True)
 class QaInfo:
     has_issue: bool
@@ -91,14 +103,12 @@ class LocationInfo:
 
     @classmethod
     def build(cls, context, raw: ty.Dict[str, ty.Any]):
-        rna_type = RnaType.build(
-            raw["insdc_rna_type"], raw["so_rna_type"], context.ontology
-        )
+        rna_type = context.rna_type(raw["insdc_rna_type"], raw["so_rna_type"])
         return cls(
             id=raw["region_id"],
             urs_taxid=raw["urs_taxid"],
             extent=Extent.build(raw),
-            exons=tuple(sorted(Exon.from_dict(e) for e in raw["exons"])),
+            exons=sorted_exons(raw["exons"]),
             region_name=raw["region_name"],
             rna_type=rna_type,
             qa=QaInfo.build(raw["qa"][0]),
@@ -130,9 +140,7 @@ class LocationInfo:
         return len(self.exons) > 1
 
     def is_rfam_only(self):
-        inferred = {Database.genecards, Database.malacards, Database.pirbase}
-        dbs = set(self.databases) - inferred
-        return dbs == set([Database.rfam])
+        return is_rfam_only(self.databases)
 
     def as_interval(self) -> Interval:
         return Interval(self.extent.start, self.extent.stop, self.id)
@@ -184,6 +192,41 @@ class LocationInfo:
                 ),
             )
 
+    def as_gff(self, transcript_attributes=()) -> ty.Iterable[str]:
+        """
+        Produce the same GFF3 lines as `as_features`, without building any
+        gffutils Features. The given attributes are added to the transcript.
+        """
+
+        transcript_name = self.urs_taxid
+        so_term = self.rna_type.so_term
+        chromosome = self.extent.chromosome
+        strand = self.extent.string_strand()
+        yield gff3.format_line(
+            chromosome,
+            "transcript",
+            self.extent.start,
+            self.extent.stop,
+            strand,
+            [("Name", [transcript_name]), ("type", [so_term])]
+            + list(transcript_attributes),
+        )
+
+        for index, exon in enumerate(self.exons):
+            exon_name = transcript_name + f":ncRNA_exon{index + 1}"
+            yield gff3.format_line(
+                chromosome,
+                "noncoding_exon",
+                exon.start,
+                exon.stop,
+                strand,
+                [
+                    ("Name", [exon_name]),
+                    ("Parent", [transcript_name]),
+                    ("type", [so_term]),
+                ],
+            )
+
     def as_writeable(self, status=None) -> ty.Iterable[ty.List[str]]:
         yield [
             self.extent.assembly,
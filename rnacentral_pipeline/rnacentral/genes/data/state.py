@@ -16,6 +16,7 @@ limitations under the License.
 import enum
 import logging
 import typing as ty
+from array import array
 
 import attr
 from attr.validators import instance_of as is_a
@@ -23,8 +24,11 @@ from attr.validators import optional
 from intervaltree import IntervalTree
 
 from rnacentral_pipeline.rnacentral.genes.data import (
+    BatchLocation,
     Cluster,
     ClusteringKey,
+    LazySequence,
+    LocationBatch,
     LocationInfo,
     WriteableCluster,
 )
@@ -50,9 +54,13 @@ class DataType(enum.Enum):
 @attr.s(frozen=True)
 class FinalizedState:
     key = attr.ib(validator=is_a(ClusteringKey))
-    clusters: ty.List[WriteableCluster] = attr.ib(validator=is_a(list))
-    rejected: ty.List[LocationInfo] = attr.ib(validator=is_a(list), factory=list)
-    ignored: ty.List[LocationInfo] = attr.ib(validator=is_a(list), factory=list)
+    clusters: ty.Sequence[WriteableCluster] = attr.ib(validator=is_a(ty.Sequence))
+    rejected: ty.Sequence[LocationInfo] = attr.ib(
+        validator=is_a(ty.Sequence), factory=list
+    )
+    ignored: ty.Sequence[LocationInfo] = attr.ib(
+        validator=is_a(ty.Sequence), factory=list
+    )
 
     def data_types(self):
         return [
@@ -62,52 +70,81 @@ class FinalizedState:
         ]
 
 
-@attr.s(frozen=True, slots=True)
-class LocationStatus:
-    location: LocationInfo = attr.ib(validator=is_a(LocationInfo))
-    status: ty.Optional[DataType] = attr.ib(validator=optional(is_a(DataType)))
-    data: ty.Any = attr.ib()
+UNCLASSIFIED = 0
+
+NOT_CLUSTERED = -1
 
 
 @attr.s()
 class State:
-    key = attr.ib(validator=is_a(ClusteringKey))
+    """
+    The clustering state of all locations in a `LocationBatch`. The status of
+    each location and the cluster it is part of are stored in arrays indexed
+    by the row of the location in the batch, and clusters only store rows. The
+    rich objects are built when the finalized state is written.
+    """
+
+    batch = attr.ib(validator=is_a(LocationBatch))
     method = attr.ib(validator=is_a(str))
     _tree = attr.ib(validator=is_a(IntervalTree), factory=IntervalTree)
-    _locations: ty.Dict[int, LocationStatus] = attr.ib(
-        validator=is_a(dict), factory=dict
+    _status: array = attr.ib(
+        validator=is_a(array),
+        default=attr.Factory(
+            lambda self: array("b", [UNCLASSIFIED]) * len(self.batch),
+            takes_self=True,
+        ),
+    )
+    _cluster_of: array = attr.ib(
+        validator=is_a(array),
+        default=attr.Factory(
+            lambda self: array("q", [NOT_CLUSTERED]) * len(self.batch),
+            takes_self=True,
+        ),
     )
     _clusters: ty.Dict[int, Cluster] = attr.ib(validator=is_a(dict), factory=dict)
 
-    def add_location(self, location: LocationInfo):
-        LOGGER.debug("Adding location: %s", location.id)
-        if location.id in self._locations:
-            raise ValueError(f"Already seen location: {location}")
-        self._locations[location.id] = LocationStatus(location, None, None)
+    @property
+    def key(self) -> ClusteringKey:
+        return self.batch.key
+
+    def status_of(self, location: BatchLocation) -> ty.Optional[DataType]:
+        status = self._status[location.row]
+        if status == UNCLASSIFIED:
+            return None
+        return DataType(status)
+
+    def __set_status__(
+        self,
+        location: BatchLocation,
+        status: DataType,
+        cluster_id: int = NOT_CLUSTERED,
+    ):
+        self._status[location.row] = status.value
+        self._cluster_of[location.row] = cluster_id
 
-    def overlaps(self, location: LocationInfo):
-        intervals = self._tree.overlap(location.as_interval())
+    def overlaps(self, location: BatchLocation):
+        intervals = self._tree.overlap(location.start, location.stop)
         LOGGER.debug(
             "Getting all overlaps for %s, found %i", location.id, len(intervals)
         )
         return [self._clusters[interval.data] for interval in intervals]
 
-    def reject_location(self, location: LocationInfo):
+    def reject_location(self, location: BatchLocation):
         LOGGER.debug("Rejecting location %s", location.id)
         self.__remove_location_from_clusters__(location, DataType.rejected)
         assert len(self._clusters) == len(self._tree)
 
-    def ignore_location(self, location: LocationInfo):
+    def ignore_location(self, location: BatchLocation):
         LOGGER.debug("Ignoring location %s", location.id)
         self.__remove_location_from_clusters__(location, DataType.ignored)
         assert len(self._clusters) == len(self._tree)
 
-    def add_to_cluster(self, location: LocationInfo, cluster_id: int):
+    def add_to_cluster(self, location: BatchLocation, cluster_id: int):
         LOGGER.debug("Updating cluster %i with location %i", cluster_id, location.id)
         if cluster_id not in self._clusters:
             raise ValueError(f"Unknown cluster {cluster_id}")
 
-        if location.id not in self._locations:
+        if location.batch is not self.batch:
             raise ValueError(f"Unknown location {location}")
 
         cluster = self._clusters[cluster_id]
@@ -119,9 +156,7 @@ class State:
         assert len(self._clusters) == len(self._tree)
 
         cluster.add_location(location)
-        self._locations[location.id] = LocationStatus(
-            location, DataType.clustered, cluster.id
-        )
+        self.__set_status__(location, DataType.clustered, cluster.id)
         self._clusters[cluster.id] = cluster
         self._tree.add(cluster.as_interval())
         if len(self._tree) != len(self._clusters):
@@ -140,7 +175,7 @@ class State:
         self._tree.remove(new_cluster.as_interval())
 
         for cluster in clusters[1:]:
-            LOGGER.debug("Merging cluster {cluster.id} into {new_cluster.id}")
+            LOGGER.debug("Merging cluster %i into %i", cluster.id, new_cluster.id)
             if cluster.id not in self._clusters:
                 raise ValueError(f"Unknown cluster {cluster}")
             if cluster.as_interval() not in self._tree:
@@ -148,44 +183,36 @@ class State:
             new_cluster.merge(cluster)
             del self._clusters[cluster.id]
             self._tree.remove(cluster.as_interval())
-            for lid in cluster._members.keys():
-                if lid not in self._locations:
-                    raise ValueError(f"Unknown location {lid} in cluster {cluster}")
-                info = self._locations[lid]
-                assert info.data == cluster.id
-                del self._locations[lid]
-                self._locations[info.location.id] = LocationStatus(
-                    info.location, DataType.clustered, new_cluster.id
-                )
+            for row in cluster.rows():
+                assert self._status[row] == DataType.clustered.value
+                assert self._cluster_of[row] == cluster.id
+                self._cluster_of[row] = new_cluster.id
         self._clusters[new_cluster.id] = new_cluster
         self._tree.add(new_cluster.as_interval())
         assert len(self._clusters) == len(self._tree)
         return new_cluster.id
 
-    def add_singleton_cluster(self, location: LocationInfo):
+    def add_singleton_cluster(self, location: BatchLocation):
         LOGGER.debug("Adding singleton cluster of %s", location.id)
-        if location.id not in self._locations:
+        if location.batch is not self.batch:
             raise ValueError(f"Unknown location: {location}")
 
-        info = self._locations[location.id]
-        if info.status is None or info.status in {
+        status = self.status_of(location)
+        if status is None or status in {
             DataType.rejected,
             DataType.ignored,
         }:
             cluster = Cluster.from_locations([location])
             LOGGER.info("Building singleton cluster %i", cluster.id)
             self._clusters[cluster.id] = cluster
-            del self._locations[location.id]
-            self._locations[location.id] = LocationStatus(
-                location, DataType.clustered, cluster.id
-            )
+            self.__set_status__(location, DataType.clustered, cluster.id)
             self._tree.add(cluster.as_interval())
             assert cluster.id in self._clusters
             assert cluster.as_interval() in self._tree
-        elif info.status == DataType.clustered:
+        elif status == DataType.clustered:
             raise ValueError(f"Location {location} has already been clustered")
         else:
-            raise ValueError(f"Unknown info {info} for {location}")
+            raise ValueError(f"Unknown status {status} for {location}")
 
     def ignore_cluster(self, cluster_id: int):
         LOGGER.debug("Ignoring all locations in %s", cluster_id)
@@ -198,40 +225,37 @@ class State:
             raise ValueError(f"Cluster {cluster} not indexed")
 
         self._tree.remove(cluster.as_interval())
-        for lid, member in cluster._members.items():
-            if lid not in self._locations:
-                raise ValueError(f"Somehow location {lid} is unknown")
-            info = self._locations[lid]
-            del self._locations[lid]
-            LOGGER.debug("Ignoring location %s", info.location.id)
-            self._locations[lid] = LocationStatus(info.location, DataType.ignored, None)
-
-    def highlight_location(self, location_id: int):
-        info = self._locations.get(location_id, None)
-        if not info:
-            raise ValueError(f"Unknown location id: {location_id}")
-
-        if info.status != DataType.clustered:
-            raise ValueError(f"Cannot highlight unclustered location: {info}")
-
-        cluster = self._clusters.get(info.data, None)
+        for row in cluster.rows():
+            if self._cluster_of[row] != cluster_id:
+                raise ValueError(f"Somehow location {row} is not in {cluster_id}")
+            location = BatchLocation(self.batch, row)
+            LOGGER.debug("Ignoring location %s", location.id)
+            self.__set_status__(location, DataType.ignored)
+
+    def highlight_location(self, location: BatchLocation):
+        status = self.status_of(location)
+        if status != DataType.clustered:
+            raise ValueError(f"Cannot highlight unclustered location: {location}")
+
+        cluster = self._clusters.get(self._cluster_of[location.row], None)
         if not cluster:
-            raise ValueError(f"Illegal State, missing cluster for {info}")
+            raise ValueError(f"Illegal State, missing cluster for {location}")
 
-        cluster.highlight_location(info.location)
+        cluster.highlight_location(location)
 
-    def members_of(self, cluster_id: int) -> ty.List[LocationInfo]:
+    def members_of(self, cluster_id: int) -> ty.List[BatchLocation]:
         if cluster_id not in self._clusters:
             raise ValueError(f"Unknown cluster {cluster_id}")
         members = []
         cluster = self._clusters[cluster_id]
-        for lid in cluster.location_ids():
-            if lid not in self._locations:
-                raise ValueError("Unknown location id {lid} in cluster {cluster}")
-            info = self._locations[lid]
-            if info.status != DataType.clustered or info.data != cluster_id:
-                raise ValueError(f"Info {info} does not show clustered to {cluster_id}")
-            members.append(info.location)
+        for row in cluster.rows():
+            location = BatchLocation(self.batch, row)
+            status = self.status_of(location)
+            if status != DataType.clustered or self._cluster_of[row] != cluster_id:
+                raise ValueError(
+                    f"Location {location} is not clustered to {cluster_id}"
+                )
+            members.append(location)
         return members
 
     def has_clusters(self) -> bool:
@@ -244,36 +268,37 @@ class State:
         return list(self._clusters.keys())
 
     def finalize(self) -> FinalizedState:
-        rejected: ty.List[LocationInfo] = []
-        ignored: ty.List[LocationInfo] = []
-        for (lid, data) in self._locations.items():
-            if data.status is None:
-                raise ValueError(f"Unclassified location {data.location}")
-            elif data.status == DataType.clustered:
+        """
+        Produce the final state of this batch. The rejected and ignored
+        locations, and the clusters, are only built as they are written.
+        """
+
+        rejected = array("q")
+        ignored = array("q")
+        for row, status in enumerate(self._status):
+            if status == UNCLASSIFIED:
+                location = self.batch.location(row)
+                raise ValueError(f"Unclassified location {location}")
+            elif status == DataType.clustered.value:
                 continue
-            elif data.status == DataType.rejected:
-                rejected.append(data.location)
-            elif data.status == DataType.ignored:
-                ignored.append(data.location)
+            elif status == DataType.rejected.value:
+                rejected.append(row)
+            elif status == DataType.ignored.value:
+                ignored.append(row)
             else:
-                raise ValueError(f"Unknown status state {data}")
-
-        clusters: ty.List[WriteableCluster] = []
-        for cid, cluster in self._clusters.items():
-            locations = {
-                lid: self._locations[lid].location for lid in cluster.location_ids()
-            }
-            clusters.append(WriteableCluster.build(cluster, locations))
+                raise ValueError(f"Unknown status state {status}")
 
         return FinalizedState(
             key=self.key,
-            clusters=clusters,
-            rejected=rejected,
-            ignored=ignored,
+            clusters=LazySequence(
+                list(self._clusters.values()), WriteableCluster.build
+            ),
+            rejected=LazySequence(rejected, self.batch.location),
+            ignored=LazySequence(ignored, self.batch.location),
         )
 
     def validate(self):
-        assert len(self._clusters) <= len(self._locations)
+        assert len(self._clusters) <= len(self.batch)
         assert len(self._tree) == len(self._clusters)
         for cluster_id, cluster in self._clusters.items():
             assert cluster.as_interval() in self._tree
@@ -281,47 +306,43 @@ class State:
         for interval in self._tree:
             assert interval.data in self._clusters
 
-        for location_id, info in self._locations.items():
-            if info.data is None:
-                LOGGER.debug("Skipping unprocessed location %s", info)
+        for row, cluster_id in enumerate(self._cluster_of):
+            if cluster_id == NOT_CLUSTERED:
+                LOGGER.debug("Skipping unclustered location %s", row)
                 continue
-            if info.data not in self._clusters:
-                raise ValueError("Location %s is in missing cluster", info)
+            if cluster_id not in self._clusters:
+                raise ValueError(f"Location {row} is in missing cluster")
 
     def lengths(self):
-        return (len(self._locations), len(self._tree), len(self._clusters))
+        return (len(self.batch), len(self._tree), len(self._clusters))
 
     def __remove_location_from_clusters__(
-        self, location: LocationInfo, new_status: DataType
+        self, location: BatchLocation, new_status: DataType
     ):
-        if location.id not in self._locations:
+        if location.batch is not self.batch:
             raise ValueError(f"Unknown location: {location}")
 
-        info = self._locations[location.id]
-        del self._locations[location.id]
-
-        status = info.status
+        status = self.status_of(location)
         if status is None or status in {DataType.ignored, DataType.rejected}:
-            self._locations[location.id] = LocationStatus(location, new_status, None)
+            self.__set_status__(location, new_status)
 
         elif status == DataType.clustered:
-            cluster = self._clusters[info.data]
-            self._locations[location.id] = LocationStatus(location, new_status, None)
+            cluster_id = self._cluster_of[location.row]
+            cluster = self._clusters[cluster_id]
+            self.__set_status__(location, new_status)
             if len(cluster) == 1:
                 LOGGER.debug(
-                    f"Cluster {info.data} has only one member, removing it completely"
+                    f"Cluster {cluster_id} has only one member, removing it completely"
                 )
-                del self._clusters[info.data]
+                del self._clusters[cluster_id]
                 self._tree.remove(cluster.as_interval())
-                assert info.data not in self._clusters
+                assert cluster_id not in self._clusters
             else:
-                assert location.id in cluster._members
-                del self._clusters[info.data]
+                del self._clusters[cluster_id]
                 self._tree.remove(cluster.as_interval())
                 cluster.remove_location(location)
                 self._tree.add(cluster.as_interval())
                 self._clusters[cluster.id] = cluster
-                assert location.id not in cluster._members
         else:
             raise ValueError(f"Unknown status {status} for {location}")
         assert len(self._tree) == len(self._clusters)
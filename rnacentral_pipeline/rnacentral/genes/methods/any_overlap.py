@@ -13,12 +13,12 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-from rnacentral_pipeline.rnacentral.genes.data import State, LocationInfo, Context
+from rnacentral_pipeline.rnacentral.genes.data import State, BatchLocation, Context
 from .common_filter import filter
 
 
 class AnyOverlapMethod:
-    def handle_location(self, state: State, context: Context, location: LocationInfo):
+    def handle_location(self, state: State, context: Context, location: BatchLocation):
         if filter(state, context, location):
             return
 
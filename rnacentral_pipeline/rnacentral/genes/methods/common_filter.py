@@ -19,7 +19,7 @@ import typing as ty
 from rnacentral_pipeline.databases.data.databases import Database
 from rnacentral_pipeline.rnacentral.genes.data import (
     State,
-    LocationInfo,
+    BatchLocation,
     Context,
     Cluster,
 )
@@ -28,7 +28,7 @@ LOGGER = logging.getLogger(__name__)
 
 
 def is_rfam_shift(
-    state: State, context: Context, location: LocationInfo, overlaps: ty.List[Cluster]
+    state: State, context: Context, location: BatchLocation, overlaps: ty.List[Cluster]
 ) -> bool:
     return False
 
@@ -49,7 +49,7 @@ def is_rfam_shift(
 #     return False
 
 
-def always_bad_location(location: LocationInfo) -> bool:
+def always_bad_location(location: BatchLocation) -> bool:
     if location.qa.has_issue:
         if location.extent.chromosome == "MT":
             state = location.qa.as_tuple()
@@ -63,7 +63,7 @@ def always_bad_location(location: LocationInfo) -> bool:
     return False
 
 
-def filter(state: State, context: Context, location: LocationInfo) -> bool:
+def filter(state: State, context: Context, location: BatchLocation) -> bool:
     LOGGER.debug("Testing common conditions for %s", location.id)
 
     LOGGER.debug("Checking for invalid position")
@@ -87,7 +87,7 @@ def filter(state: State, context: Context, location: LocationInfo) -> bool:
 
 
 def filter_overlaps(
-    state: State, context: Context, location: LocationInfo, overlaps: ty.List[Cluster]
+    state: State, context: Context, location: BatchLocation, overlaps: ty.List[Cluster]
 ):
     if is_rfam_shift(state, context, location, overlaps):
         LOGGER.debug("Rejecting %s as it is an Rfam shift", location)
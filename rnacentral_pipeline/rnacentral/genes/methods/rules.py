@@ -18,7 +18,7 @@ import typing as ty
 
 from rnacentral_pipeline.rnacentral.genes.data import (
     State,
-    LocationInfo,
+    BatchLocation,
     Context,
     Cluster,
 )
@@ -29,7 +29,7 @@ LOGGER = logging.getLogger(__name__)
 
 class RuleMethod:
     def has_compatible_rna_types(
-        self, location: LocationInfo, cluster: Cluster
+        self, location: BatchLocation, cluster: Cluster
     ) -> bool:
         rna_types = cluster.rna_types()
         if not rna_types:
@@ -41,7 +41,7 @@ class RuleMethod:
         return True
 
     def select_mergable(
-        self, location: LocationInfo, clusters: ty.List[Cluster]
+        self, location: BatchLocation, clusters: ty.List[Cluster]
     ) -> ty.Optional[ty.List[Cluster]]:
         to_merge = []
         target = location.as_interval()
@@ -56,7 +56,7 @@ class RuleMethod:
             return None
         return to_merge
 
-    def handle_location(self, state: State, context: Context, location: LocationInfo):
+    def handle_location(self, state: State, context: Context, location: BatchLocation):
         if filter(state, context, location):
             return
 
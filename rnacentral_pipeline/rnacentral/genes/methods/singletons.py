@@ -15,14 +15,14 @@ limitations under the License.
 
 import logging
 
-from rnacentral_pipeline.rnacentral.genes.data import State, LocationInfo, Context
+from rnacentral_pipeline.rnacentral.genes.data import State, BatchLocation, Context
 from .common_filter import filter
 
 LOGGER = logging.getLogger(__name__)
 
 
 class SingletonMethod:
-    def handle_location(self, state: State, context: Context, location: LocationInfo):
+    def handle_location(self, state: State, context: Context, location: BatchLocation):
         if filter(state, context, location):
             return
         LOGGER.debug("Adding singleton cluster of %s", location.id)
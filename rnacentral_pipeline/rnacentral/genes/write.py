@@ -19,11 +19,12 @@ import itertools as it
 import logging
 import operator as op
 import typing as ty
-from functools import partial
 from pathlib import Path
 
-from rnacentral_pipeline.rnacentral.ftp_export.coordinates.bed import write_bed_text
-from rnacentral_pipeline.rnacentral.ftp_export.coordinates.gff3 import write_gff_text
+import attr
+from attr.validators import instance_of as is_a
+
+from rnacentral_pipeline.rnacentral.ftp_export.coordinates.gff3 import write_gff_lines
 from rnacentral_pipeline.rnacentral.genes import data
 
 LOGGER = logging.getLogger(__name__)
@@ -47,28 +48,78 @@ class Format(enum.Enum):
         return [x.name for x in cls]
 
 
-def write_csv(rows, output, name: str, **kwargs) -> bool:
-    out = output / f"{name}.csv"
-    with out.open("a") as handle:
-        writer = csv.writer(handle)
-        rows = list(it.chain.from_iterable(rows))
-        writer.writerows(rows)
-    return True
+BUFFER_SIZE = 8 * 1024 * 1024
 
 
-def write_bed(bed, output: Path, name: str, extended=False, **kwargs) -> bool:
-    out = output / f"{name}.bed"
-    with out.open("a") as handle:
-        write_bed_text(it.chain.from_iterable(bed), handle, extended=extended)
-    return True
+@attr.s()
+class Outputs:
+    """
+    This keeps all output files of a run open, so each result can be written
+    without reopening the files. Files are opened, in append mode, the first
+    time something is written to them and all are closed when the run is done.
+    """
+
+    path: Path = attr.ib(validator=is_a(Path))
+    format: Format = attr.ib(validator=is_a(Format))
+    extended_bed: bool = attr.ib(default=False)
+    _handles: ty.Dict[str, ty.IO] = attr.ib(factory=dict)
+    _csv: ty.Dict[str, ty.Any] = attr.ib(factory=dict)
+    _started: bool = attr.ib(default=False)
+
+    def __enter__(self) -> "Outputs":
+        return self
 
+    def __exit__(self, *args):
+        self.close()
 
-def write_gff(gff, output: Path, name: str, header=True) -> bool:
-    out = output / f"{name}.gff"
-    with out.open("a") as handle:
-        return write_gff_text(
-            it.chain.from_iterable(gff), handle, header=header, allow_no_features=True
-        )
+    def close(self):
+        for handle in self._handles.values():
+            handle.close()
+        self._handles = {}
+        self._csv = {}
+
+    def extension(self) -> str:
+        return self.format.name.lower()
+
+    def handle(self, name: str) -> ty.IO:
+        if name not in self._handles:
+            out = self.path / f"{name}.{self.extension()}"
+            self._handles[name] = out.open("a", buffering=BUFFER_SIZE)
+        return self._handles[name]
+
+    def csv_writer(self, name: str):
+        if name not in self._csv:
+            handle = self.handle(name)
+            if self.format == Format.Bed:
+                self._csv[name] = csv.writer(
+                    handle, delimiter="\t", lineterminator="\n"
+                )
+            else:
+                self._csv[name] = csv.writer(handle)
+        return self._csv[name]
+
+    def write(self, name: str, rows: ty.Iterable[ty.Any]) -> bool:
+        header = not self._started
+        self._started = True
+        if self.format == Format.Csv:
+            self.csv_writer(name).writerows(rows)
+            return True
+
+        if self.format == Format.Bed:
+            extended = self.extended_bed
+            writeable = op.methodcaller("writeable", extended=extended)
+            self.csv_writer(name).writerows(map(writeable, rows))
+            return True
+
+        if self.format == Format.Gff:
+            return write_gff_lines(
+                iter(rows),
+                self.handle(name),
+                header=header,
+                allow_no_features=True,
+            )
+
+        raise ValueError("Cannot write to format: %s" % self.format)
 
 
 def write(
@@ -80,60 +131,55 @@ def write(
     allowed_data_types=data.DataType.all(),
     extended_bed=False,
 ):
-    first = True
     written = False
-    for result in results:
-        for (data_type, locations) in result.data_types():
-            if data_type not in allowed_data_types:
-                LOGGER.debug(
-                    "Skipping %s/%s since it is ignored", result.key, data_type.name
-                )
-                continue
-
-            if not data:
-                LOGGER.debug("No entries in %s/%s", result.key, data_type.name)
-                continue
-
-            method = None
-            writer = None
-            name = data_type.name
-            if data_type == data.DataType.clustered:
-                name = "locus"
-            if format == Format.Csv:
-                kwargs = {}
+    with Outputs(path, format, extended_bed=extended_bed) as outputs:
+        for result in results:
+            for data_type, locations in result.data_types():
+                if data_type not in allowed_data_types:
+                    LOGGER.debug(
+                        "Skipping %s/%s since it is ignored", result.key, data_type.name
+                    )
+                    continue
+
+                if not data:
+                    LOGGER.debug("No entries in %s/%s", result.key, data_type.name)
+                    continue
+
+                method = None
+                name = data_type.name
                 if data_type == data.DataType.clustered:
-                    kwargs["allowed_members"] = allowed_members
+                    name = "locus"
+                if format == Format.Csv:
+                    kwargs = {}
+                    if data_type == data.DataType.clustered:
+                        kwargs["allowed_members"] = allowed_members
+                    else:
+                        kwargs["status"] = data_type.name
+                    method = op.methodcaller("as_writeable", **kwargs)
+
+                elif format == Format.Bed:
+                    kwargs = {}
+                    if data_type == data.DataType.clustered:
+                        kwargs = {
+                            "allowed_members": allowed_members,
+                            "include_gene": include_genes,
+                        }
+                    method = op.methodcaller("as_bed", **kwargs)
+
+                elif format == Format.Gff:
+                    kwargs = {}
+                    if data_type == data.DataType.clustered:
+                        kwargs = {
+                            "allowed_members": allowed_members,
+                            "include_gene": include_genes,
+                        }
+                    method = op.methodcaller("as_gff", **kwargs)
                 else:
-                    kwargs["status"] = data_type.name
-                method = op.methodcaller("as_writeable", **kwargs)
-                writer = write_csv
-
-            elif format == Format.Bed:
-                kwargs = {}
-                if data_type == data.DataType.clustered:
-                    kwargs = {
-                        "allowed_members": allowed_members,
-                        "include_gene": include_genes,
-                    }
-                method = op.methodcaller("as_bed", **kwargs)
-                writer = partial(write_bed, extended=extended_bed)
-
-            elif format == Format.Gff:
-                kwargs = {}
-                if data_type == data.DataType.clustered:
-                    kwargs = {
-                        "allowed_members": allowed_members,
-                        "include_gene": include_genes,
-                    }
-                method = op.methodcaller("as_features", **kwargs)
-                writer = partial(write_gff, header=first)
-            else:
-                raise ValueError("Cannot write to format: %s" % format)
+                    raise ValueError("Cannot write to format: %s" % format)
 
-            entries = map(method, locations)
-            data_written = writer(entries, path, name)
-            written = written or data_written
-            first = False
+                rows = it.chain.from_iterable(map(method, locations))
+                data_written = outputs.write(name, rows)
+                written = written or data_written
 
     if not written:
         raise ValueError("No features of any type written")
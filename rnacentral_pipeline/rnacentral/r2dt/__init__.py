@@ -139,8 +139,12 @@ def write_training_data(handle: ty.IO, db_url: str, output: ty.IO):
     return should_show.write_training_data(handle, db_url, output)
 
 
-def build_model(handle: ty.IO, db_url: str, output: Path):
-    return should_show.write_model(handle, db_url, output)
+def build_model(handle: ty.IO, db_url: str, output: Path, features=None):
+    return should_show.write_model(handle, db_url, output, features=features)
+
+
+def evaluate_model(model: Path, handle: ty.IO, features: ty.IO, output: ty.IO):
+    return should_show.write_evaluation(model, handle, features, output)
 
 
 def write_converted_sheet(handle: ty.IO, output: ty.IO):
@@ -20,14 +20,17 @@ import typing as ty
 from pathlib import Path
 
 import joblib
+import numpy as np
 import pandas as pd
 import psycopg2
 import psycopg2.extras
 from more_itertools import chunked
-from pypika import Query, Table
+from pypika import Parameter, Query, Table
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import cross_val_score, train_test_split
 
+from rnacentral_pipeline import db
+
 LOGGER = logging.getLogger(__name__)
 
 
@@ -62,6 +65,27 @@ class Attributes(enum.Enum):
 MODEL_COLUMNS: ty.List[str] = Attributes.model_columns()
 
 
+BATCH_SIZE = 10000
+
+PREDICT_BATCH_SIZE = 100000
+
+FIELDS: ty.List[str] = [
+    "urs",
+    "sequence_length",
+    "model_source",
+    "diagram_sequence_start",
+    "diagram_sequence_stop",
+    "diagram_bps",
+    "diagram_model_start",
+    "diagram_model_stop",
+    "model_length",
+    "model_basepair_count",
+    "diagram_overlap_count",
+]
+
+Row = ty.Tuple[ty.Any, ...]
+
+
 def chunked_query(
     ids: ty.Iterable[str], query_builder, db_url: str, chunk_size=100
 ) -> ty.Iterable[ty.Dict[str, ty.Any]]:
@@ -74,93 +98,172 @@ def chunked_query(
                 yield dict(result)
 
 
-def fetch_modeled_data(
-    all_ids: ty.Iterable[str], db_url: str, chunk_size=100
-) -> ty.Iterable[ty.Dict[str, ty.Any]]:
+def modeled_query():
     rna = Table("rna")
     ss = Table("r2dt_results")
     sm = Table("r2dt_models")
-
-    def build_query(ids):
-        return (
-            Query.from_(rna)
-            .select(
-                rna.upi.as_("urs"),
-                rna.len.as_("sequence_length"),
-                sm.model_source,
-                ss.sequence_start.as_("diagram_sequence_start"),
-                ss.sequence_stop.as_("diagram_sequence_stop"),
-                ss.basepair_count.as_("diagram_bps"),
-                ss.model_start.as_("diagram_model_start"),
-                ss.model_stop.as_("diagram_model_stop"),
-                sm.model_length,
-                sm.model_basepair_count,
-                ss.overlap_count.as_("diagram_overlap_count"),
-            )
-            .join(ss)
-            .on(ss.urs == rna.upi)
-            .join(sm)
-            .on(sm.id == ss.model_id)
-            .where(ss.urs.isin(ids))
+    return (
+        Query.from_(rna)
+        .select(
+            rna.upi.as_("urs"),
+            rna.len.as_("sequence_length"),
+            sm.model_source,
+            ss.sequence_start.as_("diagram_sequence_start"),
+            ss.sequence_stop.as_("diagram_sequence_stop"),
+            ss.basepair_count.as_("diagram_bps"),
+            ss.model_start.as_("diagram_model_start"),
+            ss.model_stop.as_("diagram_model_stop"),
+            sm.model_length,
+            sm.model_basepair_count,
+            ss.overlap_count.as_("diagram_overlap_count"),
         )
+        .join(ss)
+        .on(ss.urs == rna.upi)
+        .join(sm)
+        .on(sm.id == ss.model_id)
+        .where(ss.urs == Parameter("ANY(%(ids)s)"))
+    )
+
+
+def fetch_modeled_rows(
+    all_ids: ty.List[str], conn, batch_size=BATCH_SIZE
+) -> ty.Iterable[Row]:
+    """
+    Fetch the features of all given URS, as tuples in the order of FIELDS.
+    Each batch of ids is fetched with a single query using a server side
+    cursor. Entries with any missing feature are skipped.
+    """
 
+    query = str(modeled_query())
     seen: ty.Set[str] = set()
-    results = chunked_query(all_ids, build_query, db_url, chunk_size=chunk_size)
-    for result in results:
-        if any(v is None for v in result.values()):
-            continue
-        yield result
-        seen.add(result["urs"])
+    for chunk in chunked(all_ids, batch_size):
+        for result in db.stream(conn, query, params={"ids": chunk}):
+            if any(v is None for v in result):
+                continue
+            yield tuple(result)
+            seen.add(result[0])
 
     for urs in all_ids:
         if urs not in seen:
             LOGGER.warn("Missed loading %s", urs)
 
 
-def infer_columns(frame: pd.DataFrame):
-    frame["diagram_sequence_length"] = (
-        frame["diagram_sequence_stop"] - frame["diagram_sequence_start"]
+def fetch_modeled_data(
+    all_ids: ty.List[str], db_url: str, batch_size=BATCH_SIZE
+) -> ty.Iterable[ty.Dict[str, ty.Any]]:
+    with psycopg2.connect(db_url) as conn:
+        for row in fetch_modeled_rows(all_ids, conn, batch_size=batch_size):
+            yield dict(zip(FIELDS, row))
+
+
+def feature_matrix(rows: ty.Sequence[Row]) -> np.ndarray:
+    """
+    Build the matrix of MODEL_COLUMNS for the given rows, which must be in
+    the order of FIELDS. This works on whole columns at once instead of
+    building a frame.
+    """
+
+    if not rows:
+        return np.empty((0, len(MODEL_COLUMNS)), dtype=np.int64)
+
+    raw = dict(zip(FIELDS, zip(*rows)))
+    columns = {name: np.asarray(raw[name], dtype=np.int64) for name in FIELDS[3:]}
+    columns["sequence_length"] = np.asarray(raw["sequence_length"], dtype=np.int64)
+    columns["diagram_sequence_length"] = (
+        columns["diagram_sequence_stop"] - columns["diagram_sequence_start"]
     )
-    frame["diagram_model_length"] = (
-        frame["diagram_model_stop"] - frame["diagram_model_start"]
+    columns["diagram_model_length"] = (
+        columns["diagram_model_stop"] - columns["diagram_model_start"]
     )
-    frame["source_index"] = frame.model_source.map(SOURCE_MAP)
-    if frame["source_index"].isnull().any():
-        raise ValueError("Could not build source_index for all training data")
+    try:
+        columns["source_index"] = np.fromiter(
+            (SOURCE_MAP[s] for s in raw["model_source"]),
+            dtype=np.int64,
+            count=len(rows),
+        )
+    except KeyError as err:
+        raise ValueError(f"Could not build source_index for {err}")
+    return np.column_stack([columns[name] for name in MODEL_COLUMNS])
 
 
-def fetch_training_data(handle: ty.IO, db_url: str) -> pd.DataFrame:
-    ids = []
-    training = {}
-    for (urs, flag) in csv.reader(handle):
-        ids.append(urs)
+def load_labels(handle: ty.IO) -> ty.Dict[str, bool]:
+    labels = {}
+    for urs, flag in csv.reader(handle):
         if flag == "1":
-            training[urs] = True
+            labels[urs] = True
         elif flag == "0":
-            training[urs] = False
+            labels[urs] = False
         else:
             raise ValueError(f"Unknown flag {flag}")
-
+    return labels
+
+
+def load_features(handle: ty.IO) -> ty.List[Row]:
+    """
+    Load the features written by `write_training_data`, so a model can be
+    trained and evaluated without a database.
+    """
+
+    rows = []
+    for raw in csv.DictReader(handle):
+        row = []
+        for name in FIELDS:
+            value = raw[name]
+            if name not in {"urs", "model_source"}:
+                value = int(value)
+            row.append(value)
+        rows.append(tuple(row))
+    return rows
+
+
+def labeled_data(
+    labels: ty.Dict[str, bool], rows: ty.Iterable[Row]
+) -> ty.Tuple[np.ndarray, np.ndarray]:
     filled = []
-    for metadata in fetch_modeled_data(ids, db_url):
-        urs = metadata["urs"]
-        if urs not in training:
-            raise ValueError(f"Got an extra entry, somehow {metadata}")
-        metadata["valid"] = training[urs]
-        filled.append(metadata)
-
-    training = pd.DataFrame.from_records(filled)
-    infer_columns(training)
-    return training
-
-
-def train(handle, db_url, cross_validation=5, test_size=0.4) -> RandomForestClassifier:
-    data = fetch_training_data(handle, db_url)
+    for row in rows:
+        if row[0] not in labels:
+            raise ValueError(f"Got an extra entry, somehow {row}")
+        filled.append(row)
+    valid = np.array([labels[row[0]] for row in filled], dtype=bool)
+    return (feature_matrix(filled), valid)
+
+
+def fetch_training_data(handle: ty.IO, db_url: str) -> ty.Tuple[np.ndarray, np.ndarray]:
+    labels = load_labels(handle)
+    with psycopg2.connect(db_url) as conn:
+        rows = list(fetch_modeled_rows(list(labels.keys()), conn))
+    return labeled_data(labels, rows)
+
+
+def load_training_data(
+    handle: ty.IO, features: ty.IO
+) -> ty.Tuple[np.ndarray, np.ndarray]:
+    return labeled_data(load_labels(handle), load_features(features))
+
+
+def train(
+    handle,
+    db_url,
+    cross_validation=5,
+    test_size=0.4,
+    features=None,
+    random_state=None,
+) -> RandomForestClassifier:
+    """
+    Train the model using the labeled URS in handle. The features are fetched
+    from the database unless a file of features, as written by
+    `write_training_data`, is given.
+    """
+
+    if features:
+        X, y = load_training_data(handle, features)
+    else:
+        X, y = fetch_training_data(handle, db_url)
     X_train, X_test, y_train, y_test = train_test_split(
-        data[MODEL_COLUMNS].to_numpy(), data["valid"].to_numpy(), test_size=test_size
+        X, y, test_size=test_size, random_state=random_state
     )
 
-    clf = RandomForestClassifier(min_samples_split=5)
+    clf = RandomForestClassifier(min_samples_split=5, random_state=random_state)
     scores = cross_val_score(clf, X_train, y_train, cv=cross_validation)
     LOGGER.info("%s fold cross validation scores: %s", cross_validation, scores)
     clf.fit(X_train, y_train)
@@ -168,6 +271,24 @@ def train(handle, db_url, cross_validation=5, test_size=0.4) -> RandomForestClas
     return clf
 
 
+def evaluate(model, handle: ty.IO, features: ty.IO) -> float:
+    X, y = load_training_data(handle, features)
+    return model.score(X, y)
+
+
+def predict(
+    model, rows: ty.Iterable[Row], batch_size=PREDICT_BATCH_SIZE
+) -> ty.Iterable[ty.Tuple[str, int]]:
+    """
+    Predict if each row should be shown. Rows are scored in large batches so
+    the time is spent in the model and not in building its input.
+    """
+
+    for batch in chunked(rows, batch_size):
+        predicted = model.predict(feature_matrix(batch))
+        yield from zip((row[0] for row in batch), predicted.astype(int).tolist())
+
+
 def from_result(clf, result) -> bool:
     predictable = {}
     for attribute in Attributes:
@@ -180,19 +301,18 @@ def from_result(clf, result) -> bool:
 def write(model_path: Path, handle: ty.IO, db_url: str, output: ty.IO):
     model = joblib.load(model_path)
     ids = [r[0] for r in csv.reader(handle)]
-    modeled = fetch_modeled_data(ids, db_url)
-    frame = pd.DataFrame.from_records(modeled)
-    if len(frame) > 0:
-        infer_columns(frame)
-        predicted = model.predict(frame[MODEL_COLUMNS].to_numpy())
-        to_write = pd.DataFrame()
-        to_write["urs"] = frame["urs"]
-        to_write["should_show"] = predicted.astype(int)
-        to_write.to_csv(output, index=False, header=False)
-
-
-def write_model(handle: ty.IO, db_url: str, output: Path):
-    joblib.dump(train(handle, db_url), output)
+    writer = csv.writer(output)
+    with psycopg2.connect(db_url) as conn:
+        writer.writerows(predict(model, fetch_modeled_rows(ids, conn)))
+
+
+def write_model(handle: ty.IO, db_url: str, output: Path, features=None):
+    joblib.dump(train(handle, db_url, features=features), output)
+
+
+def write_evaluation(model_path: Path, handle: ty.IO, features: ty.IO, output: ty.IO):
+    model = joblib.load(model_path)
+    output.write("%f\n" % evaluate(model, handle, features))
 
 
 def write_training_data(handle: ty.IO, db_url: str, output: ty.IO):
@@ -15,14 +15,46 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import collections as coll
+import gzip
+import json
+import logging
+import re
 import typing as ty
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
+import attr
 import requests
+from attr.validators import instance_of as is_a
+from attr.validators import optional
+from lxml import etree
 
 from rnacentral_pipeline.databases.data import Database
 
+LOGGER = logging.getLogger(__name__)
+
 EXPERT_DATABASES = [f'expert_db:"{db.pretty()}"' for db in Database]
 
+QUERIES = ["RNA", 'TAXONOMY:"9606"'] + EXPERT_DATABASES
+
+FACETS = ["rna_type", "has_genomic_coordinates"]
+
+FACET_COUNT = 30
+
+PRODUCTION = (
+    "http://www.ebi.ac.uk/ebisearch/ws/rest/rnacentral"
+    + "?query={query}&format=json&facetfields={facet}&facetcount=%i" % FACET_COUNT
+)
+
+DEVELOPMENT = PRODUCTION.replace("http://www.", "http://wwwdev.")
+
+FIELD_QUERY = re.compile(r'^(?P<field>\w+):"(?P<value>[^"]*)"$')
+
+REFERENCE_FIELDS = {"ncbi_taxonomy_id": "taxonomy"}
+
+FacetCounts = ty.Dict[str, int]
+
 
 def search(index, query, facet):
     url = index.format(query=query, facet=facet)
@@ -34,56 +66,306 @@ def search(index, query, facet):
     return results
 
 
-def compare(output, results1, results2, facet):
+def facet_counts(results) -> ty.Optional[FacetCounts]:
     """
-    TODO: check that keys from both facets are checked.
+    Extract the counts of each facet value from an EBI Search response.
     """
-    data1 = {}
-    data2 = {}
+
+    if not results:
+        return None
     try:
-        for result in results1["facets"][0]["facetValues"]:
-            data1[result["value"]] = result["count"]
-        for result in results2["facets"][0]["facetValues"]:
-            data2[result["value"]] = result["count"]
-    except Exception as e:
-        print(e)
-        # import pdb; pdb.set_trace();
-
-    for facet, count in data1.items():
-        before = count
-        after = data2[facet] if facet in data2 else 0
-        change = after - before
-        percent_change = change * 100 / before
-        if abs(percent_change) > 10:
-            flag = "Change > 10%"
-        else:
-            flag = ""
+        values = results["facets"][0]["facetValues"]
+    except (KeyError, IndexError):
+        return None
+    return {r["value"]: r["count"] for r in values}
+
+
+@attr.s(frozen=True)
+class RemoteIndex:
+    """
+    An EBI Search index queried over HTTP. The url must be a template with
+    query and facet placeholders.
+    """
+
+    url: str = attr.ib(validator=is_a(str))
+
+    @property
+    def name(self) -> str:
+        return self.url
+
+    def facets(self, query: str, facet: str) -> ty.Optional[FacetCounts]:
+        return facet_counts(search(self.url, query, facet))
+
+
+def entry_terms(entry) -> ty.Dict[str, ty.Set[str]]:
+    """
+    Get all searchable values of a single search export entry, keyed by the
+    lower case field name.
+    """
+
+    terms: ty.Dict[str, ty.Set[str]] = coll.defaultdict(set)
+    for field in entry.iterfind("./additional_fields/field"):
+        if field.text is not None:
+            terms[field.get("name").lower()].add(field.text)
+    for ref in entry.iterfind("./cross_references/ref"):
+        name = REFERENCE_FIELDS.get(ref.get("dbname"))
+        if name:
+            terms[name].add(ref.get("dbkey"))
+    for name in ["name", "description"]:
+        text = entry.findtext(name)
+        if text is not None:
+            terms[name].add(text)
+    return terms
+
+
+def matcher(query: str) -> ty.Callable[[ty.Dict[str, ty.Set[str]]], bool]:
+    """
+    Build a function which checks if the terms of an entry match the query.
+    Only the query forms used when comparing releases are supported, a single
+    `field:"value"` query or a single word which must appear in any value.
+    """
+
+    match = FIELD_QUERY.match(query)
+    if match:
+        field = match.group("field").lower()
+        value = match.group("value").lower()
+        return lambda terms: any(v.lower() == value for v in terms.get(field, ()))
+
+    if not re.match(r"^\w+$", query):
+        raise ValueError(f"Cannot evaluate query {query} locally")
+    word = re.compile(r"\b%s\b" % re.escape(query), re.IGNORECASE)
+    return lambda terms: any(word.search(v) for vs in terms.values() for v in vs)
+
+
+def top_facets(counts: FacetCounts, count=FACET_COUNT) -> FacetCounts:
+    ordered = sorted(counts.items(), key=lambda i: (-i[1], i[0]))
+    return dict(ordered[:count])
+
+
+def xml_entries(path: Path):
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rb") as raw:
+        for _, entry in etree.iterparse(raw, tag="entry"):
+            yield entry
+            entry.clear()
+            while entry.getprevious() is not None:
+                del entry.getparent()[0]
+
+
+@attr.s()
+class LocalIndex:
+    """
+    The facet counts for a fixed set of queries and facets, computed from the
+    XML files of a search export. This allows comparing an export against a
+    previous one, or against EBI Search, without querying EBI Search for both.
+    """
+
+    name: str = attr.ib(validator=is_a(str))
+    counts: ty.Dict[ty.Tuple[str, str], FacetCounts] = attr.ib(validator=is_a(dict))
+
+    @classmethod
+    def build(
+        cls,
+        paths: ty.Iterable[Path],
+        queries: ty.List[str],
+        facets: ty.List[str],
+        name="local",
+    ) -> "LocalIndex":
+        """
+        Compute the counts for all queries and facets in a single pass over
+        the given XML files.
+        """
+
+        matchers = [(q, matcher(q)) for q in queries]
+        counts: ty.Dict[ty.Tuple[str, str], ty.Counter] = {
+            (q, f): coll.Counter() for q in queries for f in facets
+        }
+        for path in paths:
+            LOGGER.info("Indexing %s", path)
+            for entry in xml_entries(Path(path)):
+                terms = entry_terms(entry)
+                for query, matches in matchers:
+                    if not matches(terms):
+                        continue
+                    for facet in facets:
+                        counts[(query, facet)].update(terms.get(facet.lower(), ()))
+
+        top = {key: top_facets(dict(c)) for key, c in counts.items()}
+        return cls(name=name, counts=top)
+
+    @classmethod
+    def load(cls, handle: ty.IO) -> "LocalIndex":
+        raw = json.load(handle)
+        counts = {(c["query"], c["facet"]): c["counts"] for c in raw["counts"]}
+        return cls(name=raw["name"], counts=counts)
+
+    def dump(self, handle: ty.IO):
+        counts = [
+            {"query": query, "facet": facet, "counts": values}
+            for ((query, facet), values) in self.counts.items()
+        ]
+        json.dump({"name": self.name, "counts": counts}, handle)
+
+    def facets(self, query: str, facet: str) -> ty.Optional[FacetCounts]:
+        return self.counts.get((query, facet))
+
+
+@attr.s(frozen=True, slots=True)
+class FacetChange:
+    value: str = attr.ib(validator=is_a(str))
+    before: int = attr.ib(validator=is_a(int))
+    after: int = attr.ib(validator=is_a(int))
+
+    @property
+    def change(self) -> int:
+        return self.after - self.before
+
+    @property
+    def percent_change(self) -> ty.Optional[float]:
+        if not self.before:
+            return None
+        return self.change * 100 / self.before
+
+    @property
+    def flag(self) -> str:
+        if self.percent_change is None:
+            return "New value"
+        if abs(self.percent_change) > 10:
+            return "Change > 10%"
+        return ""
+
+    def as_row(self) -> ty.List[str]:
+        percent = "NA"
+        if self.percent_change is not None:
+            percent = str(self.percent_change) + "%"
+        return [
+            self.value,
+            str(self.before),
+            str(self.after),
+            str(self.change),
+            percent,
+            self.flag,
+        ]
+
+    def as_dict(self) -> ty.Dict[str, ty.Any]:
+        return {
+            "value": self.value,
+            "before": self.before,
+            "after": self.after,
+            "change": self.change,
+            "percent_change": self.percent_change,
+            "flag": self.flag,
+        }
+
+
+@attr.s(frozen=True, slots=True)
+class Comparison:
+    """
+    The differences in the counts of one facet for one query. If either index
+    failed to produce counts then error describes which one and there are no
+    changes.
+    """
+
+    query: str = attr.ib(validator=is_a(str))
+    facet: str = attr.ib(validator=is_a(str))
+    changes: ty.List[FacetChange] = attr.ib(validator=is_a(list))
+    error: ty.Optional[str] = attr.ib(default=None, validator=optional(is_a(str)))
+
+    @property
+    def flagged(self) -> ty.List[FacetChange]:
+        return [c for c in self.changes if c.flag]
+
+    def as_dict(self) -> ty.Dict[str, ty.Any]:
+        return {
+            "query": self.query,
+            "facet": self.facet,
+            "error": self.error,
+            "changes": [c.as_dict() for c in self.changes],
+        }
+
+
+def compare(
+    query: str,
+    facet: str,
+    before: ty.Optional[FacetCounts],
+    after: ty.Optional[FacetCounts],
+) -> Comparison:
+    """
+    Compare the counts of a facet between two indexes. Values present in
+    either index are compared, values missing from one are counted as 0.
+    """
+
+    missing = [n for (n, c) in [("before", before), ("after", after)] if c is None]
+    if missing:
+        error = "No results from: %s" % ", ".join(missing)
+        return Comparison(query=query, facet=facet, changes=[], error=error)
+
+    assert before is not None and after is not None
+    changes = [
+        FacetChange(value, count, after.get(value, 0))
+        for value, count in before.items()
+    ]
+    for value, count in after.items():
+        if value not in before:
+            changes.append(FacetChange(value, 0, count))
+    return Comparison(query=query, facet=facet, changes=changes)
+
+
+def comparisons(
+    before,
+    after,
+    queries: ty.List[str] = QUERIES,
+    facets: ty.List[str] = FACETS,
+    workers: int = 8,
+) -> ty.List[Comparison]:
+    """
+    Compare all facets for all queries between the two indexes. The requests
+    to both indexes are made concurrently by at most `workers` threads.
+    """
+
+    pairs = [(query, facet) for query in queries for facet in facets]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        found_before = executor.map(lambda p: before.facets(*p), pairs)
+        found_after = executor.map(lambda p: after.facets(*p), pairs)
+        return [
+            compare(query, facet, b, a)
+            for ((query, facet), b, a) in zip(pairs, found_before, found_after)
+        ]
+
+
+def write_tsv(report: ty.List[Comparison], output: ty.IO):
+    for comparison in report:
         output.write(
-            "\t".join(
-                [
-                    facet,
-                    str(before),
-                    str(after),
-                    str(change),
-                    str(percent_change) + "%",
-                    flag,
-                ]
-            )
+            "\n\nQuery: %s\nFacet: %s\n" % (comparison.query, comparison.facet)
         )
-        output.write("\n")
-
-
-def write(output: ty.IO):
-    """ """
-    index1 = ("http://www.ebi.ac.uk/ebisearch/ws/rest/rnacentral"
-                + "?query={query}&format=json&facetfields={facet}&facetcount=30")
-    index2 = index1.replace("http://www.", "http://wwwdev.")
-    queries = ["RNA", 'TAXONOMY:"9606"'] + EXPERT_DATABASES
-    facets = ["rna_type", "has_genomic_coordinates"]
-    for query in queries:
-        for facet in facets:
-            results1 = search(index1, query, facet)
-            results2 = search(index2, query, facet)
-            output.write("\n\nQuery: %s\nFacet: %s\n" % (query, facet))
-            compare(output, results1, results2, facet)
+        if comparison.error:
+            output.write(comparison.error)
+            output.write("\n")
+        for change in comparison.changes:
+            output.write("\t".join(change.as_row()))
+            output.write("\n")
+
+
+def write_json(report: ty.List[Comparison], output: ty.IO):
+    json.dump([c.as_dict() for c in report], output, indent=2)
+    output.write("\n")
+
+
+def write(
+    output: ty.IO,
+    before=RemoteIndex(PRODUCTION),
+    after=RemoteIndex(DEVELOPMENT),
+    workers=8,
+    format="tsv",
+):
+    """
+    Compare two search indexes and write the report to the output. By default
+    this compares the production and development EBI Search indexes.
+    """
+
+    report = comparisons(before, after, workers=workers)
+    if format == "json":
+        write_json(report, output)
+    else:
+        write_tsv(report, output)
     output.flush()
@@ -13,8 +13,17 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import heapq
+import itertools as it
 import pickle
+import tempfile
 import threading
+import typing as ty
+from pathlib import Path
+
+import more_itertools as more
+
+SORT_RUN_SIZE = 100000
 
 
 def pickle_stream(stream, handle, *args, **kwargs):
@@ -30,6 +39,48 @@ def unpickle_stream(handle, *args, **kwargs):
         return
 
 
+def _merge_runs(paths: ty.List[Path], key) -> ty.Iterator[ty.Any]:
+    handles = [path.open("rb") for path in paths]
+    try:
+        streams = [unpickle_stream(handle) for handle in handles]
+        yield from heapq.merge(*streams, key=key)
+    finally:
+        for handle in handles:
+            handle.close()
+
+
+def external_sort(
+    items: ty.Iterable[ty.Any],
+    key=None,
+    run_size=SORT_RUN_SIZE,
+    directory=None,
+) -> ty.Iterator[ty.Any]:
+    """
+    Sort the items using at most run_size items in memory. The items are
+    split into sorted runs which are pickled to temporary files, in the given
+    directory, and then merged. The sort is stable, so this produces the same
+    order as `sorted(items, key=key)`. If there are fewer than run_size
+    items nothing is written to disk.
+    """
+
+    runs = more.chunked(items, run_size)
+    first = next(runs, None)
+    if first is None:
+        return
+    if len(first) < run_size:
+        yield from sorted(first, key=key)
+        return
+
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        paths = []
+        for index, run in enumerate(it.chain([first], runs)):
+            path = Path(tmp) / f"run-{index}.pickle"
+            with path.open("wb") as out:
+                pickle_stream(sorted(run, key=key), out)
+            paths.append(path)
+        yield from _merge_runs(paths, key)
+
+
 ## From https://stackoverflow.com/a/46723144/3249000 - make the cache store async objects properly
 class Cacheable:
     def __init__(self, co):
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright [2009-2024] EMBL-European Bioinformatics Institute
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import glob
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from rnacentral_pipeline.cli import ena
+
+TPA_MAPPINGS = "data/ena/tpa/*/mapping.tsv"
+
+FILES = [
+    "data/ena/ncr/wgs/aa/wgs_aacd01_fun.ncr",
+    "data/ena/protein-to-skip.embl",
+]
+
+
+@pytest.mark.cli
+def test_parse_many_notifies_once_about_empty_files(monkeypatch):
+    sent = []
+    monkeypatch.setattr(ena, "send_notification", lambda *a: sent.append(a))
+    runner = CliRunner()
+    mappings = sorted(os.path.abspath(p) for p in glob.glob(TPA_MAPPINGS))
+    files = [os.path.abspath(f) for f in FILES]
+    with runner.isolated_filesystem():
+        with open("mapping.tsv", "w") as out:
+            for mapping in mappings:
+                with open(mapping, "r") as raw:
+                    out.write(raw.read())
+        args = ["parse-many", "--workers", "1", "mapping.tsv", "lengths", "out/ena"]
+        result = runner.invoke(ena.cli, args + files)
+        assert result.exit_code == 0
+        assert not result.exception
+        assert os.path.exists("out/ena/accessions.csv")
+
+    assert len(sent) == 1
+    title, message = sent[0]
+    assert title == "ENA parsing error"
+    assert message.startswith("No entries could be written for 1 of 2 files\n")
@@ -13,6 +13,9 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import itertools as it
+
+import attr
 import pytest
 
 from rnacentral_pipeline.databases import data
@@ -254,3 +257,138 @@ def test_can_build_expected_rna_type_names(rna_type, ans):
         seq_version="1",
     )
     assert entry.human_rna_type() == ans
+
+
+def test_trusted_entry_matches_validated_entry():
+    kwargs = dict(
+        primary_id="a",
+        accession="b",
+        ncbi_tax_id=1,
+        database="A",
+        sequence="ACCGGGGGGGGGGGGGGGGGGGGGGGG",
+        regions=[],
+        rna_type="SO:0000655",
+        url="http://www.google.com",
+        seq_version="1",
+    )
+    assert data.utils.trusted(data.Entry, **kwargs) == data.Entry(**kwargs)
+
+
+def test_trusted_entry_requires_all_mandatory_values():
+    with pytest.raises(TypeError):
+        data.utils.trusted(data.Entry, primary_id="a", accession="b")
+
+
+def test_can_evolve_trusted_entry():
+    entry = data.Entry(
+        primary_id="a",
+        accession="b",
+        ncbi_tax_id=1,
+        database="A",
+        sequence="ACCGGGGGGGGGGGGGGGGGGGGGGGG",
+        regions=[],
+        rna_type="SO:0000655",
+        url="http://www.google.com",
+        seq_version="1",
+    )
+    evolved = data.utils.evolve_trusted(entry, gene="g")
+    assert evolved == attr.evolve(entry, gene="g")
+
+
+def test_validate_all_detects_bad_trusted_entries():
+    entries = [
+        data.utils.trusted(
+            data.Entry,
+            primary_id="a",
+            accession="b",
+            ncbi_tax_id=ncbi_tax_id,
+            database="A",
+            sequence="ACCGGGGGGGGGGGGGGGGGGGGGGGG",
+            regions=[],
+            rna_type="SO:0000655",
+            url="http://www.google.com",
+            seq_version="1",
+        )
+        for ncbi_tax_id in [1, "2"]
+    ]
+    assert data.utils.validate_all(entries[:1]) == entries[:1]
+    with pytest.raises(TypeError):
+        data.utils.validate_all(entries)
+
+
+def test_validate_all_runs_converters():
+    entry = data.utils.trusted(
+        data.Entry,
+        primary_id="a",
+        accession="b",
+        ncbi_tax_id=1,
+        database="mirbase",
+        sequence="ACCGGGGGGGGGGGGGGGGGGGGGGGG",
+        regions=[],
+        rna_type="lncRNA",
+        url="http://www.google.com",
+        seq_version=2,
+    )
+    assert data.utils.validate_all([entry]) == [
+        data.Entry(
+            primary_id="a",
+            accession="b",
+            ncbi_tax_id=1,
+            database="MIRBASE",
+            sequence="ACCGGGGGGGGGGGGGGGGGGGGGGGG",
+            regions=[],
+            rna_type="SO:0001877",
+            url="http://www.google.com",
+            seq_version="2",
+        )
+    ]
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        {"gene": 1},
+        {"rna_type": "SO:bad"},
+        {"seq_version": "a"},
+        {"references": ()},
+    ],
+)
+def test_validate_all_checks_each_value(changes):
+    kwargs = dict(
+        primary_id="a",
+        accession="b",
+        ncbi_tax_id=1,
+        database="A",
+        sequence="ACCGGGGGGGGGGGGGGGGGGGGGGGG",
+        regions=[],
+        rna_type="SO:0000655",
+        url="http://www.google.com",
+        seq_version="1",
+    )
+    entries = [data.utils.trusted(data.Entry, gene="g", **kwargs) for _ in range(3)]
+    kwargs.update(changes)
+    entries.append(data.utils.trusted(data.Entry, **kwargs))
+    with pytest.raises(Exception):
+        data.utils.validate_all(entries)
+
+
+def test_validated_checks_all_batches():
+    entries = [
+        data.utils.trusted(
+            data.Entry,
+            primary_id="a",
+            accession="b",
+            ncbi_tax_id=ncbi_tax_id,
+            database="A",
+            sequence="ACCGGGGGGGGGGGGGGGGGGGGGGGG",
+            regions=[],
+            rna_type="SO:0000655",
+            url="http://www.google.com",
+            seq_version="1",
+        )
+        for ncbi_tax_id in [1, 2, 3, "4"]
+    ]
+    validated = data.utils.validated(entries, batch_size=2)
+    assert list(it.islice(validated, 2)) == entries[:2]
+    with pytest.raises(TypeError):
+        list(validated)
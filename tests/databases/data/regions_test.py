@@ -17,6 +17,7 @@ import six.moves.cPickle as pickle
 
 import pytest
 
+from rnacentral_pipeline.databases.data import utils
 from rnacentral_pipeline.databases.data.regions import *
 
 
@@ -387,3 +388,12 @@ def test_can_serialize_regions_to_and_from_pickle(region):
     assert loaded == data
     assert SequenceRegion(**loaded) == region
     assert pickle.loads(pickle.dumps(region)) == region
+
+
+def test_trusted_exon_is_equal_to_validated():
+    assert Exon.trusted(1, 10) == Exon(start=1, stop=10)
+
+
+def test_validate_all_detects_bad_exons():
+    with pytest.raises(ValueError):
+        utils.validate_all([Exon.trusted(10, 1)])
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright [2009-2024] EMBL-European Bioinformatics Institute
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from pathlib import Path
+
+import attr
+import pytest
+
+from rnacentral_pipeline.databases.ena import batch, context
+
+FILES = [
+    Path("data/ena/ncr/wgs/aa/wgs_aacd01_fun.ncr"),
+    Path("data/ena/ncr/wgs/aa/wgs_abxv02_pro.ncr"),
+    Path("data/ena/protein-to-skip.embl"),
+]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_can_process_many_files(tmp_path, workers):
+    shared = batch.SharedContext(context=context.ContextBuilder().context())
+    counts = batch.process_files(shared, FILES, tmp_path, workers=workers)
+    assert counts["parsed"] == 188 + 103
+    assert counts["empty_files"] == 1
+    with (tmp_path / "accessions.csv").open("r") as raw:
+        accessions = [line.split(",", 1)[0] for line in raw]
+    assert len(accessions) == 188 + 103
+    assert accessions[0] == '"AACD01000002.1:101667..101773:tRNA"'
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+        f"{f.name}.csv" for f in attr.fields(batch.EntryWriter)
+    )
@@ -42,3 +42,27 @@ def test_can_extract_dr_lines():
             dr.DBRef("MD5", "08036e5a2a91e75299436501f4182050", None),
         ],
     }
+
+
+def test_can_split_records_and_extract_dr_lines():
+    with open("data/ena/tpa/mirbase/entry.embl", "r") as raw:
+        data = list(dr.records(raw))
+
+    assert [(r[0], r[1]) for r in data] == [
+        (
+            "LM611181.1:1..180:precursor_RNA",
+            [
+                dr.DBRef("miRBase", "MI0016048", "hsa-mir-3648-1"),
+                dr.DBRef("MD5", "08036e5a2a91e75299436501f4182050", None),
+            ],
+        ),
+        (
+            "LM611890.1:1..180:precursor_RNA",
+            [
+                dr.DBRef("miRBase", "MI0031512", "hsa-mir-3648-2"),
+                dr.DBRef("MD5", "08036e5a2a91e75299436501f4182050", None),
+            ],
+        ),
+    ]
+    assert data[0][2].startswith("ID   LM611181.1:1..180:precursor_RNA;")
+    assert data[0][2].rstrip().endswith("//")
@@ -28,7 +28,6 @@ from rnacentral_pipeline.databases.helpers.hashes import md5
 
 def parse(path):
     builder = context.ContextBuilder()
-    builder.with_dr(path)
     ctx = builder.context()
     return parser.parse(ctx, path)
 
@@ -26,7 +26,6 @@ from rnacentral_pipeline.databases.ena import context, parser, ribovore
 
 def simple_parse(path):
     builder = context.ContextBuilder()
-    builder.with_dr(path)
     ctx = builder.context()
     return parser.parse(ctx, path)
 
@@ -741,7 +740,6 @@ def test_knows_how_to_exclude_or_not(path, id, included):
     ribotyper = path / "ribotyper-results"
     model_lengths = Path("data/ena/to-exclude/model-lengths.csv")
     builder = context.ContextBuilder()
-    builder.with_dr(raw)
     builder.with_ribovore(ribotyper, model_lengths)
     ctx = builder.context()
     data = list(parser.parse(ctx, raw))
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright [2009-2024] EMBL-European Bioinformatics Institute
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import csv
+import io
+
+import pytest
+
+from rnacentral_pipeline.databases.ensembl.metadata import assemblies, core
+from rnacentral_pipeline.databases.ensembl.metadata import databases as db
+
+
+def assembly_rows(url, assembly, taxid):
+    meta = {
+        "species.url": url,
+        "assembly.default": assembly,
+        "assembly.name": assembly,
+        "species.taxonomy_id": taxid,
+        "species.division": "EnsemblVertebrates",
+    }
+    return [{"meta_key": k, "meta_value": v} for k, v in meta.items()]
+
+
+def coordinate_rows(name):
+    return [
+        {
+            "name": name,
+            "coordinate_system": "chromosome",
+            "attrib_value": "1",
+            "attrib_name": "karyotype_rank",
+        }
+    ]
+
+
+def protein_rows(gene):
+    return [
+        {
+            "stable_id": gene,
+            "display_label": gene.lower(),
+            "description": "A protein [Source:HGNC]",
+            "synonym": None,
+        }
+    ]
+
+
+RESULTS = [
+    (
+        "homo_sapiens_core_112_38",
+        [
+            assembly_rows("Homo_sapiens", "GRCh38", 9606),
+            coordinate_rows("1"),
+            protein_rows("ENSG1"),
+        ],
+    ),
+    (
+        "homo_sapiens_alt_core_112_1",
+        [
+            assembly_rows("Homo_sapiens_alt", "Alt", 9606),
+            coordinate_rows("2"),
+            protein_rows("ENSG2"),
+        ],
+    ),
+]
+
+
+@pytest.fixture
+def harvested(monkeypatch):
+    requested = []
+
+    def harvest(connections, queries, **kwargs):
+        requested.append(queries)
+        return iter(RESULTS)
+
+    monkeypatch.setattr(db, "harvest_across_databases", harvest)
+    monkeypatch.setattr(assemblies, "load_known", lambda *args: {})
+    return requested
+
+
+def read(path):
+    with path.open("r") as raw:
+        return list(csv.reader(raw))
+
+
+def test_writes_all_metadata_from_one_harvest(harvested, tmp_path):
+    core.write(
+        io.StringIO(),
+        io.StringIO("assemblies"),
+        io.StringIO("coordinates"),
+        io.StringIO("proteins"),
+        io.StringIO("{}"),
+        io.StringIO(),
+        tmp_path / "out",
+    )
+    assert harvested == [["assemblies", "coordinates", "proteins"]]
+
+    found = read(tmp_path / "out" / "assemblies.csv")
+    assert [(r[0], r[5]) for r in found] == [("GRCh38", "9606")]
+    assert read(tmp_path / "out" / "coordinate_systems.csv") == [
+        ["1", "chromosome", "1", "1", "1"],
+        ["2", "chromosome", "1", "1", "1"],
+    ]
+    assert read(tmp_path / "out" / "proteins.csv") == [
+        ["ENSEMBL:ENSG1", "A protein", "ensg1", "{}"],
+        ["ENSEMBL:ENSG2", "A protein", "ensg2", "{}"],
+    ]
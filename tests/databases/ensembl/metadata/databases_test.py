@@ -13,6 +13,7 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import io
 import json
 import re
 
@@ -39,3 +40,94 @@ def databases():
 @pytest.mark.ensembl
 def test_gets_fly_database(databases):
     assert "drosophila_melanogaster" in databases
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def execute(self, query):
+        self.conn.executed.append((self.conn.database, query))
+        self.query = query
+
+    def fetchall(self):
+        if self.query == "show databases":
+            return [(name,) for name in sorted(FakeConnection.names)]
+        return [{"database": self.conn.database, "query": self.query}]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    names = [
+        "homo_sapiens_core_112_38",
+        "homo_sapiens_core_111_38",
+        "mus_musculus_core_112_39",
+        "danio_rerio_core_112_11",
+    ]
+    created = []
+
+    def __init__(self, **spec):
+        self.spec = spec
+        self.database = None
+        self.executed = []
+        self.closed = False
+        FakeConnection.created.append(self)
+
+    def cursor(self, cursor=None):
+        return FakeCursor(self)
+
+    def select_db(self, database):
+        self.database = database
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_mysql(monkeypatch):
+    FakeConnection.created = []
+    monkeypatch.setattr(pymysql, "Connection", FakeConnection)
+    return FakeConnection
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_harvest_queries_each_database_in_order(fake_mysql, workers):
+    results = list(db.harvest({"host": "x"}, ["q1", "q2"], workers=workers))
+    assert [name for name, _ in results] == [
+        "danio_rerio_core_112_11",
+        "homo_sapiens_core_112_38",
+        "mus_musculus_core_112_39",
+    ]
+    for name, (first, second) in results:
+        assert first == [{"database": name, "query": "q1"}]
+        assert second == [{"database": name, "query": "q2"}]
+    assert len(fake_mysql.created) <= workers + 1
+    assert all(c.closed for c in fake_mysql.created)
+
+
+def test_harvest_reuses_cached_results(fake_mysql):
+    cache = {}
+    first = list(db.harvest({"host": "x"}, ["q1"], cache=cache))
+    fake_mysql.created = []
+    second = list(db.harvest({"host": "x"}, ["q1"], cache=cache))
+    assert first == second
+    executed = [q for c in fake_mysql.created for (_, q) in c.executed]
+    assert executed == ["show databases"]
+
+
+def test_harvest_across_databases_runs_all_queries_together(fake_mysql):
+    connections = {"ensembl": {"host": "x", "command": "mysql"}, "rfam": {}}
+    handle = io.StringIO(json.dumps(connections))
+    results = list(db.harvest_across_databases(handle, ["q1", "q2", "q3"]))
+    assert len(results) == 3
+    for name, rows in results:
+        assert [r[0]["query"] for r in rows] == ["q1", "q2", "q3"]
+    assert all(c.spec == {"host": "x"} for c in fake_mysql.created)
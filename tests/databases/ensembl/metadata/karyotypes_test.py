@@ -12,16 +12,53 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 """
-import asyncio
+
+import io
+import json
+
 import pytest
 
 from rnacentral_pipeline.databases.ensembl.metadata import karyotypes as karyo
 
 
 def karyotype(domain, species):
-    raw = asyncio.run(karyo.fetch(species, domain))
+    raw = karyo.RestSource(domain).assembly(species)
     return karyo.process(raw)
 
+
+@pytest.fixture
+def saved(tmp_path):
+    (tmp_path / "assembly").mkdir()
+    (tmp_path / "data.json").write_text(json.dumps({"releases": [112]}))
+    species = {"species": [{"name": "homo_sapiens"}, {"name": "mus_musculus"}]}
+    (tmp_path / "species.json").write_text(json.dumps(species))
+    for name, assembly in [("homo_sapiens", "GRCh38"), ("mus_musculus", "GRCm39")]:
+        raw = {
+            "default_coord_system_version": assembly,
+            "top_level_region": [
+                {"name": "MT", "length": 10, "coord_system": "chromosome"},
+                {
+                    "name": "1",
+                    "length": 20,
+                    "coord_system": "chromosome",
+                    "bands": [{"id": "p1", "start": 1, "end": 20, "stain": "acen"}],
+                },
+            ],
+        }
+        (tmp_path / "assembly" / f"{name}.json").write_text(json.dumps(raw))
+    return tmp_path
+
+
+class CountingSource(karyo.DirectorySource):
+    def __init__(self, path):
+        super().__init__(path)
+        self.fetched = []
+
+    def assembly(self, species):
+        self.fetched.append(species)
+        return super().assembly(species)
+
+
 @pytest.mark.ensembl
 @pytest.mark.network
 def test_builds_empty_karyotype_for_missing_data():
@@ -37,6 +74,7 @@ def test_builds_empty_karyotype_for_missing_data():
         ],
     }
 
+
 @pytest.mark.ensembl
 @pytest.mark.network
 def test_builds_with_known_bands():
@@ -67,3 +105,56 @@ def test_builds_with_known_bands():
             {"type": "gvar", "id": "q12", "start": 26600001, "end": 57227415},
         ],
     }
+
+
+def test_can_fetch_from_a_directory(saved):
+    found = list(karyo.fetch_all(karyo.DirectorySource(saved)))
+    assert [assembly for assembly, _ in found] == ["GRCh38", "GRCm39"]
+    assert found[0][1] == {
+        "MT": {"size": 10, "bands": [{"start": 1, "end": 10}]},
+        "1": {
+            "size": 20,
+            "bands": [{"id": "p1", "start": 1, "end": 20, "type": "acen"}],
+        },
+    }
+
+
+def test_only_fetches_allowed_species(saved):
+    source = CountingSource(saved)
+    found = list(karyo.fetch_all(source, allowed={"mus_musculus"}))
+    assert [assembly for assembly, _ in found] == ["GRCm39"]
+    assert source.fetched == ["mus_musculus"]
+
+
+def test_uses_cache_until_release_changes(saved, tmp_path):
+    cache_path = str(tmp_path / "karyotypes.sqlite")
+    out = io.StringIO()
+    karyo.write(out, sources=[CountingSource(saved)], cache_path=cache_path)
+
+    source = CountingSource(saved)
+    cached = io.StringIO()
+    karyo.write(cached, sources=[source], cache_path=cache_path)
+    assert source.fetched == []
+    assert cached.getvalue() == out.getvalue()
+    assert out.getvalue().startswith("GRCh38,")
+
+    (saved / "data.json").write_text(json.dumps({"releases": [113]}))
+    source = CountingSource(saved)
+    karyo.write(io.StringIO(), sources=[source], cache_path=cache_path, workers=1)
+    assert source.fetched == ["homo_sapiens", "mus_musculus"]
+
+
+def test_keeps_fetched_karyotypes_if_a_species_fails(saved, tmp_path):
+    cache_path = str(tmp_path / "karyotypes.sqlite")
+    mouse = saved / "assembly" / "mus_musculus.json"
+    raw = mouse.read_text()
+    mouse.unlink()
+    with pytest.raises(FileNotFoundError):
+        karyo.write(
+            io.StringIO(), sources=[CountingSource(saved)], cache_path=cache_path
+        )
+
+    mouse.write_text(raw)
+    source = CountingSource(saved)
+    karyo.write(io.StringIO(), sources=[source], cache_path=cache_path)
+    assert source.fetched == ["mus_musculus"]
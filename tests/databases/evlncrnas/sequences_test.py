@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright [2009-2024] EMBL-European Bioinformatics Institute
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import attr
+import pandas as pd
+
+from rnacentral_pipeline.databases.evlncrnas import parser
+from rnacentral_pipeline.databases.evlncrnas import sequences as seq
+
+
+@attr.s()
+class CountingSource(seq.MappingSource):
+    requested = attr.ib(factory=list)
+
+    def fetch(self, ids):
+        self.requested.append(list(ids))
+        return super().fetch(ids)
+
+
+def test_resolver_fetches_missing_ids_in_batches():
+    source = CountingSource({"A": 1, "B": 2, "C": 3}, batch_size=2)
+    resolver = seq.Resolver(source, workers=2)
+    assert resolver.resolve(["C", "A", "B", "D", "A"]) == {"A": 1, "B": 2, "C": 3}
+    assert sorted(source.requested) == [["A", "B"], ["C", "D"]]
+
+
+def test_resolver_uses_and_fills_the_cache():
+    source = CountingSource({"A": 1, "B": 2})
+    cache = {"ncbi:A": 10}
+    resolver = seq.Resolver(source, cache=cache, prefix="ncbi:")
+    assert resolver.resolve(["A", "B", "C"]) == {"A": 10, "B": 2}
+    assert source.requested == [["B", "C"]]
+    assert cache == {"ncbi:A": 10, "ncbi:B": 2}
+
+
+def test_resolvers_can_reuse_a_cache_offline(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    with seq.resolvers(path, offline=True) as (ncbi, _):
+        ncbi.cache["ncbi:A"] = ("A.1", "ACGT")
+        ncbi.cache.commit()
+    with seq.resolvers(path, offline=True) as (ncbi, ensembl):
+        assert ncbi.resolve(["A", "B"]) == {"A": ("A.1", "ACGT")}
+        assert ensembl.resolve(["A"]) == {}
+
+
+def test_split_batch_only_loses_failing_ids():
+    def fetch(ids):
+        if "bad" in ids:
+            return seq.split_batch(fetch, ids)
+        return {i: i.upper() for i in ids}
+
+    assert fetch(["a", "bad", "b", "c"]) == {"a": "A", "b": "B", "c": "C"}
+
+
+def test_can_get_ncbi_sequences():
+    resolver = seq.Resolver(
+        seq.MappingSource(
+            {
+                "NR_1": ("NR_1.1", "AAA"),
+                "NR_1.1": ("NR_1.1", "AAA"),
+                "NR_2": ("NR_2.1", "CCC"),
+            }
+        )
+    )
+    frame = pd.DataFrame(
+        {
+            "ID": [1, 2, 3],
+            "NCBI accession": ["NR_1, NR_1.1, NR_2", "NR_3", "NR_2"],
+        }
+    )
+    found, missing = parser.get_ncbi_accessions(frame, resolver)
+    assert found[["ID", "sequence"]].values.tolist() == [
+        [1, "AAA"],
+        [1, "CCC"],
+        [3, "CCC"],
+    ]
+    assert missing["ID"].tolist() == [2]
+
+
+def test_can_get_ensembl_sequences():
+    location = ("ACGT", "GRCh38", "1", "10", "13", "1")
+    resolver = seq.Resolver(seq.MappingSource({"ENSG1": location}))
+    frame = pd.DataFrame({"ID": [1, 2], "Ensembl": ["ENSG1", "ENSG2"]})
+    found, missing = parser.get_ensembl_accessions(frame, resolver)
+    assert found["ID"].tolist() == [1]
+    assert tuple(found.iloc[0][["sequence", "assembly_id", "chain"]]) == (
+        "ACGT",
+        "GRCh38",
+        "1",
+    )
+    assert missing["ID"].tolist() == [2]
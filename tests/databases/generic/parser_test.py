@@ -13,6 +13,9 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import io
+import json
+
 import pytest
 
 from rnacentral_pipeline.databases.generic.parser import parse
@@ -35,3 +38,35 @@ def test_runs_validation_on_data():
 def test_can_parse_v0_2_0_data(filename, count):
     with open(filename, "rb") as raw:
         assert len(list(parse(raw))) == count
+
+
+def test_can_transform_records_while_parsing():
+    def only_one(ncrna):
+        if ncrna["primaryId"] == "FLYBASE:FBtr0346876":
+            ncrna["url"] = "http://example.com"
+            return ncrna
+        return None
+
+    with open("data/json-schema/v020/flybase.json", "rb") as raw:
+        data = list(parse(raw, transform=only_one))
+    assert len(data) == 1
+    assert data[0].accession == "FLYBASE:FBtr0346876"
+    assert data[0].url == "http://example.com"
+
+
+def test_can_parse_text_handles_with_metadata_after_data():
+    with open("data/json-schema/v020/flybase.json", "r") as raw:
+        assert len(list(parse(raw))) == 5
+
+
+@pytest.mark.parametrize(
+    "raw,message",
+    [
+        ({"metaData": {"schemaVersion": "0.2.0"}, "data": []}, "Missing data"),
+        ({"data": [{"primaryId": "A"}]}, "schema version"),
+        ({"metaData": {"schemaVersion": "3.0.0"}, "data": [{}]}, "Unknown schema"),
+    ],
+)
+def test_rejects_invalid_files(raw, message):
+    with pytest.raises(ValueError, match=message):
+        parse(io.BytesIO(json.dumps(raw).encode()))
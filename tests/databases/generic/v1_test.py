@@ -2820,3 +2820,42 @@ def test_does_get_correct_lncbook_genes():
             ],
         )
     )
+
+
+@attr.s(frozen=True)
+class Transcript:
+    accession = attr.ib()
+    related_sequences = attr.ib(factory=list)
+
+
+def isoform(accession):
+    return dat.RelatedSequence(sequence_id=accession, relationship="isoform")
+
+
+def test_relates_all_transcripts_of_a_gene():
+    given = dat.RelatedSequence(sequence_id="X", relationship="precursor")
+    entries = [Transcript("A", [given]), Transcript("B"), Transcript("C")]
+    assert v1.add_related_by_gene(entries) == [
+        Transcript("A", [given, isoform("B"), isoform("C")]),
+        Transcript("B", [isoform("A"), isoform("C")]),
+        Transcript("C", [isoform("A"), isoform("B")]),
+    ]
+
+
+def test_does_not_relate_transcripts_with_the_same_accession():
+    entries = [Transcript("A"), Transcript("B"), Transcript("A")]
+    assert v1.add_related_by_gene(entries) == [
+        Transcript("A", [isoform("B")]),
+        Transcript("B", [isoform("A"), isoform("A")]),
+        Transcript("A", [isoform("B")]),
+    ]
+
+
+def test_lncipedia_isoforms_do_not_depend_on_the_run_size():
+    filename = "data/json-schema/v020/lncipedia-with-isoforms.json"
+    with open(filename, "r") as raw:
+        expected = [attr.asdict(e) for e in v1.parse(json.load(raw))]
+    with open(filename, "r") as raw:
+        data = json.load(raw)
+    found = v1.parse_records(data["metaData"], data["data"], run_size=1)
+    assert [attr.asdict(e) for e in found] == expected
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright [2009-2024] EMBL-European Bioinformatics Institute
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import pytest
+from sqlitedict import SqliteDict
+
+from rnacentral_pipeline.databases.helpers import gtdb
+from rnacentral_pipeline.databases.helpers import phylogeny as phy
+from rnacentral_pipeline.databases.ncbi import taxonomy
+
+SPECIES = "d__Bacteria;p__Firmicutes_A;c__Clostridia;o__Oscillospirales;f__Acutalibacteraceae;g__Eubacterium_R;s__Eubacterium_R sp000437335"
+GENUS = "d__Bacteria;p__Bacteroidota;c__Bacteroidia;o__Bacteroidales;f__UBA932;g__Cryptobacteroides;s__"
+UNKNOWN = "d__Bacteria;p__UBA6262;c__UBA6262;o__;f__;g__;s__"
+
+NAMES = {
+    "eubacterium sp000437335": 1000,
+    "uncultured cryptobacteroides sp.": 2000,
+}
+
+
+class CountingLookup:
+    def __init__(self, names):
+        self.names = names
+        self.requested = []
+
+    def __call__(self, name):
+        self.requested.append(name)
+        try:
+            return self.names[name.lower()]
+        except KeyError:
+            raise phy.UnknownTaxonId(name)
+
+
+def test_local_taxonomy_finds_names_ignoring_case():
+    local = gtdb.LocalTaxonomy(NAMES)
+    assert local("Eubacterium sp000437335") == 1000
+    with pytest.raises(phy.UnknownTaxonId):
+        local("Eubacterium")
+
+
+def test_resolves_each_distinct_lineage_once():
+    lookup = CountingLookup(NAMES)
+    resolver = gtdb.LineageResolver(table={}, taxid=lookup)
+    resolved = resolver.resolve_all([SPECIES, GENUS, SPECIES, UNKNOWN, GENUS])
+    assert resolved == {SPECIES: 1000, GENUS: 2000, UNKNOWN: None}
+    assert lookup.requested.count("Eubacterium sp000437335") == 1
+    assert resolver.table == {SPECIES: 1000, GENUS: 2000, UNKNOWN: None}
+
+
+def test_reuses_stored_lineages(tmp_path):
+    cache = str(tmp_path / "lineages.sqlite")
+    resolver = gtdb.LineageResolver.build(cache=cache, taxid=CountingLookup(NAMES))
+    resolver.resolve_all([SPECIES, GENUS])
+    resolver.close()
+
+    lookup = CountingLookup({})
+    resolver = gtdb.LineageResolver.build(cache=cache, taxid=lookup)
+    assert resolver.resolve_all([SPECIES, GENUS]) == {SPECIES: 1000, GENUS: 2000}
+    assert lookup.requested == []
+    resolver.close()
+
+
+def test_does_not_retry_unresolved_lineages_by_default(tmp_path):
+    cache = str(tmp_path / "lineages.sqlite")
+    resolver = gtdb.LineageResolver.build(cache=cache, taxid=CountingLookup({}))
+    assert resolver.resolve_all([UNKNOWN]) == {UNKNOWN: None}
+    resolver.close()
+
+    lookup = CountingLookup(NAMES)
+    resolver = gtdb.LineageResolver.build(cache=cache, taxid=lookup)
+    assert resolver.resolve_all([UNKNOWN, SPECIES]) == {UNKNOWN: None, SPECIES: 1000}
+    assert lookup.requested == ["Eubacterium sp000437335"]
+    resolver.close()
+
+
+def test_can_retry_unresolved_lineages(tmp_path):
+    cache = str(tmp_path / "lineages.sqlite")
+    resolver = gtdb.LineageResolver.build(cache=cache, taxid=CountingLookup({}))
+    assert resolver.resolve_all([GENUS]) == {GENUS: None}
+    resolver.close()
+
+    resolver = gtdb.LineageResolver.build(
+        cache=cache,
+        taxid=CountingLookup(NAMES),
+        retry_unresolved=True,
+    )
+    assert resolver.resolve_all([GENUS]) == {GENUS: 2000}
+    assert resolver.table[GENUS] == 2000
+    resolver.close()
+
+
+def test_closes_the_name_index(tmp_path):
+    path = str(tmp_path / "names.sqlite")
+    with SqliteDict(filename=path) as names:
+        names.update(NAMES)
+        names.commit()
+
+    resolver = gtdb.LineageResolver.build(taxonomy=path)
+    assert resolver.resolve_all([SPECIES]) == {SPECIES: 1000}
+    resolver.close()
+    assert resolver.taxid.names.conn is None
+
+
+def test_name_index_prefers_scientific_names():
+    entries = [
+        taxonomy.TaxonomyEntry(1, "Alpha", "root; ", ["beta"], None),
+        taxonomy.TaxonomyEntry(2, "Beta", "root; ", [], None),
+        taxonomy.TaxonomyEntry(3, "Alpha", "root; ", [], 1),
+    ]
+    assert taxonomy.name_index(entries) == {"alpha": 1, "beta": 2}
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright [2009-2024] EMBL-European Bioinformatics Institute
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import pytest
+
+from rnacentral_pipeline.databases.lncbook import parser
+
+
+def exon(chromosome):
+    return {
+        "chromosome": chromosome,
+        "startPosition": 1,
+        "endPosition": 10,
+        "strand": "+",
+    }
+
+
+def test_keeps_only_grch38_locations():
+    ncrna = {
+        "sequence": "acgu",
+        "genomeLocations": [
+            {"assembly": "GRCh37", "exons": [exon("chr1")]},
+            {"assembly": "GRCh38", "exons": [exon("chr2")]},
+        ],
+    }
+    assert parser.as_grch38(ncrna) == {
+        "sequence": "ACGU",
+        "genomeLocations": [{"assembly": "GRCh38", "exons": [exon("chr2")]}],
+    }
+
+
+@pytest.mark.parametrize("chromosome", ["M", "chrM"])
+def test_renames_mitochondrial_chromosome(chromosome):
+    ncrna = {
+        "sequence": "ACGU",
+        "genomeLocations": [{"assembly": "GRCh38", "exons": [exon(chromosome)]}],
+    }
+    data = parser.as_grch38(ncrna)
+    assert data["genomeLocations"][0]["exons"] == [exon("MT")]
+
+
+def test_skips_records_without_grch38_locations():
+    ncrna = {
+        "sequence": "ACGU",
+        "genomeLocations": [{"assembly": "GRCh37", "exons": [exon("chr1")]}],
+    }
+    assert parser.as_grch38(ncrna) is None
+
+
+def test_fails_if_no_records_are_from_grch38():
+    with open("data/json-schema/v020/lncbook.json", "rb") as raw:
+        with pytest.raises(ValueError, match="GRCh38"):
+            list(parser.parse(raw))
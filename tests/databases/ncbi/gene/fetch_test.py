@@ -47,3 +47,51 @@ def test_can_fetch_ncrnas():
     # from here on out.
     total = sum(1 for ncrna in fetch.raw())
     assert total >= 2534341
+
+
+def fake_ncrnas():
+    with open("data/ncbi_gene/simple.txt") as raw:
+        return list(helpers.ncrnas(raw))
+
+
+class FakeSequences:
+    def __init__(self):
+        self.requested = []
+
+    def __call__(self, batch, limiter=None):
+        ids = [helpers.gene_id(ncrna) for ncrna in batch]
+        self.requested.append(ids)
+        return {gene_id: f"seq-{gene_id}" for gene_id in ids}
+
+
+def test_fetcher_batches_all_genes(monkeypatch):
+    fake = FakeSequences()
+    monkeypatch.setattr(fetch, "sequences", fake)
+    ncrnas = fake_ncrnas()
+    fetcher = fetch.Fetcher(workers=2, batch_size=4)
+    found = {helpers.gene_id(n): n["sequence"] for n in fetcher.data(ncrnas)}
+    assert found == {helpers.gene_id(n): f"seq-{helpers.gene_id(n)}" for n in ncrnas}
+    assert [len(ids) for ids in fake.requested] == [4, 4, 3]
+
+
+def test_fetcher_only_fetches_changed_genes(monkeypatch):
+    fake = FakeSequences()
+    monkeypatch.setattr(fetch, "sequences", fake)
+    ncrnas = fake_ncrnas()
+    cache = {}
+    list(fetch.Fetcher(cache=cache, workers=1).data(ncrnas))
+    assert len(cache) == len(ncrnas)
+
+    changed = helpers.gene_id(ncrnas[0])
+    date, _ = cache[changed]
+    cache[changed] = ("19000101", "old")
+    fake.requested = []
+    found = list(fetch.Fetcher(cache=cache, workers=1).data(fake_ncrnas()))
+    assert fake.requested == [[changed]]
+    assert len(found) == len(ncrnas)
+    assert cache[changed] == (date, f"seq-{changed}")
+
+
+def test_fetcher_skips_genes_without_sequences(monkeypatch):
+    monkeypatch.setattr(fetch, "sequences", lambda batch, limiter=None: {})
+    assert list(fetch.Fetcher(workers=1).data(fake_ncrnas())) == []
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright [2009-2024] EMBL-European Bioinformatics Institute
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import itertools as it
+import operator as op
+
+import pytest
+
+from rnacentral_pipeline.databases.psi_mi import grouping
+from rnacentral_pipeline.databases.psicquic import parser
+
+
+@pytest.fixture(scope="module")
+def interactions():
+    with open("data/psicquic/data.tsv", "r") as raw:
+        return list(parser.parse_interactions(raw))
+
+
+def fully_sorted(interactions):
+    key = op.attrgetter("urs_taxid")
+    ordered = sorted(interactions, key=key)
+    return [(k, list(g)) for k, g in it.groupby(ordered, key)]
+
+
+@pytest.mark.parametrize("run_size", [1, 2, 3, 100])
+def test_grouped_matches_sorting_everything(interactions, run_size):
+    found = list(grouping.grouped(iter(interactions), run_size=run_size))
+    assert found == fully_sorted(interactions)
+    assert len(found) == 9
+
+
+def test_grouped_handles_no_interactions():
+    assert list(grouping.grouped(iter([]))) == []
+
+
+def test_looks_up_sequence_info_in_batches(interactions):
+    requested = []
+
+    def mapping(ids):
+        requested.append(ids)
+        return {i: {"id": i} for i in ids}
+
+    groups = fully_sorted(interactions)
+    found = list(grouping.with_sequence_info(iter(groups), mapping, batch_size=4))
+    assert [len(r) for r in requested] == [4, 4, 1]
+    assert [(k, i) for (k, i, _) in found] == groups
+    assert all(info == {"id": k} for (k, _, info) in found)
+
+
+def test_fails_if_sequence_info_is_missing(interactions):
+    groups = fully_sorted(interactions)
+    with pytest.raises(ValueError):
+        list(grouping.with_sequence_info(iter(groups), lambda ids: {}))
@@ -122,3 +122,53 @@ def test_parses_data_correctly(raw, expected):
 def test_can_parse_all_data(filename, count):
     with open(filename, "r") as raw:
         assert sum(1 for x in tab.parse(raw)) == count
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        "uniprotkb",
+        "uniprotkb:P12345|",
+        "uniprotkb:P12345(protein",
+    ],
+)
+def test_fails_to_parse_invalid_identifiers(raw):
+    with pytest.raises(ValueError):
+        tab.identifiers(raw)
+
+
+@pytest.mark.parametrize(
+    "raw,expected",
+    [
+        ("uniprotkb:", [data.InteractionIdentifier("uniprotkb", "", None)]),
+        (
+            "uniprotkb:|psi-mi:P12345(protein)",
+            [
+                data.InteractionIdentifier("uniprotkb", "", None),
+                data.InteractionIdentifier("psi-mi", "P12345", "protein"),
+            ],
+        ),
+    ],
+)
+def test_identifiers_may_have_no_value(raw, expected):
+    assert tab.identifiers(raw) == expected
+
+
+def test_empty_identifiers_are_empty():
+    assert tab.identifiers("-") == []
+
+
+@pytest.mark.parametrize(
+    "filename",
+    [
+        "data/intact/sample.txt",
+        "data/intact/problems.txt",
+        "data/psicquic/data.tsv",
+    ],
+)
+def test_prefiltering_keeps_all_rnacentral_interactions(filename):
+    with open(filename, "r") as raw:
+        expected = [i for i in tab.parse(raw) if i.involves_rnacentral()]
+    with open(filename, "r") as raw:
+        found = list(tab.parse(raw, rnacentral_only=True))
+    assert found == expected
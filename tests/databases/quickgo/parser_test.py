@@ -74,3 +74,18 @@ def test_can_handle_duplicate_data():
                 ],
             )
         )
+
+
+@pytest.mark.parametrize(
+    "filename",
+    [
+        "data/quickgo/rna.gpa",
+        "data/quickgo/duplicates.gpa",
+    ],
+)
+def test_merging_does_not_depend_on_the_run_size(filename):
+    with open(filename, "r") as raw:
+        expected = [attr.asdict(a) for a in gpi.parse(raw)]
+    with open(filename, "r") as raw:
+        found = [attr.asdict(a) for a in gpi.parse(raw, run_size=2)]
+    assert found == expected
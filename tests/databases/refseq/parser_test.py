@@ -367,3 +367,35 @@ def test_can_deal_with_weird_description():
         data = list(parser.parse(raw))
     assert len(data) == 1
     assert data[0].description == "Brevibacillus halotolerans 16S ribosomal RNA"
+
+
+@attr.s(frozen=True)
+class Fake:
+    optional_id = attr.ib()
+    accession = attr.ib()
+
+
+@pytest.mark.parametrize("run_size", [1, 2, 100])
+def test_groups_entries_by_gene_in_first_seen_order(tmp_path, run_size):
+    entries = [
+        Fake("GeneID:2", "a"),
+        Fake(None, "b"),
+        Fake("GeneID:1", "c"),
+        Fake("GeneID:2", "d"),
+        Fake("GeneID:2", "a"),
+        Fake(None, "e"),
+        Fake("GeneID:1", "f"),
+    ]
+    assert list(parser.grouped(entries, run_size=run_size, directory=tmp_path)) == [
+        [Fake("GeneID:2", "a"), Fake("GeneID:2", "d")],
+        [Fake(None, "b"), Fake(None, "e")],
+        [Fake("GeneID:1", "c"), Fake("GeneID:1", "f")],
+    ]
+
+
+def test_related_refseq_entries_do_not_depend_on_the_run_size():
+    with open("data/refseq/related.gbff", "r") as raw:
+        expected = [attr.asdict(e) for e in parser.parse(raw)]
+    with open("data/refseq/related.gbff", "r") as raw:
+        data = [attr.asdict(e) for e in parser.parse(raw, run_size=1)]
+    assert data == expected
@@ -13,11 +13,15 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import io
 import tempfile
 
 import attr
+import pytest
 
 from rnacentral_pipeline.databases.rfam.infernal_results import (
+    as_csv,
+    csv_rows,
     parse,
     RfamHit,
     RfamClanHit,
@@ -140,3 +144,54 @@ def test_can_parse_clan_specific_output():
             description=None,
         )
     )
+
+
+def test_csv_rows_only_contain_unique_and_best_hits():
+    with open("data/qa/rfam/scan.tbl") as handle:
+        hits = [
+            h
+            for h in parse(handle, clan_competition=True)
+            if h.overlap in {"unique", "best"}
+        ]
+    with open("data/qa/rfam/scan.tbl") as handle:
+        rows = list(csv_rows(handle))
+
+    assert len(rows) == 126
+    assert rows == [
+        [
+            h.seq_name,
+            h.seq_from,
+            h.seq_to,
+            h.strand,
+            h.rfam_acc,
+            h.mdl_from,
+            h.mdl_to,
+            h.overlap,
+            h.e_value,
+            h.score,
+        ]
+        for h in hits
+    ]
+
+
+@pytest.mark.parametrize(
+    "options,count",
+    [
+        ({}, 126),
+        ({"min_score": 60}, 86),
+        ({"max_e_value": 1e-15}, 72),
+        ({"min_score": 100, "max_e_value": 1e-15}, 29),
+    ],
+)
+def test_can_filter_hits_by_score(options, count):
+    with open("data/qa/rfam/scan.tbl") as handle:
+        assert len(list(csv_rows(handle, **options))) == count
+
+
+def test_writes_quoted_csv():
+    output = io.StringIO()
+    with open("data/qa/rfam/scan.tbl") as handle:
+        as_csv(handle, output)
+    assert output.getvalue().split("\n")[0] == (
+        '"URS0000A7785C","2","82","1","RF00641","0","81","unique","3.6e-15","66.5"'
+    )
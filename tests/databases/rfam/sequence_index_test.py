@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright [2009-2024] EMBL-European Bioinformatics Institute
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import io
+import os
+
+import pytest
+
+from rnacentral_pipeline.databases.rfam import parser
+from rnacentral_pipeline.databases.rfam.sequence_index import SequenceIndex
+
+FASTA = """>A/1-4 first
+ACGU
+>B/1-8
+ACGU
+ACGU
+>A/1-4 duplicate
+GGGG
+"""
+
+
+@pytest.fixture
+def fasta(tmp_path):
+    path = tmp_path / "Rfam.fa"
+    path.write_text(FASTA)
+    return path
+
+
+def test_indexes_first_sequence_of_each_id(fasta, tmp_path):
+    index = SequenceIndex.build(fasta, tmp_path / "index.sqlite")
+    assert index.lookup(["A/1-4", "B/1-8", "C/1-2"]) == {
+        "A/1-4": "ACGU",
+        "B/1-8": "ACGUACGU",
+    }
+    index.close()
+
+
+def test_reuses_an_index_built_from_the_same_file(fasta, tmp_path):
+    path = tmp_path / "index.sqlite"
+    SequenceIndex.build(fasta, path).close()
+    index = SequenceIndex.load(fasta, path)
+    index.conn.execute("DELETE FROM sequences WHERE sequence_id = 'B/1-8'")
+    index.conn.commit()
+    index.close()
+
+    index = SequenceIndex.load(fasta, path)
+    assert index.lookup(["B/1-8"]) == {}
+    index.close()
+
+
+def test_rebuilds_an_index_of_a_changed_file(fasta, tmp_path):
+    path = tmp_path / "index.sqlite"
+    SequenceIndex.build(fasta, path).close()
+    fasta.write_text(">C/1-2\nAC\n")
+    stat = fasta.stat()
+    os.utime(fasta, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+    index = SequenceIndex.load(fasta, path)
+    assert index.lookup(["A/1-4", "C/1-2"]) == {"C/1-2": "AC"}
+    index.close()
+
+
+@pytest.mark.parametrize("run_size", [1, 100])
+def test_joins_rows_with_sequences_in_key_order(fasta, tmp_path, run_size):
+    info = io.StringIO("rfamseq_acc\tseq_start\tseq_end\nC\t1\t2\nB\t1\t8\nA\t1\t4\n")
+    index = SequenceIndex.build(fasta, tmp_path / "index.sqlite")
+    found = [
+        (
+            parser.helpers.sequence_id(row),
+            sequences.get(parser.helpers.sequence_id(row)),
+        )
+        for row, sequences in parser.joined(index, info, run_size=run_size)
+    ]
+    index.close()
+    assert found == [("A/1-4", "ACGU"), ("B/1-8", "ACGUACGU"), ("C/1-2", None)]
@@ -16,6 +16,7 @@ limitations under the License.
 import pytest
 
 from rnacentral_pipeline.databases.data import Entry, SequenceFeature
+from rnacentral_pipeline.databases.helpers import gtdb
 from rnacentral_pipeline.databases.tmrna import parser
 
 
@@ -222,3 +223,37 @@ def test_can_parse_file(data):
 )
 def test_can_parse_correctly(data, id, expected):
     assert data[id] == expected
+
+
+def species_names():
+    with open("data/tmrna/example.tsv", "r") as raw:
+        return {parser.inferred_species(r["#ID"]).lower(): 1 for r in parser.rows(raw)}
+
+
+def test_resolves_each_lineage_once_offline():
+    names = species_names()
+    names["paulinella chromatophora"] = 39717
+    taxonomy = gtdb.LocalTaxonomy(names)
+    resolver = gtdb.LineageResolver(
+        table={},
+        taxid=taxonomy,
+        getters=list(gtdb.LINEAGE_GETTERS),
+    )
+    with open("data/tmrna/example.tsv", "r") as raw:
+        entries = {e.primary_id: e for e in parser.parse(raw, resolver=resolver)}
+    assert len(entries) == 108
+    assert entries["tmrna:CP000815.1/744167-744441"].ncbi_tax_id == 39717
+    with open("data/tmrna/example.tsv", "r") as raw:
+        lineages = {parser.tax_string(r) for r in parser.rows(raw)}
+    assert set(resolver.table.keys()) == lineages
+
+
+def test_fails_if_a_lineage_cannot_be_resolved():
+    resolver = gtdb.LineageResolver(
+        table={},
+        taxid=gtdb.LocalTaxonomy({"bacterium": 1869227}),
+        getters=list(gtdb.LINEAGE_GETTERS),
+    )
+    with open("data/tmrna/example.tsv", "r") as raw:
+        with pytest.raises(ValueError):
+            list(parser.parse(raw, resolver=resolver))
@@ -13,14 +13,16 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import io
+
 import attr
 
 import pytest
 
 from rnacentral_pipeline.databases.data import regions
-from rnacentral_pipeline.rnacentral.ftp_export.coordinates import bed
+from rnacentral_pipeline.rnacentral.ftp_export.coordinates import bed, data
 
-from .helpers import fetch_coord
+from .helpers import OFFLINE_REGIONS, fetch_coord
 
 
 def fetch_data(rna_id, assembly):
@@ -237,3 +239,13 @@ def test_gets_correct_bed_starts(upi, assembly, expected):
 )
 def test_gets_generates_expected_writeable(upi, assembly, expected):
     assert fetch_data(upi, assembly).writeable() == expected
+
+
+@pytest.mark.parametrize("raw", OFFLINE_REGIONS)
+@pytest.mark.parametrize("extended", [True, False])
+def test_formatted_line_matches_bed_entry(raw, extended):
+    region = data.Region.build(0, raw)
+    for given in [region, region.as_zero_based()]:
+        out = io.StringIO()
+        bed.write_bed_text([bed.BedEntry.from_coordinate(given)], out, extended)
+        assert bed.format_line(given, extended=extended) + "\n" == out.getvalue()
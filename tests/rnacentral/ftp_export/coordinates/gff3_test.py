@@ -20,9 +20,9 @@ from collections import OrderedDict
 import pytest
 from gffutils import Feature
 
-from rnacentral_pipeline.rnacentral.ftp_export.coordinates import gff3
+from rnacentral_pipeline.rnacentral.ftp_export.coordinates import data, gff3
 
-from .helpers import fetch_coord, fetch_all
+from .helpers import OFFLINE_REGIONS, fetch_all, fetch_coord
 
 
 def fetch_data(rna_id, assembly):
@@ -174,3 +174,12 @@ def test_can_build_feature_for_mapped():
 @pytest.mark.xfail()
 def test_can_build_correct_features_for_expert_db_location():
     assert False
+
+
+@pytest.mark.parametrize("raw", OFFLINE_REGIONS)
+def test_formatted_lines_match_features(raw):
+    region = data.Region.build(0, raw)
+    for given in [region, region.as_zero_based()]:
+        lines = list(gff3.region_as_lines(given))
+        assert lines == [str(f) for f in gff3.regions_as_features([given])]
+        assert len(lines) == len(raw["exons"]) + 1
@@ -49,3 +49,37 @@ def fetch_all(assembly):
             take_all=True,
         )
     )
+
+
+def raw_region(**changes):
+    raw = {
+        "rna_id": "URS000082BE64_9606",
+        "assembly_id": "GRCh38",
+        "chromosome": "3",
+        "strand": -1,
+        "exons": [
+            {"exon_start": 32676300, "exon_stop": 32676410},
+            {"exon_start": 32676136, "exon_stop": 32676226},
+        ],
+        "identity": None,
+        "was_mapped": False,
+        "description": "Homo sapiens small nucleolar RNA; SNORD5, C/D box 5",
+        "rna_type": "snoRNA",
+        "providing_databases": ["snOPY", "Ensembl"],
+        "databases": ["snOPY", "Ensembl"],
+    }
+    raw.update(changes)
+    return raw
+
+
+OFFLINE_REGIONS = [
+    raw_region(),
+    raw_region(chromosome="MT", strand=1, exons=[{"exon_start": 1, "exon_stop": 1}]),
+    raw_region(
+        was_mapped=True,
+        identity=0.98,
+        providing_databases=[],
+        description='tab\tand=100%, "quoted"',
+        databases=[],
+    ),
+]
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright [2009-2024] EMBL-European Bioinformatics Institute
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import gzip
+import io
+
+import pytest
+from Bio import bgzf
+
+from rnacentral_pipeline.rnacentral.ftp_export.coordinates import shards
+
+ASSEMBLY = shards.Assembly("GRCh38", "homo_sapiens", 9606)
+
+
+def test_can_read_assemblies():
+    raw = io.StringIO("GRCh38,homo_sapiens,9606\nGRCm39,mus_musculus,10090\n")
+    assert shards.Assembly.from_file(raw) == [
+        ASSEMBLY,
+        shards.Assembly("GRCm39", "mus_musculus", 10090),
+    ]
+
+
+@pytest.mark.parametrize(
+    "counts,expected",
+    [
+        ([], []),
+        ([("1", 10)], [(("1",), 0, 10)]),
+        (
+            [("1", 10), ("2", 3), ("3", 4), ("4", 1)],
+            [(("1",), 0, 10), (("2", "3"), 10, 7), (("4",), 17, 1)],
+        ),
+        (
+            [("1", 1), ("2", 1), ("3", 1)],
+            [(("1", "2", "3"), 0, 3)],
+        ),
+    ],
+)
+def test_can_plan_shards(counts, expected):
+    planned = shards.plan(ASSEMBLY, counts, shard_size=5)
+    assert [(s.chromosomes, s.offset, s.size) for s in planned] == expected
+
+
+def test_merges_sorted_shards(tmp_path):
+    first = tmp_path / "first.bed"
+    first.write_text("chr1\t10\tURS1\nchr1\t200\tURS3\n")
+    second = tmp_path / "second.bed"
+    second.write_text("chr1\t50\tURS2\nchr2\t5\tURS4\n")
+    out = io.StringIO()
+    shards.merge_files([first, second], shards.bed_key, out)
+    assert out.getvalue() == (
+        "chr1\t10\tURS1\nchr1\t50\tURS2\nchr1\t200\tURS3\nchr2\t5\tURS4\n"
+    )
+
+
+def test_writes_sorted_gff3_lines(tmp_path):
+    path = tmp_path / "shard.gff3"
+    lines = [
+        "2\tRNAcentral\ttranscript\t30\t40\t.\t+\t.\tID=b",
+        "10\tRNAcentral\ttranscript\t5\t40\t.\t+\t.\tID=c",
+        "2\tRNAcentral\ttranscript\t4\t40\t.\t+\t.\tID=a",
+    ]
+    shards.write_sorted(lines, shards.gff3_key, path)
+    assert path.read_text().splitlines() == [lines[1], lines[2], lines[0]]
+
+
+def test_sorts_shards_larger_than_a_run(tmp_path):
+    path = tmp_path / "shard.bed"
+    lines = ["chr2\t5\tURS4", "chr1\t200\tURS3", "chr1\t10\tURS1", "chr1\t50\tURS2"]
+    shards.write_sorted(lines, shards.bed_key, path, directory=tmp_path, run_size=2)
+    assert path.read_text().splitlines() == [lines[2], lines[3], lines[1], lines[0]]
+    assert [p.name for p in tmp_path.iterdir()] == ["shard.bed"]
+
+
+def test_merges_into_published_files(tmp_path):
+    first = tmp_path / "first.gff3"
+    first.write_text(
+        "1\tRNAcentral\tnoncoding_exon\t10\t20\t.\t+\t.\tID=a:ncRNA_exon1\n"
+    )
+    second = tmp_path / "second.gff3"
+    second.write_text("1\tRNAcentral\ttranscript\t5\t40\t.\t+\t.\tID=b\n")
+    bed = tmp_path / "shard.bed"
+    bed.write_text("1\t4\t40\tURS1\n")
+    outputs = [
+        shards.ShardOutput(shards.Shard(ASSEMBLY, ("1",), 0, 1), bed, first),
+        shards.ShardOutput(shards.Shard(ASSEMBLY, ("1",), 1, 1), bed, second),
+    ]
+    output = tmp_path / "out"
+    shards.merge(ASSEMBLY, outputs, output)
+
+    with gzip.open(output / "bed" / "homo_sapiens.GRCh38.bed.gz", "rt") as raw:
+        assert raw.read() == "1\t4\t40\tURS1\n1\t4\t40\tURS1\n"
+
+    with gzip.open(output / "gff3" / "homo_sapiens.GRCh38.gff3.gz", "rt") as raw:
+        assert raw.read() == (
+            "##gff-version 3\n"
+            "1\tRNAcentral\ttranscript\t5\t40\t.\t+\t.\tID=b\n"
+            "1\tRNAcentral\tnoncoding_exon\t10\t20\t.\t+\t.\tID=a:ncRNA_exon1\n"
+        )
+
+    igv = output / "igv" / "homo_sapiens.GRCh38.rnacentral.gff3.gz"
+    with bgzf.BgzfReader(str(igv), "r") as raw:
+        assert "".join(raw) == (
+            "##gff-version 3\n"
+            "1\tRNAcentral\ttranscript\t5\t40\t.\t+\t.\tID=b\n"
+            "1\tRNAcentral\texon\t10\t20\t.\t+\t.\tID=a:ncRNA_exon1\n"
+        )
@@ -13,8 +13,13 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import io
+import itertools as it
+
 import pytest
 
+from Bio import SeqIO
+from Bio.SeqIO.FastaIO import SimpleFastaParser
 from Bio.Seq import Seq
 from Bio.SeqRecord import SeqRecord
 
@@ -55,3 +60,66 @@ from rnacentral_pipeline.rnacentral.ftp_export import fasta
 def test_can_classify_sequences_for_nhmmer(sequence, accepted):
     record = SeqRecord(Seq(sequence))
     assert fasta.is_valid_nhmmer_record(record) is accepted
+
+
+@pytest.mark.parametrize(
+    "sequence,accepted",
+    [
+        (b"", False),
+        (b"A", True),
+        (b"acgu", True),
+        (b"A-", False),
+        (b"ABCDGHKMNRSTVWXYU", True),
+        (b"AUUIGAAAUC", False),
+        (b"CUCGGXUICGAACCGAG", False),
+    ],
+)
+def test_can_classify_raw_sequences_for_nhmmer(sequence, accepted):
+    assert fasta.is_valid_nhmmer_sequence(sequence) is accepted
+    record = SeqRecord(Seq(sequence.decode()))
+    assert fasta.is_valid_nhmmer_record(record) is accepted
+
+
+def test_splits_records_like_seqio():
+    raw = (
+        ">URS0000000001_9606 Homo sapiens  rRNA \n"
+        + "ACGU" * 20
+        + "\nAC GU\n\n"
+        + ">URS0000000002_9606 bad\nACGUI\n"
+        + ">URS0000000003_9606\nacgu\nacgu\n"
+    )
+    valid = io.BytesIO()
+    invalid = io.BytesIO()
+    fasta.split_nhmmer(io.BytesIO(raw.encode()), valid, invalid)
+
+    for output, check in [(valid, filter), (invalid, it.filterfalse)]:
+        expected = io.StringIO()
+        records = SeqIO.parse(io.StringIO(raw), "fasta")
+        SeqIO.write(check(fasta.is_valid_nhmmer_record, records), expected, "fasta")
+        assert output.getvalue().decode() == expected.getvalue()
+
+
+def test_shards_output_by_size(tmp_path):
+    raw = b"".join(b">URS%i\nACGU\n" % i for i in range(5))
+    fasta.shard_nhmmer(io.BytesIO(raw), tmp_path, 25)
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert files == ["chunk-1.fasta", "chunk-2.fasta", "chunk-3.fasta"]
+    assert (tmp_path / "chunk-1.fasta").read_bytes() == b">URS0\nACGU\n>URS1\nACGU\n"
+    assert (tmp_path / "chunk-3.fasta").read_bytes() == b">URS4\nACGU\n"
+
+
+def test_keeps_internal_tabs_like_biopython():
+    raw = ">URS0000000001_9606\nAC\tGU\t\nACGU\n>URS0000000002_9606\nACGU \t\nAC\n"
+    parsed = list(fasta.records(io.BytesIO(raw.encode())))
+    assert parsed == [
+        (b"URS0000000001_9606", b"AC\tGUACGU"),
+        (b"URS0000000002_9606", b"ACGUAC"),
+    ]
+    expected = SimpleFastaParser(io.StringIO(raw))
+    assert parsed == [(t.encode(), s.encode()) for t, s in expected]
+
+    valid = io.BytesIO()
+    invalid = io.BytesIO()
+    fasta.split_nhmmer(io.BytesIO(raw.encode()), valid, invalid)
+    assert valid.getvalue() == b">URS0000000002_9606\nACGUAC\n"
+    assert invalid.getvalue() == b">URS0000000001_9606\nAC\tGUACGU\n"
@@ -13,6 +13,7 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import io
 import os
 
 import psycopg2
@@ -94,3 +95,102 @@ def entry(conn, urs_taxid: str) -> gpi.GpiEntry:
 )
 def test_builds_correct_data(conn, urs_taxid, expected):
     assert entry(conn, urs_taxid) == expected
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.itersize = None
+        self.query = None
+        self.closed = False
+
+    def execute(self, query, params=None):
+        self.query = query
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+        self.cursors = []
+
+    def cursor(self, name=None, **kwargs):
+        cursor = FakeCursor(self.rows)
+        cursor.name = name
+        self.cursors.append(cursor)
+        return cursor
+
+
+def test_load_streams_from_a_named_cursor():
+    conn = FakeConnection(
+        [
+            {
+                "id": "URS000012F9EC_9606",
+                "taxid": 9606,
+                "description": "Homo sapiens (human) hsa-miR-4691-3p",
+                "rna_type": "miRNA",
+                "precursors": ["URS000075C981_9606", "URS000075C981_9606"],
+                "symbols": ["hsa-miR-4691-3p", "hsa-miR-4691"],
+            },
+            {
+                "id": "URS0000000001_77133",
+                "taxid": 77133,
+                "description": "uncultured bacterium 16S ribosomal RNA",
+                "rna_type": "rRNA",
+                "precursors": None,
+                "symbols": None,
+            },
+        ]
+    )
+    entries = list(gpi.load(conn, itersize=5))
+    assert len(conn.cursors) == 1
+    cursor = conn.cursors[0]
+    assert cursor.name
+    assert cursor.itersize == 5
+    assert cursor.closed
+    assert '"mirbase_info"' in cursor.query
+    assert entries == [
+        gpi.GpiEntry(
+            urs_taxid="URS000012F9EC_9606",
+            description="Homo sapiens (human) hsa-miR-4691-3p",
+            rna_type="miRNA",
+            symbol="hsa-miR-4691",
+            precursors={"URS000075C981_9606"},
+            aliases=["hsa-miR-4691-3p"],
+        ),
+        gpi.GpiEntry(
+            urs_taxid="URS0000000001_77133",
+            description="uncultured bacterium 16S ribosomal RNA",
+            rna_type="rRNA",
+            symbol=None,
+            precursors=set(),
+            aliases=[],
+        ),
+    ]
+
+
+def test_write_uses_the_given_formatter():
+    entry = gpi.GpiEntry(
+        urs_taxid="URS0000000001_77133",
+        description="uncultured\tbacterium",
+        rna_type="rRNA",
+        symbol=None,
+        precursors=set(),
+        aliases=[],
+    )
+    out = io.StringIO()
+    gpi.write([entry], out)
+    assert out.getvalue() == (
+        "!gpi-version: 1.2\n"
+        "RNAcentral\tURS0000000001_77133\t\tuncultured bacterium\t\trRNA"
+        "\ttaxon:77133\t\t\t\n"
+    )
+
+    out = io.StringIO()
+    gpi.write([entry], out, formatter=lambda e: [e.urs_taxid, e.rna_type])
+    assert out.getvalue() == "!gpi-version: 1.2\nURS0000000001_77133\trRNA\n"
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright [2009-2024] EMBL-European Bioinformatics Institute
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import collections as coll
+import io
+import json
+
+import pytest
+
+from rnacentral_pipeline.databases.sequence_ontology import tree as so_tree
+from rnacentral_pipeline.rnacentral.genes import build, data
+
+ONTOLOGY = """format-version: 1.2
+ontology: so
+
+[Term]
+id: SO:0000673
+name: transcript
+
+[Term]
+id: SO:0000655
+name: ncRNA
+is_a: SO:0000673 ! transcript
+
+[Term]
+id: SO:0000252
+name: rRNA
+is_a: SO:0000655 ! ncRNA
+
+[Term]
+id: SO:0000276
+name: miRNA
+is_a: SO:0000655 ! ncRNA
+
+[Term]
+id: SO:0000188
+name: intron
+
+[Term]
+id: SO:0000836
+name: mRNA_region
+
+[Term]
+id: SO:0001263
+name: ncRNA_gene
+
+[Term]
+id: SO:0000253
+name: tRNA
+is_a: SO:0000655
+
+[Term]
+id: SO:0000274
+name: snRNA
+is_a: SO:0000655
+
+[Term]
+id: SO:0000275
+name: snoRNA
+is_a: SO:0000655
+
+[Term]
+id: SO:0000375
+name: rRNA_5_8S
+is_a: SO:0000252
+
+[Term]
+id: SO:0000650
+name: cytosolic_SSU_rRNA
+is_a: SO:0000252
+
+[Term]
+id: SO:0000651
+name: cytosolic_LSU_rRNA
+is_a: SO:0000252
+
+[Term]
+id: SO:0000652
+name: cytosolic_5S_rRNA
+is_a: SO:0000252
+
+[Term]
+id: SO:0002128
+name: mt_rRNA
+is_a: SO:0000252
+"""
+
+
+def raw_location(region_id, urs, strand, start, stop, rna_type="rRNA", issue=False):
+    return {
+        "region_id": region_id,
+        "urs_taxid": f"{urs}_9606",
+        "assembly_id": "GRCh38",
+        "taxid": 9606,
+        "chromosome": "1",
+        "strand": strand,
+        "region_start": start,
+        "region_stop": stop,
+        "region_name": f"{urs}_9606@1/{start}-{stop}:{strand}",
+        "exons": [
+            {"exon_start": stop - 5, "exon_stop": stop},
+            {"exon_start": start, "exon_stop": start + 5},
+        ],
+        "insdc_rna_type": rna_type,
+        "so_rna_type": rna_type,
+        "qa": [
+            {
+                "has_issue": issue,
+                "incomplete_sequence": False,
+                "possible_contamination": issue,
+                "missing_rfam_match": False,
+            }
+        ],
+        "providing_databases": ["Rfam"],
+        "databases": ["Rfam", "ENA"],
+    }
+
+
+RAW = [
+    raw_location(1, "URS0000000001", 1, 10, 100),
+    raw_location(2, "URS0000000002", 1, 50, 150, rna_type="miRNA", issue=True),
+    raw_location(3, "URS0000000003", 1, 200, 300),
+    raw_location(4, "URS0000000004", -1, 10, 100),
+]
+
+
+@pytest.fixture
+def context(tmp_path):
+    path = tmp_path / "so.obo"
+    path.write_text(ONTOLOGY)
+    counts = {}
+    for raw in RAW:
+        counts[raw["urs_taxid"]] = data.Count(
+            mapped_count=1, given_count=0, total_count=1
+        )
+    return data.Context(
+        ontology=so_tree.SoOntology.from_file(str(path)),
+        pseudogenes=coll.defaultdict(data.IntervalTree),
+        repetitive=coll.defaultdict(data.IntervalTree),
+        counts=counts,
+    )
+
+
+def test_builds_locations_with_sorted_exons(context):
+    location = data.LocationInfo.build(context, RAW[0])
+    assert [(e.start, e.stop) for e in location.exons] == [(10, 15), (95, 100)]
+
+
+def test_locations_share_rna_types(context):
+    locations = [data.LocationInfo.build(context, r) for r in RAW]
+    assert locations[0].rna_type is locations[2].rna_type
+    assert locations[0].rna_type is not locations[1].rna_type
+
+
+def test_can_build_genes_from_json(context):
+    handle = io.StringIO("\n".join(json.dumps(r) for r in RAW))
+    method = data.Methods.from_name("rules")
+    results = list(build.from_json(context, method, handle))
+    assert [r.key for r in results] == [
+        data.ClusteringKey(chromosome="1", strand=1),
+        data.ClusteringKey(chromosome="1", strand=-1),
+    ]
+    assert [l.id for l in results[0].rejected] == [2]
+    assert sorted(len(c) for c in results[0].clusters) == [1, 1]
+
+
+def test_batch_rows_build_the_same_locations(context):
+    key = data.ClusteringKey(chromosome="1", strand=1)
+    batch = data.LocationBatch.build(context, key, RAW[:3])
+    assert len(batch) == 3
+    assert len(batch.rna_types.values) == 2
+    assert len(batch.databases.values) == 1
+    for row, raw in enumerate(RAW[:3]):
+        assert batch.location(row) == data.LocationInfo.build(context, raw)
+
+
+def test_batch_views_match_locations(context):
+    key = data.ClusteringKey(chromosome="1", strand=1)
+    batch = data.LocationBatch.build(context, key, RAW[:3])
+    for view, raw in zip(batch.locations(), RAW):
+        location = data.LocationInfo.build(context, raw)
+        assert view.id == location.id
+        assert view.extent == location.extent
+        assert view.as_interval() == location.as_interval()
+        assert view.has_introns() == location.has_introns()
+        assert view.is_rfam_only() == location.is_rfam_only()
+        assert view.rna_type is location.rna_type
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        RAW[3],
+        {**RAW[0], "assembly_id": "GRCh37"},
+        {**RAW[0], "urs_taxid": None},
+    ],
+)
+def test_batch_rejects_invalid_rows(context, raw):
+    key = data.ClusteringKey(chromosome="1", strand=1)
+    batch = data.LocationBatch.build(context, key, RAW[:1])
+    with pytest.raises((TypeError, ValueError)):
+        batch.add(context, raw)
+
+
+def test_batch_rejects_duplicate_ids(context):
+    key = data.ClusteringKey(chromosome="1", strand=1)
+    with pytest.raises(ValueError):
+        data.LocationBatch.build(context, key, [RAW[0], RAW[0]])
+
+
+def test_only_builds_written_locations(context):
+    handle = io.StringIO("\n".join(json.dumps(r) for r in RAW))
+    method = data.Methods.from_name("rules")
+    result = next(build.from_json(context, method, handle))
+    assert isinstance(result.clusters, data.LazySequence)
+    assert isinstance(result.rejected, data.LazySequence)
+    members = [m.location for c in result.clusters for m in c.members]
+    assert sorted(l.id for l in members) == [1, 3]
+    assert all(isinstance(l, data.LocationInfo) for l in members)
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright [2009-2024] EMBL-European Bioinformatics Institute
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import pytest
+
+from rnacentral_pipeline.databases.data import Database, Exon
+from rnacentral_pipeline.rnacentral.genes import data, write
+from rnacentral_pipeline.rnacentral.genes.data.cluster import WriteableClusterMember
+from rnacentral_pipeline.rnacentral.genes.data.location import Count, QaInfo
+from rnacentral_pipeline.rnacentral.genes.data.rna_type import RnaType, SoTermInfo
+
+ALL_MEMBERS = {data.MemberType.highlighted, data.MemberType.member}
+
+
+def location(lid, urs_taxid, start, stop, exons):
+    extent = data.Extent(
+        assembly="GRCh38",
+        taxid=9606,
+        chromosome="1",
+        strand=-1,
+        start=start,
+        stop=stop,
+    )
+    return data.LocationInfo(
+        id=lid,
+        urs_taxid=urs_taxid,
+        extent=extent,
+        exons=tuple(Exon(start=s, stop=e) for (s, e) in exons),
+        region_name=extent.region_name(urs_taxid),
+        rna_type=RnaType(
+            insdc="rRNA",
+            so_term="rRNA",
+            ontology_terms=(),
+            normalized_term=SoTermInfo("rRNA", "SO:0000252"),
+        ),
+        qa=QaInfo(False, False, False, False),
+        providing_databases=(Database.rfam,),
+        databases=(Database.rfam, Database.ena),
+        counts=Count(mapped_count=1, given_count=0, total_count=1),
+    )
+
+
+@pytest.fixture
+def result():
+    first = location(1, "URS0000000001_9606", 10, 100, [(10, 20), (30, 100)])
+    second = location(2, "URS0000000002_9606", 15, 120, [(15, 120)])
+    rejected = location(3, "URS0000000003_9606", 500, 600, [(500, 600)])
+    cluster = data.WriteableCluster(
+        extent=first.extent.merge(second.extent),
+        members={
+            WriteableClusterMember(first, data.MemberType.highlighted),
+            WriteableClusterMember(second, data.MemberType.member),
+        },
+    )
+    return data.FinalizedState(
+        key=data.ClusteringKey(chromosome="1", strand=-1),
+        clusters=[cluster],
+        rejected=[rejected],
+    )
+
+
+def test_gff_lines_match_gffutils_features(result):
+    cluster = result.clusters[0]
+    features = [str(f) for f in cluster.as_features()]
+    assert list(cluster.as_gff()) == features
+    rejected = result.rejected[0]
+    assert list(rejected.as_gff()) == [str(f) for f in rejected.as_features()]
+
+
+@pytest.mark.parametrize(
+    "format,filenames",
+    [
+        (write.Format.Csv, ["locus.csv", "rejected.csv", "ignored.csv"]),
+        (write.Format.Bed, ["locus.bed", "rejected.bed", "ignored.bed"]),
+        (write.Format.Gff, ["locus.gff", "rejected.gff", "ignored.gff"]),
+    ],
+)
+def test_writes_all_results_to_one_file_per_type(tmp_path, result, format, filenames):
+    write.write([result, result], format, tmp_path, allowed_members=ALL_MEMBERS)
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(filenames)
+    with (tmp_path / filenames[1]).open("r") as raw:
+        rejected = [l for l in raw if not l.startswith("#")]
+    assert len(rejected) == 2 * (1 if format != write.Format.Gff else 2)
+
+
+def test_only_writes_gff_header_once(tmp_path, result):
+    write.write(
+        [result, result], write.Format.Gff, tmp_path, allowed_members=ALL_MEMBERS
+    )
+    with (tmp_path / "locus.gff").open("r") as raw:
+        lines = raw.readlines()
+    assert lines[0] == "##gff-version 3\n"
+    assert sum(1 for l in lines if l.startswith("#")) == 1
+    assert len(lines) == 1 + 2 * 6
@@ -21,7 +21,7 @@ import pytest
 from psycopg2.extras import DictCursor
 from pypika import Query, Table
 
-from rnacentral_pipeline.rnacentral.r2dt import data
+from rnacentral_pipeline.rnacentral.r2dt import data, should_show
 
 
 @pytest.fixture(scope="module")
@@ -69,3 +69,81 @@ def loaded_data():
 def test_should_show(connection, urs, expected):
     data = fetch_data(connection, urs)
     assert data.showable() is expected
+
+
+def feature_row(urs, source="crw", length=100, diagram=(0, 90), model=(1, 91)):
+    return (
+        urs,
+        length,
+        source,
+        diagram[0],
+        diagram[1],
+        30,
+        model[0],
+        model[1],
+        100,
+        35,
+        2,
+    )
+
+
+def test_can_build_feature_matrix():
+    rows = [feature_row("URS1"), feature_row("URS2", source="rfam", diagram=(5, 20))]
+    matrix = should_show.feature_matrix(rows)
+    assert matrix.shape == (2, len(should_show.MODEL_COLUMNS))
+    assert matrix.tolist() == [
+        [0, 100, 90, 100, 35, 30, 90, 2],
+        [4, 100, 15, 100, 35, 30, 90, 2],
+    ]
+
+
+def test_feature_matrix_rejects_unknown_sources():
+    with pytest.raises(ValueError):
+        should_show.feature_matrix([feature_row("URS1", source="other")])
+
+
+def test_fetches_modeled_rows_in_batches(monkeypatch):
+    requested = []
+
+    def fake_stream(conn, query, params=None):
+        requested.append(params["ids"])
+        for urs in params["ids"]:
+            if urs != "URS3":
+                yield feature_row(urs)
+        yield feature_row("URS4")[:-1] + (None,)
+
+    monkeypatch.setattr(should_show.db, "stream", fake_stream)
+    ids = ["URS1", "URS2", "URS3"]
+    rows = list(should_show.fetch_modeled_rows(ids, None, batch_size=2))
+    assert requested == [["URS1", "URS2"], ["URS3"]]
+    assert [r[0] for r in rows] == ["URS1", "URS2"]
+
+
+def synthetic_training(tmp_path, count=200):
+    labels = tmp_path / "labels.csv"
+    features = tmp_path / "features.csv"
+    with labels.open("w") as lout, features.open("w") as fout:
+        writer = csv.writer(fout)
+        writer.writerow(should_show.FIELDS)
+        for index in range(count):
+            urs = "URS%010X" % index
+            good = index % 2 == 0
+            stop = 90 if good else 20
+            writer.writerow(feature_row(urs, diagram=(0, stop), length=100 + index))
+            lout.write("%s,%i\n" % (urs, int(good)))
+    return labels, features
+
+
+def test_can_train_evaluate_and_predict_offline(tmp_path):
+    labels, features = synthetic_training(tmp_path)
+    with labels.open() as lraw, features.open() as fraw:
+        model = should_show.train(lraw, None, features=fraw, random_state=1)
+    with labels.open() as lraw, features.open() as fraw:
+        assert should_show.evaluate(model, lraw, fraw) == 1.0
+
+    with features.open() as fraw:
+        rows = should_show.load_features(fraw)
+    predicted = list(should_show.predict(model, rows, batch_size=7))
+    assert len(predicted) == len(rows)
+    assert predicted[0] == (rows[0][0], 1)
+    assert predicted[1] == (rows[1][0], 0)
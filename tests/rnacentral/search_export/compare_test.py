@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright [2009-2021] EMBL-European Bioinformatics Institute
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import gzip
+import io
+import os
+
+import pytest
+
+from rnacentral_pipeline.rnacentral.search_export import compare
+
+EXPORT = "data/export/search"
+
+
+def local_index(queries, facets):
+    paths = [os.path.join(EXPORT, f) for f in sorted(os.listdir(EXPORT))]
+    return compare.LocalIndex.build(paths, queries, facets)
+
+
+def test_can_extract_facet_counts():
+    results = {"facets": [{"facetValues": [{"value": "rRNA", "count": 3}]}]}
+    assert compare.facet_counts(results) == {"rRNA": 3}
+    assert compare.facet_counts(None) is None
+    assert compare.facet_counts({"facets": []}) is None
+
+
+@pytest.mark.parametrize(
+    "query,terms,expected",
+    [
+        ('TAXONOMY:"9606"', {"taxonomy": {"9606"}}, True),
+        ('TAXONOMY:"9606"', {"taxonomy": {"10090"}}, False),
+        ('expert_db:"ENA"', {"expert_db": {"ENA", "Rfam"}}, True),
+        ('expert_db:"ena"', {"expert_db": {"ENA"}}, True),
+        ("RNA", {"description": {"Human 18S ribosomal RNA"}}, True),
+        ("RNA", {"description": {"Human rRNA"}}, False),
+    ],
+)
+def test_can_match_queries_locally(query, terms, expected):
+    assert compare.matcher(query)(terms) is expected
+
+
+def test_rejects_queries_it_cannot_evaluate():
+    with pytest.raises(ValueError):
+        compare.matcher("rna AND TAXONOMY:9606")
+
+
+def test_can_build_local_index_from_xml():
+    index = local_index(['expert_db:"ENA"'], ["rna_type"])
+    counts = index.facets('expert_db:"ENA"', "rna_type")
+    assert counts
+    assert all(isinstance(v, int) and v > 0 for v in counts.values())
+    assert index.facets("RNA", "rna_type") is None
+
+
+def test_can_read_gzipped_xml(tmp_path):
+    source = os.path.join(EXPORT, "URS000000079A_87230.xml")
+    path = tmp_path / "export.xml.gz"
+    with open(source, "rb") as raw, gzip.open(path, "wb") as out:
+        out.write(b"<database><entries>")
+        out.write(raw.read())
+        out.write(b"</entries></database>")
+
+    index = compare.LocalIndex.build([path], ['TAXONOMY:"87230"'], ["rna_type"])
+    assert index.facets('TAXONOMY:"87230"', "rna_type") == {"rRNA": 1}
+
+
+def test_local_index_round_trips():
+    index = local_index(["RNA", 'TAXONOMY:"9606"'], compare.FACETS)
+    out = io.StringIO()
+    index.dump(out)
+    out.seek(0)
+    assert compare.LocalIndex.load(out) == index
+
+
+def test_compares_values_from_both_indexes():
+    result = compare.compare(
+        "RNA", "rna_type", {"rRNA": 10, "tRNA": 4}, {"rRNA": 12, "miRNA": 2}
+    )
+    assert [c.as_row() for c in result.changes] == [
+        ["rRNA", "10", "12", "2", "20.0%", "Change > 10%"],
+        ["tRNA", "4", "0", "-4", "-100.0%", "Change > 10%"],
+        ["miRNA", "0", "2", "2", "NA", "New value"],
+    ]
+
+
+def test_reports_missing_results():
+    result = compare.compare("RNA", "rna_type", None, {"rRNA": 1})
+    assert result.changes == []
+    assert result.error == "No results from: before"
+
+
+class FakeIndex:
+    def __init__(self, counts):
+        self.counts = counts
+
+    def facets(self, query, facet):
+        return self.counts.get((query, facet))
+
+
+def test_comparisons_keep_query_order():
+    before = FakeIndex({("a", "f"): {"x": 1}, ("b", "f"): {"x": 2}})
+    after = FakeIndex({("a", "f"): {"x": 1}, ("b", "f"): {"x": 3}})
+    report = compare.comparisons(before, after, queries=["a", "b"], facets=["f"])
+    assert [(c.query, c.facet) for c in report] == [("a", "f"), ("b", "f")]
+    assert [c.flagged for c in report] == [[], [compare.FacetChange("x", 2, 3)]]
+
+
+def test_can_compare_an_export_to_itself_offline():
+    index = local_index(compare.QUERIES, compare.FACETS)
+    out = io.StringIO()
+    compare.write(out, before=index, after=index, format="json")
+    assert "Change > 10%" not in out.getvalue()
+    assert "New value" not in out.getvalue()
@@ -31,3 +31,16 @@ def test_can_serialize_stream():
         assert not isinstance(result, list)
         for index, obj in enumerate(result):
             assert data[index] == obj
+
+
+@pytest.mark.parametrize("run_size", [1, 2, 3, 5, 100])
+def test_external_sort_is_a_stable_sort(run_size, tmp_path):
+    data = [(3, "a"), (1, "b"), (2, "c"), (1, "d"), (3, "e"), (0, "f"), (1, "g")]
+    key = lambda d: d[0]
+    result = utils.external_sort(data, key=key, run_size=run_size, directory=tmp_path)
+    assert list(result) == sorted(data, key=key)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_external_sort_handles_no_items():
+    assert list(utils.external_sort([])) == []
@@ -24,78 +24,24 @@ process find_jobs {
   """
 }
 
-process fetch {
-  tag { "${assembly}-${species}" }
-  maxForks 2
-
-  input:
-  tuple val(assembly), val(species), val(taxid), path(query)
-
-  output:
-  tuple val(assembly), val(species), path('result.json')
-
-  """
-  psql -v ON_ERROR_STOP=1 -v "assembly_id=$assembly" -f $query "$PGDATABASE" > result.json
-  """
-}
-
-process generate_bed {
-  tag { "${assembly}-${species}" }
-  publishDir "${params.export.ftp.publish}/genome_coordinates/bed/", mode: 'copy'
-
-  input:
-  tuple val(assembly), val(species), path(raw_data)
-
-  output:
-  tuple val(assembly), path("${species}.${assembly}.bed.gz")
-
-  """
-  set -euo pipefail
-
-  rnac ftp-export coordinates as-bed $raw_data |\
-  sort -k1,1 -k2,2n |\
-  gzip > ${species}.${assembly}.bed.gz
-  """
-}
-
-process generate_gff3 {
-  tag { "${assembly}-${species}" }
-  memory params.export.ftp.coordinates.gff3.memory
-  publishDir "${params.export.ftp.publish}/genome_coordinates/gff3", mode: 'copy'
-
-  input:
-  tuple val(assembly), val(species), path(raw_data)
-
-  output:
-  path("${species}.${assembly}.gff3.gz")
-
-  """
-  set -euo pipefail
-
-  rnac ftp-export coordinates as-gff3 $raw_data - |\
-  sort -t"`printf '\\t'`" -k1,1 -k4,4n |\
-  gzip > "${species}.${assembly}.gff3.gz"
-  """
-}
-
-process generate_gff3_for_igv {
-  tag { "${assembly}-${species}" }
+process export_assemblies {
   memory params.export.ftp.coordinates.gff3.memory
-  publishDir "${params.export.ftp.publish}/.genome-browser-dev", mode: 'copy'
+  cpus params.export.ftp.coordinates.workers
+  publishDir "${params.export.ftp.publish}/genome_coordinates/", mode: 'copy', pattern: '{bed,gff3}/*'
+  publishDir "${params.export.ftp.publish}/.genome-browser-dev", mode: 'copy', pattern: 'igv/*', saveAs: { fn -> file(fn).name }
 
   input:
-  tuple val(assembly), val(species), path(raw_data)
+  path(assemblies)
 
   output:
-  path("${species}.${assembly}.rnacentral.gff3.gz")
+  path('bed/*.bed.gz'), emit: bed, optional: true
+  path('gff3/*.gff3.gz'), emit: gff3, optional: true
+  path('igv/*.rnacentral.gff3.gz'), emit: igv, optional: true
 
   """
-  set -euo pipefail
-
-  rnac ftp-export coordinates as-gff3 $raw_data - |\
-  sort -t"`printf '\\t'`" -k1,1 -k4,4n |\
-  sed s/noncoding_exon/exon/g |\
-  bgzip > "${species}.${assembly}.rnacentral.gff3.gz"
+  rnac ftp-export coordinates export-assemblies \
+    --workers ${params.export.ftp.coordinates.workers} \
+    $assemblies .
   """
 }
 
@@ -114,19 +60,10 @@ process index_gff3 {
 
 workflow export_coordinates {
   Channel.fromPath('files/ftp-export/genome_coordinates/known-coordinates.sql') | set { known }
-  Channel.fromPath('files/ftp-export/genome_coordinates/query.sql') | set { query }
 
   readme(Channel.fromPath('files/ftp-export/genome_coordinates/readme.mkd'))
 
-  known \
-  | find_jobs \
-  | splitCsv \
-  | combine(query) \
-  | fetch \
-  | filter { _a, _s, fn -> !fn.isEmpty() } \
-  | set { coordinates }
-
-  coordinates | generate_bed
-  coordinates | generate_gff3
-  coordinates | generate_gff3_for_igv | index_gff3
+  known | find_jobs | export_assemblies
+
+  export_assemblies.out.igv | flatten | index_gff3
 }
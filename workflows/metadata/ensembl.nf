@@ -1,9 +1,11 @@
-process assemblies {
+process core_metadata {
   when { params.databases.ensembl.vertebrates.run }
 
   input:
   path(connections)
-  path(query)
+  path(assemblies_sql)
+  path(coordinate_systems_sql)
+  path(protein_sql)
   path(examples)
   path(known)
 
@@ -11,7 +13,14 @@ process assemblies {
   path('*.csv')
 
   """
-  rnac ensembl assemblies $connections $query $examples $known
+  rnac ensembl core-metadata \
+    $connections \
+    $assemblies_sql \
+    $coordinate_systems_sql \
+    $protein_sql \
+    $examples \
+    $known \
+    .
   """
 }
 
@@ -42,7 +51,7 @@ process process_compara {
 }
 
 process proteins {
-  when { params.databases.ensembl.vertebrates.run || params.databases.tarbase.run || params.databases.lncbase.run }
+  when { !params.databases.ensembl.vertebrates.run && (params.databases.tarbase.run || params.databases.lncbase.run) }
 
   input:
   path(connections)
@@ -56,21 +65,6 @@ process proteins {
   """
 }
 
-process coordinate_systems {
-  when { params.databases.ensembl.vertebrates.run }
-
-  input:
-  path(connections)
-  path(query)
-
-  output:
-  path('coordinate_systems.csv')
-
-  """
-  rnac ensembl coordinate-systems $connections $query coordinate_systems.csv
-  """
-}
-
 process karyotypes {
   when { params.databases.ensembl.vertebrates.run }
 
@@ -102,8 +96,7 @@ workflow ensembl {
 
     Channel.empty() \
     | mix(
-      assemblies(conn, assemblies_sql, examples, known),
-      coordinate_systems(conn, coordinate_systems_sql),
+      core_metadata(conn, assemblies_sql, coordinate_systems_sql, protein_sql, examples, known),
       proteins(conn, protein_sql),
       karyotypes(),
       compara(),